@@ -0,0 +1,171 @@
+import json
+import zlib
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+from loguru import logger
+
+from app.engine.lap_store import LAPS_DIR, ARCHIVE_DIR, archived_laps, map_raw
+from app.ai.ghost_features import FEATURES, TARGETS, lap_features, lap_targets
+
+DATASET_DIR = Path("data/ghost_dataset")
+MIN_LAP_FRAMES = 100
+NORM_CHUNK = 1 << 20     # Rows normalized per pass over the memmap
+
+
+def _split_of(key, val_fraction):
+    # Stable across runs and machines (unlike hash()), independent of lap order
+    return "val" if zlib.crc32(str(key).encode()) % 1000 < val_fraction * 1000 else "train"
+
+
+def build_dataset(out_dir=DATASET_DIR, lap_dirs=(LAPS_DIR, ARCHIVE_DIR), history=None):
+    """
+    Compacts recorded laps (raw per-frame samples of the lap store files)
+    into flat float32 files that training memory-maps:
+
+        features.f32  [Frames, FEATURES], normalized with the stored stats
+        targets.f32   [Frames, TARGETS]
+        meta.json     shapes, normalization, per-lap offsets/track/car
+
+    Laps are streamed one at a time from memory-mapped lap files, so the
+    corpus never has to fit in RAM.
+
+    Args:
+        lap_dirs (sequence): Directories of lap .npz files (live store, archive).
+        history (list): Lap summaries for track/car/valid (default: analysis
+            history plus the archived laps).
+    """
+    if history is None:
+        from app.engine.analysis import analysis_engine
+        history = archived_laps() + analysis_engine.get_history()
+    info = {entry["lap_id"]: entry for entry in history if entry.get("lap_id")}
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    features_path, targets_path = out_dir / "features.f32", out_dir / "targets.f32"
+
+    # 1. Stream laps to disk, accumulating feature stats
+    laps, rows = [], 0
+    total = np.zeros(len(FEATURES))
+    total_sq = np.zeros(len(FEATURES))
+    with open(features_path, "wb") as f_features, open(targets_path, "wb") as f_targets:
+        for path in sorted(p for d in lap_dirs for p in Path(d).glob("*.npz")):
+            lap_id = path.stem
+            entry = info.get(lap_id, {})
+            if entry.get("valid") is False:
+                continue
+            raw = map_raw(path)
+            if raw is None:
+                continue
+            n = len(raw["lap_dist_pct"])
+            if n < MIN_LAP_FRAMES:
+                continue
+
+            features = lap_features(raw["speed"], raw["time"], raw["lap_dist_pct"])
+            targets = lap_targets(raw["steering"], raw["throttle"], raw["brake"])
+            features.tofile(f_features)
+            targets.tofile(f_targets)
+            total += features.sum(axis=0, dtype=np.float64)
+            total_sq += np.square(features, dtype=np.float64).sum(axis=0)
+            laps.append({
+                "lap_id": lap_id,
+                "track": entry.get("track", "Unknown"),
+                "car": entry.get("car", "Unknown"),
+                "offset": rows,
+                "length": n
+            })
+            rows += n
+
+    mean = total / max(rows, 1)
+    std = np.sqrt(np.maximum(total_sq / max(rows, 1) - mean ** 2, 0.0))
+    std[std < 1e-6] = 1.0
+
+    # 2. Normalize in place, chunk by chunk
+    if rows:
+        features = np.memmap(features_path, dtype=np.float32, mode="r+", shape=(rows, len(FEATURES)))
+        for start in range(0, rows, NORM_CHUNK):
+            chunk = features[start:start + NORM_CHUNK]
+            chunk -= mean.astype(np.float32)
+            chunk /= std.astype(np.float32)
+        features.flush()
+        del features
+
+    meta = {
+        "rows": rows,
+        "features": list(FEATURES),
+        "targets": list(TARGETS),
+        "mean": mean.tolist(),
+        "std": std.tolist(),
+        "laps": laps
+    }
+    with open(out_dir / "meta.json", "w") as f:
+        json.dump(meta, f)
+    logger.info(f"Ghost dataset: {len(laps)} laps, {rows} frames -> {out_dir}")
+    return meta
+
+
+class GhostDataset(Dataset):
+    """
+    (sequence, target) pairs over a dataset built by build_dataset().
+
+    The feature file is memory-mapped and every sequence is a strided view
+    into it (no window is materialized ahead of time), so memory use does
+    not grow with the corpus. Windows never cross a lap boundary; the target
+    is the controls at the last frame of the window.
+
+    Args:
+        split (str): "train", "val" or None for everything.
+        split_by (str): "lap" or "track" (whole tracks held out).
+        val_fraction (float): Share of laps/tracks in the validation split.
+        track, car (str): Only laps of this track/car (None = all).
+    """
+
+    def __init__(self, data_dir=DATASET_DIR, seq_len=50, split="train", split_by="lap", val_fraction=0.1, track=None, car=None):
+        self.data_dir = Path(data_dir)
+        self.seq_len = seq_len
+        with open(self.data_dir / "meta.json") as f:
+            self.meta = json.load(f)
+        self.mean = np.asarray(self.meta["mean"], dtype=np.float32)
+        self.std = np.asarray(self.meta["std"], dtype=np.float32)
+
+        laps = [
+            lap for lap in self.meta["laps"]
+            if lap["length"] >= seq_len
+            and (track is None or lap["track"] == track) and (car is None or lap["car"] == car)
+            and (split is None or _split_of(lap["lap_id"] if split_by == "lap" else lap["track"], val_fraction) == split)
+        ]
+        self.laps = laps
+        # Window i -> lap via the cumulative window count (O(laps) memory, not O(windows))
+        self._offsets = np.array([lap["offset"] for lap in laps], dtype=np.int64)
+        self._cum_windows = np.cumsum([lap["length"] - seq_len + 1 for lap in laps], dtype=np.int64)
+        # Opened lazily per process: DataLoader workers must not receive pickled array data
+        self._features = None
+        self._targets = None
+
+    def _open(self):
+        rows = self.meta["rows"]
+        features = np.memmap(self.data_dir / "features.f32", dtype=np.float32, mode="r", shape=(rows, len(FEATURES)))
+        # [Rows - seq_len + 1, Features, seq_len] view; window i is _features[i].T
+        self._features = np.lib.stride_tricks.sliding_window_view(features, self.seq_len, axis=0)
+        self._targets = np.memmap(self.data_dir / "targets.f32", dtype=np.float32, mode="r", shape=(rows, len(TARGETS)))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_features"] = None
+        state["_targets"] = None
+        return state
+
+    def __len__(self):
+        return int(self._cum_windows[-1]) if len(self._cum_windows) else 0
+
+    def __getitem__(self, idx):
+        if self._features is None:
+            self._open()
+        lap = int(np.searchsorted(self._cum_windows, idx, side="right"))
+        start = self._offsets[lap] + idx - (self._cum_windows[lap - 1] if lap else 0)
+        window = self._features[start].T
+        target = self._targets[start + self.seq_len - 1]
+        # The only copy: one window into the batch tensor
+        return torch.from_numpy(np.array(window)), torch.from_numpy(np.array(target))
@@ -0,0 +1,32 @@
+import numpy as np
+
+# Model inputs per frame: speed, longitudinal acceleration and the track
+# position on the unit circle (continuous across the line)
+FEATURES = ("speed", "accel", "track_sin", "track_cos")
+# Model outputs: steering [-1, 1], throttle [0, 1], brake [0, 1]
+TARGETS = ("steering", "throttle", "brake")
+STEERING_LOCK = 7.85     # rad, same fallback range as the LMU telemetry path
+
+
+def lap_features(speed, time, lap_dist_pct):
+    """
+    Model features for consecutive frames of one lap.
+
+    Args:
+        speed (array): km/h.
+        time (array): Seconds (any origin).
+        lap_dist_pct (array): Lap distance fraction.
+
+    Returns:
+        np.ndarray: [Frames, len(FEATURES)] float32, not normalized.
+    """
+    speed = np.asarray(speed, dtype=np.float64)
+    accel = np.gradient(speed, np.asarray(time, dtype=np.float64)) if len(speed) > 1 else np.zeros_like(speed)
+    angle = 2 * np.pi * np.asarray(lap_dist_pct, dtype=np.float64)
+    return np.stack([speed, np.nan_to_num(accel), np.sin(angle), np.cos(angle)], axis=1).astype(np.float32)
+
+
+def lap_targets(steering, throttle, brake):
+    """Model targets [Frames, len(TARGETS)] float32 (steering angle in rad -> [-1, 1])."""
+    steering = np.clip(np.asarray(steering, dtype=np.float64) / STEERING_LOCK, -1.0, 1.0)
+    return np.stack([steering, throttle, brake], axis=1).astype(np.float32)
@@ -49,8 +49,29 @@ class GhostNet(nn.Module):
         out, (hn, cn) = self.lstm(x)
         
         # Take the last time step
-        last_step = out[:, -1, :]
-        
+        return self._heads(out[:, -1, :])
+
+    def step(self, x, state=None):
+        """
+        Streaming pass: advances the LSTM over the new frame(s) only.
+
+        Args:
+            x (Tensor): New telemetry frames [Batch, Steps, Features] (usually 1 step).
+            state (tuple): (h, c) returned by the previous call, None to start fresh.
+
+        Returns:
+            tuple: (controls [Batch, 3], (h, c)) - pass (h, c) to the next call.
+        """
+        out, state = self.lstm(x, state)
+        return self._heads(out[:, -1, :]), state
+
+    def init_state(self, batch_size=1):
+        """Zero (h, c) for a new stream: [NumLayers, Batch, Hidden] each."""
+        shape = (self.lstm.num_layers, batch_size, self.lstm.hidden_size)
+        weight = self.steering_head.weight
+        return weight.new_zeros(shape), weight.new_zeros(shape)
+
+    def _heads(self, last_step):
         # Latent Driving Features
         features = self.fc(last_step)
         
@@ -61,6 +82,53 @@ class GhostNet(nn.Module):
         
         return torch.cat([steering, throttle, brake], dim=1)
 
+
+class GhostNetStreaming(nn.Module):
+    """
+    Export wrapper with the LSTM state as explicit inputs/outputs, so ONNX and
+    TorchScript backends can carry (h, c) between frames.
+
+    Inputs: telemetry_sequence [Batch, Steps, Features], h0, c0 [NumLayers, Batch, Hidden]
+    Outputs: controls [Batch, 3], hn, cn
+    """
+
+    def __init__(self, model):
+        super(GhostNetStreaming, self).__init__()
+        self.model = model
+
+    def forward(self, x, h0, c0):
+        controls, (hn, cn) = self.model.step(x, (h0, c0))
+        return controls, hn, cn
+
+def export_onnx(model, path, seq_len=50, input_size=4):
+    """
+    Exports GhostNet for CPU inference with the LSTM state as inputs/outputs
+    (see GhostNetStreaming). Batch and sequence length are dynamic, so the
+    same file runs a full window (zero state) or one frame per call.
+    """
+    model = model.cpu().eval()
+    # Batch of 2: a size-1 example dimension would be specialized to 1 by the exporter
+    h0, c0 = model.init_state(2)
+    dummy_input = torch.randn(2, seq_len, input_size)
+    torch.onnx.export(
+        GhostNetStreaming(model),
+        (dummy_input, h0, c0),
+        path,
+        verbose=False,
+        input_names=["telemetry_sequence", "h0", "c0"],
+        output_names=["controls", "hn", "cn"],
+        external_data=False,   # Single self-contained file (the model is small)
+        dynamic_axes={
+            "telemetry_sequence": {0: "batch", 1: "steps"},
+            "h0": {1: "batch"},
+            "c0": {1: "batch"},
+            "controls": {0: "batch"},
+            "hn": {1: "batch"},
+            "cn": {1: "batch"}
+        }
+    )
+    return path
+
 if __name__ == "__main__":
     # Sanity Check
     model = GhostNet()
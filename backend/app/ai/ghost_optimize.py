@@ -0,0 +1,119 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnxruntime.quantization import quantize_dynamic, QuantType
+from loguru import logger
+
+from app.ai.ghost_runtime import GhostRuntime, variant_path, report_path
+
+VARIANTS = ("fp32", "fused", "int8")
+THREAD_COUNTS = (1, 2, 4)
+BENCH_FRAMES = 1000
+HELD_OUT_WINDOWS = 4096
+
+
+def export_variants(onnx_path):
+    """
+    Builds the CPU variants next to the fp32 export:
+
+        fused  offline ORT graph optimization (constant folding, Gemm/activation fusions)
+        int8   dynamic quantization of the fused graph (int8 LSTM/Gemm weights,
+               activations quantized per call)
+
+    Returns:
+        dict: Variant name -> path.
+    """
+    paths = {"fp32": onnx_path}
+
+    # 1. Fusion: let ORT write its optimized graph (CPU provider only)
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = variant_path(onnx_path, "fused")
+    ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+    # Exporter shape annotations can disagree with ONNX shape inference; they are recomputed
+    fused = onnx.load(options.optimized_model_filepath)
+    del fused.graph.value_info[:]
+    onnx.save(fused, options.optimized_model_filepath)
+    paths["fused"] = options.optimized_model_filepath
+
+    # 2. Dynamic int8 quantization (folded weights are plain initializers after fusion)
+    paths["int8"] = variant_path(onnx_path, "int8")
+    quantize_dynamic(paths["fused"], paths["int8"], weight_type=QuantType.QInt8)
+    return paths
+
+
+def _latency(runtime, stream, frames):
+    runtime.reset()
+    for x in stream[:50]:
+        runtime.step(x)
+    samples = np.empty(frames)
+    for i in range(frames):
+        start = time.perf_counter()
+        runtime.step(stream[i % len(stream)])
+        samples[i] = time.perf_counter() - start
+    p50, p99 = np.percentile(samples * 1000, [50, 99])
+    return {"p50": round(float(p50), 4), "p99": round(float(p99), 4)}
+
+
+def optimize_ghost(onnx_path, windows, targets=None, thread_counts=THREAD_COUNTS, frames=BENCH_FRAMES):
+    """
+    Export/optimization stage: builds the variants, measures accuracy on a
+    held-out set and streaming latency per intra-op thread count, and writes
+    the report the runtime selects a variant from (<model>.report.json).
+
+    Args:
+        windows (np.ndarray): Held-out windows [N, Steps, Features] (normalized).
+        targets (np.ndarray): Optional recorded controls [N, 3] for the MSE.
+
+    Returns:
+        dict: The report.
+    """
+    paths = export_variants(onnx_path)
+    windows = np.ascontiguousarray(windows, dtype=np.float32)
+    stream = windows[:, -1, :]
+
+    reference = None
+    report = {
+        "model": os.path.basename(onnx_path),
+        "created": datetime.utcnow().isoformat(),
+        "held_out_windows": len(windows),
+        "cpu_count": os.cpu_count(),
+        "variants": {}
+    }
+    for name in VARIANTS:
+        runtime = GhostRuntime.load(paths[name], threads=1)
+        outputs = runtime.predict_batch(windows)
+        if reference is None:
+            reference = outputs
+        entry = {
+            "path": os.path.basename(paths[name]),
+            "size_kb": round(os.path.getsize(paths[name]) / 1024, 1),
+            # Accuracy loss: mean absolute control difference to fp32 (full scale = 1)
+            "accuracy_loss": round(float(np.abs(outputs - reference).mean()), 6),
+            "max_abs_diff": round(float(np.abs(outputs - reference).max()), 6),
+            "mse": None if targets is None else round(float(np.mean((outputs - targets) ** 2)), 6),
+            "latency_ms": {}
+        }
+        for threads in thread_counts:
+            entry["latency_ms"][str(threads)] = _latency(GhostRuntime.load(paths[name], threads=threads), stream, frames)
+        report["variants"][name] = entry
+        logger.info(f"Ghost {name}: loss {entry['accuracy_loss']:.5f}, latency {entry['latency_ms']}")
+
+    with open(report_path(onnx_path), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def held_out_windows(dataset, limit=HELD_OUT_WINDOWS):
+    """Evenly spaced (deterministic) windows and targets from a GhostDataset split."""
+    n = len(dataset)
+    if n == 0:
+        return None, None
+    idx = np.linspace(0, n - 1, min(limit, n)).astype(np.int64)
+    pairs = [dataset[int(i)] for i in idx]
+    return np.stack([x.numpy() for x, _ in pairs]), np.stack([y.numpy() for _, y in pairs])
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.ai.ghost_runtime import GhostRuntime, variant_path, report_path
+
+MODELS_DIR = Path("data/ghost_models")
+MODEL_FILE = "ghost.onnx"
+VARIANTS = ("fused", "int8")
+RECHECK_SECONDS = 30.0   # Missing models and the latest version are looked up on disk again after this
+
+
+def _model_dir(track, car, version=None):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{track}__{car}").strip("_")
+    path = MODELS_DIR / slug
+    return path if version is None else path / version
+
+
+def _next_version(track, car):
+    # From the highest v<N> on disk: counting versions collides once one is removed
+    numbers = [
+        int(match.group(1)) for path in _model_dir(track, car).glob("v*")
+        if (match := re.fullmatch(r"v(\d+)", path.name))
+    ]
+    return f"v{max(numbers, default=0) + 1}"
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class GhostModel:
+    """
+    A loaded GhostNet for one track/car/version: the runtime plus the
+    feature normalization it was trained with. Streams one frame per step()
+    (capture thread only).
+    """
+
+    def __init__(self, meta, runtime):
+        self.meta = meta
+        self.track = meta["track"]
+        self.car = meta["car"]
+        self.version = meta["version"]
+        self.runtime = runtime
+        self.mean = np.asarray(meta["mean"], dtype=np.float32)
+        self.std = np.asarray(meta["std"], dtype=np.float32)
+        # Approximate resident size: the weights of the loaded variant
+        self.nbytes = os.path.getsize(runtime.path)
+        self._features = np.zeros(len(self.mean), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self.runtime.reset()
+        self._last_speed = None
+        self._last_time = None
+
+    def step(self, speed, timestamp, lap_dist_pct):
+        """
+        Predicts the ghost controls for one frame (features as in
+        app.ai.ghost_features.lap_features).
+
+        Returns:
+            tuple: (steering [-1, 1], throttle, brake).
+        """
+        accel = 0.0
+        if self._last_time is not None and timestamp > self._last_time:
+            accel = (speed - self._last_speed) / (timestamp - self._last_time)
+        self._last_speed, self._last_time = speed, timestamp
+
+        angle = 2 * np.pi * lap_dist_pct
+        f = self._features
+        f[0], f[1], f[2], f[3] = speed, accel, np.sin(angle), np.cos(angle)
+        controls = self.runtime.step((f - self.mean) / self.std)
+        return float(controls[0]), float(controls[1]), float(controls[2])
+
+
+class GhostModelRegistry:
+    """
+    GhostNet models per (track, car, version) on disk, with metadata and
+    checksums, and an LRU of loaded models under a memory cap.
+
+    Layout: data/ghost_models/<track__car>/<version>/{ghost.onnx, variants,
+    report, meta.json}. Loads run on a background worker: the capture
+    thread only calls peek(), which never waits on I/O or model setup.
+    Models trained by another process (train_ghost.py) are picked up within
+    RECHECK_SECONDS.
+    """
+
+    def __init__(self, memory_budget_mb=128):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.memory_used = 0
+        self._entries = OrderedDict()
+        self._missing = {}      # Key without a (valid) model -> next retry (monotonic), not every frame
+        self._recheck = {}      # Latest-version key -> next check for a newer version on disk
+        self._pending = {}      # Key -> Future of the background load
+        self._rejected = set()  # (track, car, version) that failed at inference, never loaded again
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ghost-models")
+
+    def register(self, track, car, onnx_path, norm, version=None):
+        """
+        Adds a trained model (fp32 export plus any fused/int8 variants and
+        optimization report next to it).
+
+        Args:
+            norm (dict): features, mean, std, seq_len of the training dataset.
+            version (str): Defaults to v<N + 1>, N the highest stored version.
+
+        Returns:
+            dict: The stored metadata.
+        """
+        if version is None:
+            version = _next_version(track, car)
+        target = _model_dir(track, car, version)
+        target.mkdir(parents=True, exist_ok=True)
+
+        sources = {MODEL_FILE: onnx_path}
+        for variant in VARIANTS:
+            sources[variant_path(MODEL_FILE, variant)] = variant_path(onnx_path, variant)
+        sources[report_path(MODEL_FILE)] = report_path(onnx_path)
+
+        files = {}
+        for name, source in sources.items():
+            if os.path.exists(source):
+                shutil.copyfile(source, target / name)
+                files[name] = _sha256(target / name)
+
+        meta = {
+            "track": track,
+            "car": car,
+            "version": version,
+            "created": datetime.utcnow().isoformat(),
+            "files": files,
+            **{key: norm[key] for key in ("features", "mean", "std", "seq_len")}
+        }
+        with open(target / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+        with self._lock:
+            for key in ((track, car, None), (track, car, version)):
+                self._missing.pop(key, None)
+                self._recheck.pop(key, None)
+            self._rejected.discard((track, car, version))
+        logger.info(f"Ghost model registered: {track} / {car} {version}")
+        return meta
+
+    def versions(self, track, car):
+        """Metadata of every stored version, oldest first."""
+        metas = []
+        for path in _model_dir(track, car).glob("*/meta.json"):
+            try:
+                with open(path) as f:
+                    metas.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(metas, key=lambda meta: meta["created"])
+
+    def peek(self, track, car, version=None):
+        """
+        Non-blocking lookup (version None = latest). Schedules a background
+        load on a miss, and a check for a newer version every RECHECK_SECONDS.
+        """
+        key = (track, car, version)
+        now = time.monotonic()
+        with self._lock:
+            model = self._entries.get(key)
+            if model is not None:
+                self._entries.move_to_end(key)
+                if version is None and now >= self._recheck.get(key, 0.0) and key not in self._pending:
+                    self._recheck[key] = now + RECHECK_SECONDS
+                    self._pending[key] = self._executor.submit(self._load, key, model.version)
+                return model
+            if now >= self._missing.get(key, 0.0) and key not in self._pending:
+                self._pending[key] = self._executor.submit(self._load, key)
+        return None
+
+    def reject(self, model):
+        """
+        Drops a model that failed at inference (e.g. an incompatible export).
+        Its version is skipped from now on: the latest lookup falls back to
+        the newest other version, if any.
+        """
+        with self._lock:
+            self._rejected.add((model.track, model.car, model.version))
+            for key in [key for key, entry in self._entries.items() if entry is model]:
+                self._evict(key)
+
+    def _load(self, key, loaded_version=None):
+        track, car, version = key
+        model = None
+        try:
+            with self._lock:
+                rejected = {v for t, c, v in self._rejected if (t, c) == (track, car)}
+            metas = [meta for meta in self.versions(track, car) if meta["version"] not in rejected]
+            if version is not None:
+                metas = [meta for meta in metas if meta["version"] == version]
+            # loaded_version: only replace the loaded latest model by a newer one
+            if metas and metas[-1]["version"] != loaded_version:
+                model = self._load_version(metas[-1])
+        except Exception as e:
+            logger.error(f"Ghost model load failed for {key}: {e}")
+
+        with self._lock:
+            self._pending.pop(key, None)
+            self._recheck[key] = time.monotonic() + RECHECK_SECONDS
+            if model is not None:
+                self._missing.pop(key, None)
+                self._insert(key, model)
+            elif loaded_version is None:
+                self._missing[key] = time.monotonic() + RECHECK_SECONDS
+        return model
+
+    def _load_version(self, meta):
+        directory = _model_dir(meta["track"], meta["car"], meta["version"])
+        for name, checksum in meta["files"].items():
+            if _sha256(directory / name) != checksum:
+                raise ValueError(f"checksum mismatch for {directory / name}")
+        runtime = GhostRuntime.load_optimized(str(directory / MODEL_FILE))
+        logger.info(f"Ghost model ready: {meta['track']} / {meta['car']} {meta['version']} ({runtime.variant})")
+        return GhostModel(meta, runtime)
+
+    def _insert(self, key, model):
+        # Caller holds the lock
+        self._evict(key)
+        self._entries[key] = model
+        self.memory_used += model.nbytes
+        while self.memory_used > self.memory_budget and len(self._entries) > 1:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        model = self._entries.pop(key, None)
+        if model is not None:
+            self.memory_used -= model.nbytes
+
+
+ghost_registry = GhostModelRegistry(memory_budget_mb=settings.GHOST_CACHE_MB)
@@ -0,0 +1,238 @@
+import json
+import os
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+
+# Try import ONNX Runtime (preferred CPU backend)
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# Try import torch (TorchScript backend, also loads .pth checkpoints)
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+INFERENCE_THREADS = 1   # One core: the capture thread shares the CPU with the ghost
+WINDOW_STEPS = 50       # Window of the legacy (stateless) exports
+
+
+def variant_path(onnx_path, variant):
+    """ghost_v1.onnx -> ghost_v1.<variant>.onnx ('fp32' is the export itself)."""
+    if variant == "fp32":
+        return onnx_path
+    base, ext = os.path.splitext(onnx_path)
+    return f"{base}.{variant}{ext}"
+
+
+def report_path(onnx_path):
+    return os.path.splitext(onnx_path)[0] + ".report.json"
+
+
+def select_variant(report, max_accuracy_loss):
+    """
+    Fastest (variant, threads) of an optimization report whose accuracy
+    loss stays within max_accuracy_loss (fp32 always qualifies). Ranked by
+    p99 (then p50): every frame has to fit the budget, so a low median
+    with thread scheduling spikes loses to a steady single thread.
+
+    Returns:
+        tuple: (variant, threads, p99 latency ms).
+    """
+    best = None
+    best_rank = None
+    for name, entry in report["variants"].items():
+        if name != "fp32" and entry["accuracy_loss"] > max_accuracy_loss:
+            continue
+        for threads, latency in entry["latency_ms"].items():
+            rank = (latency["p99"], latency["p50"])
+            if best is None or rank < best_rank:
+                best, best_rank = (name, int(threads), latency["p99"]), rank
+    return best
+
+
+class GhostRuntime:
+    """
+    Stateful CPU inference for GhostNet.
+
+    step() feeds one frame and carries the LSTM state (h, c) to the next
+    call, so each frame costs one LSTM step instead of a full window.
+
+    Backends:
+        onnx         ghost_v1.onnx exported by train_ghost.py (state as inputs/outputs)
+        torchscript  .pt TorchScript module or a .pth state dict (traced on load)
+
+    ONNX files from before the streaming export (window input only) still
+    load; they run over a rolling window of the last WINDOW_STEPS frames.
+    """
+
+    def __init__(self, backend, run, input_size, state_shape, path=None):
+        self.backend = backend
+        self.path = path
+        self.variant = "fp32"
+        self.input_size = input_size
+        self.state_shape = state_shape       # (NumLayers, 1, Hidden), None for window-only models
+        self._run = run
+        self._frame = np.zeros((1, 1, input_size), dtype=np.float32)
+        self._window = None if state_shape else np.zeros((1, WINDOW_STEPS, input_size), dtype=np.float32)
+        self.reset()
+
+    @classmethod
+    def load(cls, path, threads=INFERENCE_THREADS):
+        """
+        Loads a model, picking the backend from the file extension.
+
+        Args:
+            path (str): .onnx, .pt (TorchScript) or .pth (GhostNet state dict).
+            threads (int): Intra-op threads.
+        """
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".onnx":
+            if not ONNX_AVAILABLE:
+                raise RuntimeError("onnxruntime not installed")
+            return cls._load_onnx(path, threads)
+        if ext in (".pt", ".pth"):
+            if not TORCH_AVAILABLE:
+                raise RuntimeError("torch not installed")
+            return cls._load_torchscript(path, threads)
+        raise ValueError(f"Unknown ghost model format: {path}")
+
+    @classmethod
+    def load_optimized(cls, onnx_path, max_accuracy_loss=None):
+        """
+        Loads the fastest variant from the optimization report next to the
+        export (see app.ai.ghost_optimize) within the accuracy budget, or the
+        export itself when there is no report.
+        """
+        if max_accuracy_loss is None:
+            max_accuracy_loss = settings.GHOST_MAX_ACCURACY_LOSS
+        try:
+            with open(report_path(onnx_path)) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            return cls.load(onnx_path)
+
+        selected = select_variant(report, max_accuracy_loss)
+        path = variant_path(onnx_path, selected[0]) if selected else onnx_path
+        if not selected or not os.path.exists(path):
+            return cls.load(onnx_path)
+        logger.info(f"Ghost model variant: {selected[0]}, {selected[1]} thread(s), p99 {selected[2]:.3f} ms/step")
+        runtime = cls.load(path, threads=selected[1])
+        runtime.variant = selected[0]
+        return runtime
+
+    @classmethod
+    def _load_onnx(cls, path, threads):
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+        inputs = {i.name: i for i in session.get_inputs()}
+        input_size = inputs["telemetry_sequence"].shape[-1]
+        if "h0" not in inputs:
+            logger.warning(f"{path} has no LSTM state inputs (old export), using a rolling window")
+
+            def run(x, h, c):
+                return session.run(["controls"], {"telemetry_sequence": x})[0], None, None
+
+            return cls("onnx", run, input_size, None, path)
+
+        num_layers, _, hidden = inputs["h0"].shape
+
+        def run(x, h, c):
+            return session.run(None, {"telemetry_sequence": x, "h0": h, "c0": c})
+
+        return cls("onnx", run, input_size, (num_layers, 1, hidden), path)
+
+    @classmethod
+    def _load_torchscript(cls, path, threads):
+        from app.ai.ghost_model_arch import GhostNet, GhostNetStreaming
+
+        torch.set_num_threads(threads)
+        if path.endswith(".pt"):
+            module = torch.jit.load(path, map_location="cpu").eval()
+        else:
+            model = GhostNet()
+            model.load_state_dict(torch.load(path, map_location="cpu"))
+            model.eval()
+            h0, c0 = model.init_state(1)
+            with torch.inference_mode():
+                module = torch.jit.trace(GhostNetStreaming(model), (torch.zeros(1, 1, model.lstm.input_size), h0, c0)).eval()
+        # Sizes from the LSTM weights (the module may come from another architecture config)
+        input_size, state_shape = _probe_torchscript(module)
+        module = torch.jit.freeze(module)
+
+        def run(x, h, c):
+            with torch.inference_mode():
+                controls, hn, cn = module(torch.from_numpy(x), torch.from_numpy(h), torch.from_numpy(c))
+            return controls.numpy(), hn.numpy(), cn.numpy()
+
+        return cls("torchscript", run, input_size, state_shape, path)
+
+    def reset(self):
+        """Starts a new stream (new lap/session or a gap in the frames)."""
+        if self.state_shape:
+            self._h = np.zeros(self.state_shape, dtype=np.float32)
+            self._c = np.zeros(self.state_shape, dtype=np.float32)
+        else:
+            self._window[:] = 0.0
+            self._h = self._c = None
+
+    def step(self, features):
+        """
+        Advances the stream by one frame.
+
+        Args:
+            features (sequence): One frame of model features (input_size values).
+
+        Returns:
+            np.ndarray: [steering, throttle, brake].
+        """
+        if self._window is not None:
+            self._window[0, :-1] = self._window[0, 1:]
+            self._window[0, -1] = features
+            return self._run(self._window, None, None)[0][0]
+
+        self._frame[0, 0] = features
+        controls, self._h, self._c = self._run(self._frame, self._h, self._c)
+        return controls[0]
+
+    def predict_window(self, window):
+        """
+        Stateless prediction over a full window [Steps, Features] (the
+        windowed approach; for batch use and comparison with step()).
+        """
+        x = np.ascontiguousarray(window, dtype=np.float32)[None]
+        if not self.state_shape:
+            return self._run(x, None, None)[0][0]
+        zeros = np.zeros(self.state_shape, dtype=np.float32)
+        return self._run(x, zeros, zeros)[0][0]
+
+    def predict_batch(self, windows):
+        """Stateless predictions for windows [Batch, Steps, Features] -> [Batch, 3]."""
+        windows = np.ascontiguousarray(windows, dtype=np.float32)
+        if not self.state_shape:
+            # Old exports have a fixed batch of 1
+            return np.stack([self.predict_window(window) for window in windows])
+        num_layers, _, hidden = self.state_shape
+        zeros = np.zeros((num_layers, len(windows), hidden), dtype=np.float32)
+        return self._run(windows, zeros, zeros)[0]
+
+
+def _probe_torchscript(module):
+    for name, param in module.named_parameters():
+        if name.endswith("lstm.weight_ih_l0"):
+            input_size = param.shape[1]
+            hidden = param.shape[0] // 4
+            num_layers = sum(1 for n, _ in module.named_parameters() if "lstm.weight_ih_l" in n)
+            return input_size, (num_layers, 1, hidden)
+    raise ValueError("Not a GhostNet module")
@@ -18,3 +18,6 @@ api_router.include_router(strategy.router, prefix="/strategy", tags=["strategy"]
 
 from app.api.endpoints import auth
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+
+from app.api.endpoints import telemetry
+api_router.include_router(telemetry.router, prefix="/telemetry", tags=["telemetry"])
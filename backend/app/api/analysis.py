@@ -1,26 +1,119 @@
-from fastapi import APIRouter
+import asyncio
+from typing import Any, Dict
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from app.engine.analysis import analysis_engine
+from app.engine.downsample import trace_service, METHODS
+from app.engine.jobs import analysis_jobs, JOB_KINDS
 
 router = APIRouter()
 
+# Longest an endpoint awaits an analysis job before handing back a job id to poll
+JOB_WAIT_SECONDS = 10.0
+
+class JobRequest(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+async def _run_job(kind, **params):
+    """Runs an analysis job in the worker pool; answers 202 + job id if it takes too long."""
+    job = analysis_jobs.submit(kind, **params)
+    try:
+        await analysis_jobs.wait(job, JOB_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    if job.status != "done":
+        raise HTTPException(status_code=500, detail=job.error or f"Analysis job {job.status}")
+    return job.result
+
 @router.get("/dna")
 async def get_driver_dna():
     """Get calculated Driver DNA and Archetype."""
-    return analysis_engine.get_driver_dna()
+    return await _run_job("dna")
 
 @router.get("/weaknesses")
-async def get_weaknesses():
-    """Get top track weaknesses and AI recommendations."""
-    return analysis_engine.get_weaknesses()
+async def get_weaknesses(track: str = None, car: str = None):
+    """Get top track weaknesses and AI recommendations (defaults to the latest recorded track/car)."""
+    # Laps are analysed as they are recorded, so this is usually a lookup
+    cached = analysis_engine.cached_weaknesses(track, car)
+    if cached is not None:
+        return cached
+    return await _run_job("weaknesses", track=track, car=car)
 
 @router.get("/pro-comparison")
-async def get_pro_comparison():
-    """Get mock pro-comparison dataset (You vs Verstappen)."""
-    # Mock data for a graph
+async def get_pro_comparison(points: int = Query(200, ge=10, le=5000)):
+    """Get the speed trace of the latest lap vs the reference lap (personal best)."""
+    comparison = await _run_job("comparison", channel="speed", points=points)
+    if isinstance(comparison, JSONResponse):
+        return comparison
+    if comparison is None:
+        return {"driver": "Personal Best", "track": None, "delta": None, "trace_you": [], "trace_pro": []}
     return {
-        "driver": "Max Verstappen",
-        "track": "Spa Francorchamps",
-        "delta": "+1.2s",
-        "trace_you": [0, 50, 100, 150, 200, 250, 100, 50, 0], # Mock Speed/Brake
-        "trace_pro": [0, 55, 110, 160, 210, 260, 120, 60, 0]
+        "driver": "Personal Best",
+        "track": comparison["track"],
+        "delta": f"{comparison['delta']:+.3f}s",
+        "trace_you": comparison["trace_you"],
+        "trace_pro": comparison["trace_ref"]
     }
+
+# --- ANALYSIS JOBS ---
+
+@router.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """Submit an analysis job. Identical in-flight jobs are shared."""
+    if request.kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind '{request.kind}'")
+    try:
+        job = analysis_jobs.submit(request.kind, **request.params)
+    except TypeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0.0, ge=0.0, le=60.0)):
+    """Poll a job, or wait up to `wait` seconds for it to finish."""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if wait > 0:
+        try:
+            await analysis_jobs.wait(job, wait)
+        except asyncio.TimeoutError:
+            pass
+    return job.to_dict()
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job."""
+    job = analysis_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(include_result=False)
+
+def _lap_traces(lap_id, channels, points, method):
+    traces = {}
+    for channel in channels.split(","):
+        trace = trace_service.get_trace(lap_id, channel.strip(), points, method)
+        if trace is None:
+            raise HTTPException(status_code=404, detail=f"Lap '{lap_id}' or channel '{channel}' not found")
+        traces[channel.strip()] = trace
+    return traces
+
+@router.get("/laps/{lap_id}/traces")
+async def get_lap_traces(
+    lap_id: str,
+    channels: str = "speed,throttle,brake",
+    points: int = Query(500, ge=10, le=20000),
+    method: str = "lttb"
+):
+    """
+    Get shape-preserving downsampled channels of a recorded lap.
+    Each channel returns its own x (lap distance fraction) and y arrays.
+    """
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method '{method}'")
+    # Lap file load and LTTB run in a thread, off the event loop that emits telemetry
+    traces = await run_in_threadpool(_lap_traces, lap_id, channels, points, method)
+    return {"lap_id": lap_id, "points": points, "method": method, "channels": traces}
@@ -2,8 +2,10 @@ from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlmodel import Session, select
-from app.core.database import get_session
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_async_session
 from app.core import security
 from app.engine.models.user import User, UserCreate, UserRead, UserBase
 
@@ -11,9 +13,9 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 @router.post("/register", response_model=UserRead)
-def register_user(*, session: Session = Depends(get_session), user: UserCreate):
+async def register_user(*, session: AsyncSession = Depends(get_async_session), user: UserCreate):
     # Check if user exists
-    user_exists = session.exec(select(User).where(User.email == user.email)).first()
+    user_exists = (await session.exec(select(User).where(User.email == user.email))).first()
     if user_exists:
         raise HTTPException(
             status_code=400,
@@ -27,17 +29,18 @@ def register_user(*, session: Session = Depends(get_session), user: UserCreate):
         full_name=user.full_name,
         is_active=user.is_active,
         is_superuser=user.is_superuser,
-        hashed_password=security.get_password_hash(user.password)
+        # bcrypt is deliberately slow: keep it off the event loop
+        hashed_password=await run_in_threadpool(security.get_password_hash, user.password)
     )
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.commit()
+    await session.refresh(db_user)
     return db_user
 
 @router.post("/login")
-def login_access_token(session: Session = Depends(get_session), form_data: OAuth2PasswordRequestForm = Depends()):
-    user = session.exec(select(User).where(User.email == form_data.username)).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+async def login_access_token(session: AsyncSession = Depends(get_async_session), form_data: OAuth2PasswordRequestForm = Depends()):
+    user = (await session.exec(select(User).where(User.email == form_data.username))).first()
+    if not user or not await run_in_threadpool(security.verify_password, form_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
     if not user.is_active:
@@ -51,16 +54,17 @@ def login_access_token(session: Session = Depends(get_session), form_data: OAuth
         "token_type": "bearer",
     }
 
-async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_async_session)) -> User:
+    # Token validation and the user lookup are both cached (app.core.security)
     try:
-        payload = security.jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
-        user_id = payload.get("sub")
+        user_id = security.decode_token_subject(token)
         if user_id is None:
              raise HTTPException(status_code=403, detail="Could not validate credentials")
+        user_id = int(user_id)
     except (security.jwt.JWTError, ValueError):
         raise HTTPException(status_code=403, detail="Could not validate credentials")
-        
-    user = session.get(User, int(user_id))
+
+    user = await security.get_cached_user(session, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from app.core.database import get_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_async_session
+from app.core.responses import model_list_response
 from app.engine.models.community import (
     Setup, SetupCreate, SetupRead,
     League, LeagueCreate, LeagueRead,
@@ -13,17 +15,17 @@ router = APIRouter()
 # --- SETUP ENDPOINTS ---
 
 @router.post("/setups/", response_model=SetupRead)
-def create_setup(*, session: Session = Depends(get_session), setup: SetupCreate):
+async def create_setup(*, session: AsyncSession = Depends(get_async_session), setup: SetupCreate):
     db_setup = Setup.from_orm(setup)
     session.add(db_setup)
-    session.commit()
-    session.refresh(db_setup)
+    await session.commit()
+    await session.refresh(db_setup)
     return db_setup
 
 @router.get("/setups/", response_model=List[SetupRead])
-def read_setups(
+async def read_setups(
     *, 
-    session: Session = Depends(get_session), 
+    session: AsyncSession = Depends(get_async_session), 
     offset: int = 0, 
     limit: int = 100,
     car: str = None,
@@ -35,12 +37,12 @@ def read_setups(
     if track:
         query = query.where(Setup.track == track)
     query = query.offset(offset).limit(limit)
-    setups = session.exec(query).all()
-    return setups
+    setups = (await session.exec(query)).all()
+    return model_list_response(setups, SetupRead)
 
 @router.get("/setups/{setup_id}", response_model=SetupRead)
-def read_setup(*, session: Session = Depends(get_session), setup_id: int):
-    setup = session.get(Setup, setup_id)
+async def read_setup(*, session: AsyncSession = Depends(get_async_session), setup_id: int):
+    setup = await session.get(Setup, setup_id)
     if not setup:
         raise HTTPException(status_code=404, detail="Setup not found")
     return setup
@@ -48,40 +50,40 @@ def read_setup(*, session: Session = Depends(get_session), setup_id: int):
 # --- LEAGUE ENDPOINTS ---
 
 @router.post("/leagues/", response_model=LeagueRead)
-def create_league(*, session: Session = Depends(get_session), league: LeagueCreate):
+async def create_league(*, session: AsyncSession = Depends(get_async_session), league: LeagueCreate):
     db_league = League.from_orm(league)
     session.add(db_league)
-    session.commit()
-    session.refresh(db_league)
+    await session.commit()
+    await session.refresh(db_league)
     return db_league
 
 @router.get("/leagues/", response_model=List[LeagueRead])
-def read_leagues(*, session: Session = Depends(get_session), offset: int = 0, limit: int = 100):
-    leagues = session.exec(select(League).offset(offset).limit(limit)).all()
-    return leagues
+async def read_leagues(*, session: AsyncSession = Depends(get_async_session), offset: int = 0, limit: int = 100):
+    leagues = (await session.exec(select(League).offset(offset).limit(limit))).all()
+    return model_list_response(leagues, LeagueRead)
 
 @router.post("/leagues/submit", response_model=LeagueEntryRead)
-def submit_league_entry(*, session: Session = Depends(get_session), entry: LeagueEntryCreate):
+async def submit_league_entry(*, session: AsyncSession = Depends(get_async_session), entry: LeagueEntryCreate):
     # Verify league exists
-    league = session.get(League, entry.league_id)
+    league = await session.get(League, entry.league_id)
     if not league:
          raise HTTPException(status_code=404, detail="League not found")
          
     db_entry = LeagueEntry.from_orm(entry)
     session.add(db_entry)
-    session.commit()
-    session.refresh(db_entry)
+    await session.commit()
+    await session.refresh(db_entry)
     return db_entry
 
 @router.get("/leagues/{league_id}/entries", response_model=List[LeagueEntryRead])
-def read_league_entries(
+async def read_league_entries(
     *, 
-    session: Session = Depends(get_session), 
+    session: AsyncSession = Depends(get_async_session), 
     league_id: int,
     sort_by: str = "fastest" # fastest, cleanest, consistent
 ):
     query = select(LeagueEntry).where(LeagueEntry.league_id == league_id)
-    entries = session.exec(query).all()
+    entries = (await session.exec(query)).all()
     
     # Sorting logic in Python for simplicity with complex criteria, or could be SQL
     if sort_by == 'fastest':
@@ -91,4 +93,4 @@ def read_league_entries(
     elif sort_by == 'consistent':
         entries = sorted(entries, key=lambda x: x.consistency_score, reverse=True)
         
-    return entries
+    return model_list_response(entries, LeagueEntryRead)
@@ -1,42 +1,82 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_session, get_async_session
+from app.engine.jobs import analysis_jobs
+from app.engine.mobile_sync import columns_from_points, decode_columnar, ingest, synced_points, SyncError
+from app.engine.models.mobile import MobileAnalysis, MobileSyncChunk
 
 router = APIRouter()
 
-class TelemetryDataPoint(BaseModel):
-    time: float
-    speed: float
-    throttle: float
-    brake: float
-    gear: int
-    rpm: int
-    lat: float
-    lon: float
+class ColumnarData(BaseModel):
+    """Compact upload: one base64 int32 column per channel (see app.engine.mobile_sync)."""
+    schema_version: int
+    points: int
+    delta: bool = True
+    compression: str = "zlib"
+    columns: Dict[str, str]
 
 class MobileSyncRequest(BaseModel):
     session_id: str
     user_id: str
-    data: List[TelemetryDataPoint]
+    # Chunk sequence number within the session; re-sending a chunk is a no-op
+    seq: int = 0
+    # Last chunk of the session: once all chunks are in, the analysis runs.
+    # Chunked uploads send final=false on the others; without the flag every
+    # chunk completes the session and a later one re-runs the analysis.
+    final: bool = True
+    # Either points {time, speed, throttle, brake, gear, rpm, lat, lon} ...
+    data: Optional[List[Dict[str, Any]]] = None
+    # ... or the same channels columnar
+    columnar: Optional[ColumnarData] = None
 
 @router.post("/sync")
-async def sync_mobile_telemetry(payload: MobileSyncRequest):
+def sync_mobile_telemetry(*, session: Session = Depends(get_session), payload: MobileSyncRequest):
     """
-    Receive telemetry data from mobile app.
-    For now, this just logs the receipt.
-    In future, this will save to the database.
+    Receive one chunk of telemetry from the mobile app.
+    Runs on the threadpool with the sync engine: decoding and the bulk
+    insert are CPU work that must stay off the event loop.
+    Long sessions are uploaded as several chunks (seq 0, 1, ...), each
+    stored in one transaction; the last one is sent with final=true.
     """
-    print(f"Received sync for session {payload.session_id} from user {payload.user_id} with {len(payload.data)} points.")
-    return {"status": "success", "synced_points": len(payload.data)}
+    try:
+        if payload.columnar is not None:
+            c = payload.columnar
+            columns = decode_columnar(c.columns, c.points, c.schema_version, c.delta, c.compression)
+        elif payload.data is not None:
+            columns = columns_from_points(payload.data)
+        else:
+            raise SyncError("no data or columnar payload")
+        result = ingest(session, payload.session_id, payload.user_id, payload.seq, columns, payload.final)
+    except SyncError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # Analyse once all chunks are in, in the worker pool. A stored chunk drops
+    # the previous analysis; a re-sent final chunk re-queues one that never
+    # got stored (e.g. server restart).
+    if result["complete"] and session.get(MobileAnalysis, payload.session_id) is None:
+        analysis_jobs.submit("mobile_analysis", session_id=payload.session_id, points=synced_points(session, payload.session_id))
+    return result
 
 @router.get("/analysis/{session_id}")
-async def get_mobile_analysis(session_id: str):
+async def get_mobile_analysis(*, session: AsyncSession = Depends(get_async_session), session_id: str, request: Request):
     """
     Get simplified analysis for mobile view.
+    Only ever reads the stored result (computed after sync); supports
+    If-None-Match so polling phones get 304 until it changes.
     """
-    # Placeholder for actual analysis logic
-    return {
-        "session_id": session_id,
-        "score": 85,
-        "feedback": ["Braking too early at Turn 1", "Good throttle control in sector 2"]
-    }
+    analysis = await session.get(MobileAnalysis, session_id)
+    if analysis is None:
+        synced = (await session.exec(select(MobileSyncChunk.id).where(MobileSyncChunk.session_id == session_id))).first()
+        if synced is None:
+            raise HTTPException(status_code=404, detail="Unknown session")
+        return JSONResponse(status_code=202, content={"session_id": session_id, "status": "pending"})
+
+    etag = f'"{analysis.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=analysis.result, media_type="application/json", headers=headers)
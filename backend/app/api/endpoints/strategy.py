@@ -1,20 +1,88 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from app.engine.strategy import strategy_engine
+import asyncio
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from app.engine.strategy import strategy_engine, strategy_sessions, LIVE_SESSION
+from app.engine.jobs import analysis_jobs
+from app.engine.scoring import gap_engine
 
 router = APIRouter()
 
+# Longest the endpoint awaits a simulation before handing back a job id to poll
+SIMULATION_WAIT_SECONDS = 10.0
+
 class SessionData(BaseModel):
     laps_completed: int
     total_laps: int
     fuel_level: float
     tire_compound: str
     track_temp: float
+    fuel_per_lap: Optional[float] = None # Defaults to the session's measured average
+    session_id: Optional[str] = Field(None, max_length=64) # Keeps the trend per driver (defaults to the client address)
+    gap_ahead: Optional[float] = None # Same-class car ahead (seconds)
+    gap_behind: Optional[float] = None
+    tire_time_loss: float = 0.0 # Last lap minus best lap (seconds)
+
+class SimulationRequest(BaseModel):
+    total_laps: int = Field(50, ge=1, le=500)
+    laps_completed: int = Field(0, ge=0)
+    fuel_level: float = 100.0
+    fuel_capacity: float = 110.0
+    tire_compound: str = "SOFT"
+    tire_age: int = Field(0, ge=0)
+    track_temp: float = 30.0
+    base_lap_time: float = 95.0
+    pit_loss: float = 22.0
+    pit_loss_std: float = 1.5
+    safety_car_prob: float = Field(0.02, ge=0.0, le=1.0)
+    compounds: List[str] = ["SOFT", "MEDIUM", "HARD"]
+    max_stops: int = Field(3, ge=0, le=4)
+    n_sims: int = Field(500, ge=10, le=5000)
+    top: int = Field(10, ge=1, le=50)
+    seed: Optional[int] = None
+    session_id: Optional[str] = Field(None, max_length=64) # Session whose measured fuel use applies (defaults to the live session)
+
+def _client_session(session_id):
+    # Client ids live in their own namespace: a client can never name (and
+    # overwrite) the live telemetry session
+    return f"client:{session_id}"
 
 @router.post("/recommendation")
-async def get_strategy_recommendation(data: SessionData):
+async def get_strategy_recommendation(data: SessionData, request: Request):
     """
     Get real-time strategy recommendation.
     """
-    result = strategy_engine.get_strategy_recommendation(data.dict())
+    session_id = data.session_id or (request.client.host if request.client else "unknown")
+    state = strategy_sessions.get(_client_session(session_id))
+    result = strategy_engine.get_strategy_recommendation(data.dict(exclude={"session_id"}), state)
     return result
+
+@router.post("/simulate")
+async def simulate_strategy(data: SimulationRequest):
+    """
+    Monte Carlo race strategy: ranks pit plans by expected remaining race time.
+    """
+    if data.laps_completed > data.total_laps:
+        raise HTTPException(status_code=400, detail="laps_completed exceeds total_laps")
+    params = data.dict(exclude={"session_id"})
+    # Job params must be hashable; workers don't see session state, so pass the measured fuel use
+    params["compounds"] = tuple(params["compounds"])
+    state = strategy_sessions.peek(_client_session(data.session_id) if data.session_id else LIVE_SESSION)
+    params["fuel_per_lap"] = (state and state.fuel_per_lap) or strategy_engine.fuel_per_lap_avg
+
+    job = analysis_jobs.submit("strategy_simulation", **params)
+    try:
+        await analysis_jobs.wait(job, SIMULATION_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    if job.status != "done":
+        raise HTTPException(status_code=500, detail=job.error or f"Simulation {job.status}")
+    return job.result
+
+@router.get("/gaps")
+async def get_gaps():
+    """
+    Latest gaps to every car ahead/behind and the pit window (live LMU session).
+    """
+    return gap_engine.result or {"ahead": [], "behind": [], "pit_alert": None}
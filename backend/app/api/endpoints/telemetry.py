@@ -0,0 +1,95 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.responses import ORJSON_AVAILABLE
+from app.engine.session_recorder import SessionRecording, list_recordings, DOWNSAMPLE_METHODS
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+router = APIRouter()
+
+FORMATS = ("ndjson", "binary")
+
+
+def _ndjson(header, blocks):
+    # Header line, then one JSON array per row in the header's channel order
+    yield json.dumps(header).encode() + b"\n"
+    for block in blocks:
+        if ORJSON_AVAILABLE:
+            # One encoder call per chunk: "[[..],[..]]" -> "[..]\n[..]\n" (rows hold only numbers/null)
+            body = orjson.dumps(block, option=orjson.OPT_SERIALIZE_NUMPY)
+            yield body[1:-1].replace(b"],[", b"]\n[") + b"\n"
+        else:
+            yield "".join(
+                json.dumps([None if v != v else v for v in row]) + "\n" for row in block.tolist()
+            ).encode()
+
+
+def _binary(blocks):
+    for block in blocks:
+        yield block.tobytes()
+
+
+@router.get("/sessions")
+def get_recorded_sessions():
+    """
+    Recorded sessions (newest first) with their laps, duration and channels.
+    Plain def: reading every session's metadata runs in the threadpool, off the event loop.
+    """
+    return list_recordings()
+
+
+@router.get("/sessions/{session_id}/frames")
+def get_session_frames(
+    session_id: str,
+    channels: str = "time,lap_dist_pct,speed,throttle,brake",
+    lap: Optional[int] = None,
+    t_from: Optional[float] = None,
+    t_to: Optional[float] = None,
+    dist_from: Optional[float] = Query(None, ge=0.0, le=1.0),
+    dist_to: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_points: Optional[int] = Query(None, ge=2, le=1_000_000),
+    downsample: str = "stride",
+    format: str = "ndjson"
+):
+    """
+    Streams recorded frames of a session, read straight from its memory-mapped
+    frame file chunk by chunk (a whole 2 h session never sits in memory).
+
+    Filters combine: lap, session time window [t_from, t_to] (s), lap distance
+    window [dist_from, dist_to] (fraction, within each lap). max_points
+    downsamples server-side ('stride': every n-th row, 'mean': bucket means).
+
+    format=ndjson: a header line {session_id, channels, rows (frames in the
+    lap/time range, before the distance window and downsampling)}, then one
+    JSON array per row. format=binary: little-endian float32 rows, channel
+    order in the X-Channels header.
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'")
+    if downsample not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown downsample method '{downsample}'")
+    recording = SessionRecording.open(session_id)
+    if recording is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    names = [name.strip() for name in channels.split(",") if name.strip()]
+    unknown = [name for name in names if name not in recording.channels]
+    if not names or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown channels {unknown}; recorded: {list(recording.channels)}")
+
+    rows = recording.row_range(lap, t_from, t_to)
+    if rows is None:
+        raise HTTPException(status_code=404, detail=f"Lap {lap} not recorded")
+    start, end = rows
+    blocks = recording.iter_rows(names, start, end, dist_from, dist_to, max_points, downsample)
+
+    headers = {"X-Channels": ",".join(names), "X-Rows": str(end - start), "Cache-Control": "no-cache"}
+    if format == "binary":
+        headers["X-Dtype"] = recording.meta["dtype"]
+        return StreamingResponse(_binary(blocks), media_type="application/octet-stream", headers=headers)
+    header = {"session_id": session_id, "channels": names, "rows": end - start}
+    return StreamingResponse(_ndjson(header, blocks), media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,125 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Only text-like bodies shrink; binary telemetry and images pass through as is
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "text/")
+
+
+def _accepted(accept_encoding):
+    # Accept-Encoding -> codings with q > 0
+    codings = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        codings.add(name.strip())
+    return codings
+
+
+class _Encoder:
+    """Incremental br/gzip stream: every chunk is flushed so streamed lines reach the client."""
+
+    def __init__(self, encoding, gzip_level, brotli_quality):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)   # wbits 31: gzip container
+
+    def compress(self, data, final=False):
+        if self.encoding == "br":
+            out = self._br.process(data) if data else b""
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when installed and accepted) or gzip for HTTP responses.
+
+    A complete body is compressed only from `minimum_size` bytes on (small
+    bodies would grow); a streamed body (more_body) is always compressed,
+    chunk by chunk. Responses that already carry a Content-Encoding or have
+    a non-text media type pass through untouched.
+
+    Args:
+        app: ASGI app.
+        minimum_size (int): Smallest complete body worth compressing.
+    """
+
+    def __init__(self, app, minimum_size=1024, gzip_level=5, brotli_quality=4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accepted = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        if BROTLI_AVAILABLE and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                # 1. Hold the headers until the first body chunk decides
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(raw=start["headers"])
+                media_type = headers.get("content-type", "")
+                # 2. Pass through: already encoded, not text, or too small to gain
+                if ("content-encoding" in headers or not media_type.startswith(COMPRESSIBLE_TYPES)
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                # 3. Compress: the length is only known for a complete body
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                body = encoder.compress(body, final=not more_body)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            await send({"type": "http.response.body", "body": encoder.compress(body, final=not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -4,6 +4,52 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Neural Lap API"
     VERSION: str = "0.1.0"
     API_V1_STR: str = "/api/v1"
+
+    # Memory budget for per-track/car artifacts (reference lap, corners, zones)
+    TRACK_CACHE_MB: int = 64
+
+    # Worker processes for post-session analysis jobs
+    ANALYSIS_WORKERS: int = 2
+
+    # Per-driver strategy state: cap on open sessions and idle eviction
+    STRATEGY_MAX_SESSIONS: int = 1000
+    STRATEGY_SESSION_IDLE_SECONDS: int = 1800
+
+    # Ghost inference: accepted mean control difference of an optimized
+    # (fused/int8) model variant vs fp32, full scale = 1.0
+    GHOST_MAX_ACCURACY_LOSS: float = 0.01
+
+    # Lap files trimmed from the analysis history (last 100 laps + references)
+    # are archived in data/laps/archive as the ghost training corpus. Oldest
+    # archived laps are deleted past this size (~6 MB per hour driven); 0 = no archive
+    LAP_ARCHIVE_MAX_GB: float = 10.0
+
+    # Memory cap for loaded GhostNet models (LRU across track/car)
+    GHOST_CACHE_MB: int = 128
+
+    # SQLite database (WAL) and the async engine's connection pool used by
+    # the API endpoints; the telemetry thread and workers use the sync engine
+    DATABASE_FILE: str = "data/neural_community.db"
+    DB_POOL_SIZE: int = 8
+    DB_MAX_OVERFLOW: int = 8
+    DB_BUSY_TIMEOUT_MS: int = 5000
+
+    # Authenticated requests: resolved users and validated tokens are reused
+    # for up to this long. User updates/deactivation invalidate the worker that
+    # commits them at once; other uvicorn workers see them within this bound
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_SIZE: int = 10000
+
+    # REST responses: bodies from this size on are sent brotli/gzip encoded
+    COMPRESSION_MIN_BYTES: int = 1024
+    GZIP_LEVEL: int = 5
+    BROTLI_QUALITY: int = 4
+
+    # Socket.IO across uvicorn workers: "" = single process, "local" = built-in
+    # bus, or a redis:// / amqp:// broker URL. The worker that binds the owner
+    # port runs the telemetry engine (and hosts the local bus)
+    SOCKETIO_MESSAGE_QUEUE: str = ""
+    SOCKETIO_OWNER_PORT: int = 8765
     
     class Config:
         env_file = ".env"
@@ -1,20 +1,40 @@
 from sqlmodel import SQLModel, create_engine, Session
-from app.core.config import settings
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
 from app.core.config import settings
 import os
 from app.engine.models.user import User # Register model
 from app.engine.models.telemetry_session import TelemetrySession
+from app.engine.models.mobile import MobileSyncChunk, MobileSample, MobileAnalysis
 
 
+SQLITE_FILE_NAME = settings.DATABASE_FILE
+sqlite_url = f"sqlite:///{SQLITE_FILE_NAME}"
 
 # Ensure data directory exists
-os.makedirs("data", exist_ok=True)
+os.makedirs(os.path.dirname(SQLITE_FILE_NAME) or ".", exist_ok=True)
 
-SQLITE_FILE_NAME = "data/neural_community.db"
-sqlite_url = f"sqlite:///{SQLITE_FILE_NAME}"
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL: readers never block on the writer (API, telemetry thread, workers share the file)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.DB_BUSY_TIMEOUT_MS}")
+    cursor.close()
 
 connect_args = {"check_same_thread": False}
 engine = create_engine(sqlite_url, echo=False, connect_args=connect_args)
+event.listen(engine, "connect", _set_sqlite_pragmas)
+
+# API engine (aiosqlite is a requirement: a missing driver fails here, at startup)
+async_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{SQLITE_FILE_NAME}",
+    echo=False,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+)
+event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
@@ -22,3 +42,9 @@ def create_db_and_tables():
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    """API dependency: an AsyncSession on the pooled aiosqlite engine."""
+    # Objects stay readable after commit (responses are built from them)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
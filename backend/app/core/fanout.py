@@ -0,0 +1,259 @@
+"""
+Socket.IO fan-out across server workers (uvicorn --workers N).
+
+Exactly one worker per machine owns the telemetry engine: the first one
+to bind SOCKETIO_OWNER_PORT. Its frames are published once on a message
+queue, and every worker (the owner included) emits them to its own
+clients. Client -> engine events (debug_command, set_active_user) that
+land on another worker are relayed back to the owner over the same
+queue, and the owner's live state that REST endpoints read (gaps, live
+strategy) is published to the other workers twice a second.
+
+Queues (SOCKETIO_MESSAGE_QUEUE):
+    ""                      Single process, in-memory client manager (default).
+    "local"                 Built-in bus: the owner hosts a hub on 127.0.0.1:SOCKETIO_OWNER_PORT.
+    "redis://...", "amqp://..."
+                            External broker (redis / aio_pika packages); the owner
+                            port is then only the election lock.
+
+Long-polling clients must stick to one worker for their whole session
+(sticky sessions, see README "Multi-worker Socket.IO").
+"""
+import asyncio
+import json
+import socket
+
+import socketio
+from loguru import logger
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from app.core.responses import ORJSON_AVAILABLE, ORJSON_OPTIONS
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+BUS_HOST = "127.0.0.1"
+RELAY_NAMESPACE = "/engine-relay"   # Pseudo namespace of relayed client -> engine events
+STATE_NAMESPACE = "/engine-state"   # Pseudo namespace of the owner's live state snapshots
+STATE_INTERVAL = 0.5                # Seconds between live state snapshots
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+MAX_PEER_BUFFER = 4 * 1024 * 1024   # Bytes queued for a slow worker before its frames are dropped
+RECONNECT_SECONDS = 0.5
+
+
+def _dumps(message):
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(message, option=ORJSON_OPTIONS) + b"\n"
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def _loads(line):
+    return orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+
+
+class EngineRelayMixin:
+    """
+    Pub/sub manager side of the engine relay. Emits on the pseudo namespaces
+    are not sent to clients: RELAY_NAMESPACE goes to `on_relay` (set on the
+    telemetry owner only), STATE_NAMESPACE to `on_state` (other workers).
+    """
+    on_relay = None
+    on_state = None
+
+    async def _handle_emit(self, message):
+        namespace = message.get("namespace")
+        if namespace == RELAY_NAMESPACE:
+            if self.on_relay is not None:
+                self.on_relay(message["event"], message["data"])
+            return
+        if namespace == STATE_NAMESPACE:
+            if self.on_state is not None:
+                self.on_state(message["data"])
+            return
+        await super()._handle_emit(message)
+
+
+class LocalBusManager(EngineRelayMixin, AsyncPubSubManager):
+    """
+    Client manager over the built-in bus: one TCP connection to the hub,
+    newline-delimited JSON messages (never pickle). Reconnects while the
+    owner worker (re)starts.
+    """
+    name = "localbus"
+
+    def __init__(self, port, channel="socketio", write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.port = port
+        self._writer = None
+        self._reader = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        async with self._lock:
+            if self._writer is None or self._writer.is_closing():
+                self._reader, self._writer = await asyncio.open_connection(
+                    BUS_HOST, self.port, limit=MAX_MESSAGE_BYTES)
+            return self._reader, self._writer
+
+    def _drop(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _publish(self, data):
+        try:
+            _, writer = await self._connect()
+            writer.write(_dumps(data))
+            await writer.drain()
+        except OSError as e:
+            # Hub restarting: this message is lost, like a frame to a disconnected client
+            logger.warning(f"Socket.IO bus publish failed: {e}")
+            self._drop()
+
+    async def _listen(self):
+        while True:
+            try:
+                reader, _ = await self._connect()
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        raise ConnectionResetError("bus closed")
+                    yield _loads(line)
+            except (OSError, ValueError):
+                # Hub gone (owner restarting) or an oversized message: start over
+                self._drop()
+                await asyncio.sleep(RECONNECT_SECONDS)
+
+
+class RelayRedisManager(EngineRelayMixin, socketio.AsyncRedisManager):
+    pass
+
+
+class RelayAioPikaManager(EngineRelayMixin, socketio.AsyncAioPikaManager):
+    pass
+
+
+def client_manager(queue, owner_port):
+    """
+    Client manager for SOCKETIO_MESSAGE_QUEUE.
+
+    Returns:
+        AsyncManager: None for the default in-memory manager (single process).
+    """
+    if not queue:
+        return None
+    if queue == "local":
+        return LocalBusManager(owner_port)
+    if queue.startswith(("redis://", "rediss://", "unix://")):
+        return RelayRedisManager(queue)
+    if queue.startswith(("amqp://", "amqps://")):
+        return RelayAioPikaManager(queue)
+    raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE: {queue}")
+
+
+class BusHub:
+    """
+    The built-in bus: every line a worker writes is forwarded to every
+    other worker. A worker that stops reading loses frames instead of
+    growing the hub's memory (MAX_PEER_BUFFER).
+    """
+
+    def __init__(self):
+        self.server = None
+        self.peers = set()
+        self.dropped = 0
+
+    async def _serve(self, reader, writer):
+        self.peers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for peer in self.peers:
+                    if peer is writer or peer.is_closing():
+                        continue
+                    if peer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+                        self.dropped += 1
+                        continue
+                    peer.write(line)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.peers.discard(writer)
+            writer.close()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        for peer in list(self.peers):
+            peer.close()
+
+
+async def claim_telemetry_owner(queue, owner_port):
+    """
+    Elects this worker as the telemetry owner if it is the first to bind
+    the owner port (an OS-level lock: released when the process exits).
+
+    Returns:
+        tuple: (is_owner, BusHub or listening socket kept open, or None).
+    """
+    if not queue:
+        return True, None
+    if queue == "local":
+        hub = BusHub()
+        try:
+            hub.server = await asyncio.start_server(hub._serve, BUS_HOST, owner_port, limit=MAX_MESSAGE_BYTES)
+        except OSError:
+            return False, None
+        return True, hub
+    lock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        lock.bind((BUS_HOST, owner_port))
+        lock.listen(1)
+    except OSError:
+        lock.close()
+        return False, None
+    return True, lock
+
+
+def start_fanout(sio, is_owner, relay=None, relayed_events=(), state=None, on_state=None):
+    """
+    Starts the manager's listener right away (python-socketio would wait
+    for this worker's first client) and wires the engine relay.
+
+    Args:
+        relay (callable): Owner: receives relayed client events (event, data).
+        relayed_events (tuple): Other workers: client events forwarded to the owner.
+        state (callable): Owner: returns the live state snapshot to publish.
+        on_state (callable): Other workers: receives each published snapshot.
+    """
+    manager = sio.manager
+    if not isinstance(manager, EngineRelayMixin):
+        return
+    if not sio.manager_initialized:
+        sio.manager_initialized = True
+        manager.initialize()
+    if is_owner:
+        manager.on_relay = relay
+        if state is not None:
+            manager.state_task = asyncio.create_task(_publish_state(manager, state))
+        return
+    manager.on_state = on_state
+    for event in relayed_events:
+        sio.on(event, _relay_handler(manager, event))
+
+
+async def _publish_state(manager, state):
+    while True:
+        try:
+            await manager.emit("live_state", state(), namespace=STATE_NAMESPACE)
+        except Exception as e:
+            logger.warning(f"Live state publish failed: {e}")
+        await asyncio.sleep(STATE_INTERVAL)
+
+
+def _relay_handler(manager, event):
+    async def forward(sid, data=None):
+        await manager.emit(event, data, namespace=RELAY_NAMESPACE)
+    return forward
@@ -1,8 +1,14 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional, Union, Any
 from jose import jwt
 from passlib.context import CryptContext
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 from app.core.config import settings
+from app.engine.models.user import User
 
 # Since settings might not have SECRET_KEY, we'll default one or check settings.
 # Ideally, settings should have SECRET_KEY.
@@ -27,3 +33,105 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     to_encode = {"exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+class TTLCache:
+    """
+    Bounded mapping with a per-entry deadline: entries expire after `ttl`
+    seconds (or their own earlier expiry) and the least recently used one
+    goes once `max_size` is reached.
+    """
+
+    def __init__(self, max_size=10000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()   # Key -> (deadline, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+# Token -> subject of a validated JWT, kept no longer than the token's own expiry
+token_cache = TTLCache(max_size=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+# User id -> user fields as loaded from the database
+user_cache = TTLCache(max_size=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+def decode_token_subject(token: str) -> Optional[str]:
+    """
+    Validates a JWT and returns its subject (cached per token).
+
+    Raises:
+        jwt.JWTError: Invalid signature, malformed or expired token.
+    """
+    subject = token_cache.get(token)
+    if subject is not None:
+        return subject
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    subject = payload.get("sub")
+    if subject is not None:
+        expires_in = payload["exp"] - time.time() if "exp" in payload else token_cache.ttl
+        token_cache.set(token, subject, ttl=expires_in)
+    return subject
+
+async def get_cached_user(session, user_id: int) -> Optional[User]:
+    """
+    User by id through user_cache (session: AsyncSession). Every call gets
+    its own (detached) User, so callers can't alter the cached record.
+    """
+    data = user_cache.get(user_id)
+    if data is None:
+        user = await session.get(User, user_id)
+        if user is None:
+            return None
+        data = user.model_dump()
+        user_cache.set(user_id, data)
+    return User.model_validate(data)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    # Any ORM write to a user (profile change, deactivation, delete) drops it from the cache.
+    # The row isn't committed yet: a concurrent request can still load and re-cache the old
+    # one, so the id is invalidated again once the transaction commits.
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("invalidated_users", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop("invalidated_users", ()):
+        user_cache.invalidate(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidated_users(session):
+    session.info.pop("invalidated_users", None)
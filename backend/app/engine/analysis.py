@@ -1,13 +1,64 @@
 import json
 import os
 import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.engine.corners import corner_time_loss, diagnose_corner
+from app.engine.downsample import trace_service
+from app.engine.lap_store import lap_store, SECTOR_BOUNDS
+from app.engine.track_cache import track_cache, disk_version
+
 HISTORY_FILE = Path("data/history.json")
+SESSION_LAPS = 60 # Laps of the current track/car considered for weaknesses
+
+RECOMMENDATIONS = {
+    "Early Braking": "Try braking later.",
+    "Overshooting Apex": "Try a slower entry to hit the apex.",
+    "Late Throttle": "Try getting on the throttle earlier.",
+    "Coasting": "Try carrying brake into the turn-in instead of coasting."
+}
 
 class AnalysisEngine:
     def __init__(self):
         self._ensure_history_file()
+        self._lock = threading.Lock()
+        # Per-lap corner losses per (track, car): {"reference": lap_id, "laps": {lap_id: seconds per corner}}
+        self._lap_losses = {}
+        # Last computed weaknesses per (track, car)
+        self._weaknesses = {}
+        self._current = None # (track, car) of the most recent recorded lap
+        # Weaknesses are recomputed off the capture thread, one update queued per track/car
+        self._updates = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+
+    def reset_caches(self):
+        """Forget derived results (used by analysis worker processes when new laps arrive)."""
+        with self._lock:
+            self._lap_losses.clear()
+            self._weaknesses.clear()
+            self._current = None
+
+    def data_version(self):
+        """
+        Version of the recorded data on disk (lap history + track artifacts).
+
+        Read from the files, so every process (analysis workers, other server
+        workers) sees a new lap or a rebuilt reference; job results are keyed on it.
+        """
+        try:
+            stat = HISTORY_FILE.stat()
+            history = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            history = None
+        return history, disk_version()
 
     def _ensure_history_file(self):
         if not HISTORY_FILE.parent.exists():
@@ -72,35 +123,217 @@ class AnalysisEngine:
             "archetype": archetype
         }
 
-    def get_weaknesses(self):
-        """Identify top track weaknesses."""
-        # Mock Logic: In reality, we'd map corner IDs to sector times.
-        corners = ["T1 (La Source)", "T2-4 (Eau Rouge)", "T5 (Les Combes)", "T10 (Pouhon)", "T18 (Bus Stop)"]
+    def get_weaknesses(self, track=None, car=None):
+        """Identify top track weaknesses (worst corners vs the reference lap)."""
+        if track is None or car is None:
+            if self._current is None:
+                latest = self._latest_recorded_lap()
+                if latest is None:
+                    return []
+                self._current = (latest.get("track"), latest.get("car"))
+            track, car = self._current
+
+        with self._lock:
+            cached = self._weaknesses.get((track, car))
+        if cached is not None:
+            return cached
+        return self._update_weaknesses(track, car)
+
+    def get_comparison(self, channel="speed", points=200, wait=True):
+        """
+        Latest recorded lap vs the reference lap of the same track/car, downsampled.
+
+        Args:
+            wait (bool): Wait for the track/car artifacts to load. False on the
+                capture thread: uses what is cached (None on a cold cache).
+        """
+        latest = self._latest_recorded_lap()
+        if latest is None:
+            return None
+        artifacts = self._artifacts(latest.get("track"), latest.get("car"), wait)
+        if artifacts is None:
+            return None
+
+        # Min/max buckets on the distance grid keep both traces aligned point for point
+        you = trace_service.get_trace(latest["lap_id"], channel, points, method="minmax", source="grid")
+        ref = trace_service.get_trace(artifacts["meta"]["reference_lap_id"], channel, points, method="minmax", source="grid")
+        if you is None or ref is None:
+            return None
+        return {
+            "track": latest.get("track"),
+            "car": latest.get("car"),
+            "lap_time": latest["time"],
+            "reference_lap_time": artifacts["meta"]["reference_lap_time"],
+            "delta": latest["time"] - artifacts["meta"]["reference_lap_time"],
+            "trace_you": you["y"],
+            "trace_ref": ref["y"]
+        }
+
+    def cached_weaknesses(self, track=None, car=None):
+        """Weaknesses already computed for a track/car (default: latest recorded), or None."""
+        if track is None or car is None:
+            if self._current is None:
+                return None
+            track, car = self._current
+        with self._lock:
+            return self._weaknesses.get((track, car))
+
+    def get_reference_lap(self, track, car, history=None):
+        """Best valid recorded lap for a track/car (history entry), or None."""
+        if history is None:
+            history = self.get_history()
+        candidates = [
+            lap for lap in history
+            if lap.get("lap_id") and lap.get("valid") and lap.get("track") == track and lap.get("car") == car
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda lap: lap["time"])
+
+    def _latest_recorded_lap(self, history=None):
+        if history is None:
+            history = self.get_history()
+        for lap in reversed(history):
+            if lap.get("lap_id"):
+                return lap
+        return None
+
+    def _artifacts(self, track, car, wait):
+        # The capture thread must never wait on a load/rebuild: it gets the
+        # cached (possibly previous) artifacts or nothing
+        return track_cache.get(track, car) if wait else track_cache.peek(track, car)
+
+    def _update_weaknesses(self, track, car, history=None):
+        """Recomputes per-corner losses for the session laps of a track/car."""
+        if history is None:
+            history = self.get_history()
+        # Reference lap and corner table come from the per-track/car artifact cache
+        artifacts = track_cache.get(track, car)
+        if artifacts is None or len(artifacts["corners"]) == 0:
+            return []
+        ref_id = artifacts["meta"]["reference_lap_id"]
+        reference = artifacts["reference"]
+        corners = artifacts["corners"]
+
+        session_ids = [
+            lap["lap_id"] for lap in history
+            if lap.get("lap_id") and lap.get("track") == track and lap.get("car") == car and lap["lap_id"] != ref_id
+        ][-SESSION_LAPS:]
+        if not session_ids:
+            return []
+
+        # Only laps not yet compared against this reference are computed, in one batch.
+        # A new personal best changes the reference and drops the old results.
+        with self._lock:
+            cached = self._lap_losses.get((track, car))
+            if cached is None or cached["reference"] != ref_id:
+                cached = {"reference": ref_id, "laps": {}}
+                self._lap_losses[(track, car)] = cached
+            missing = [lap_id for lap_id in session_ids if lap_id not in cached["laps"]]
+        if missing:
+            found, batch = lap_store.load_many(missing)
+            if batch is not None:
+                losses = corner_time_loss(batch, reference, corners)
+                with self._lock:
+                    for lap_id, row in zip(found, losses):
+                        cached["laps"][lap_id] = row
+
+        with self._lock:
+            cached["laps"] = {lap_id: cached["laps"][lap_id] for lap_id in session_ids if lap_id in cached["laps"]}
+            rows = list(cached["laps"].values())
+        if not rows:
+            return []
+
+        mean_loss = np.mean(rows, axis=0)
+        worst = [int(i) for i in np.argsort(mean_loss)[::-1][:3] if mean_loss[i] > 0]
+
+        _, laps = lap_store.load_many(session_ids)
         weaknesses = []
-        
-        # Pick 3 random weaknesses
-        for _ in range(3):
-            corner = random.choice(corners)
-            loss = round(random.uniform(0.1, 0.8), 2)
-            reason = random.choice(["Early Braking", "Overshooting Apex", "Late Throttle", "Coasting"])
+        for i in worst:
+            reason = diagnose_corner(laps, reference, corners[i])
             weaknesses.append({
-                "corner": corner,
-                "time_loss": loss,
+                "corner": f"T{i + 1}",
+                "time_loss": round(float(mean_loss[i]), 2),
                 "reason": reason,
-                "recommendation": f"Try {reason.lower().replace('early', 'later').replace('late', 'earlier')}."
+                "recommendation": RECOMMENDATIONS[reason]
             })
-            
+
+        with self._lock:
+            self._weaknesses[(track, car)] = weaknesses
         return weaknesses
 
-    def save_lap(self, lap_data):
-        """Append a new lap to history."""
+    def _improves_best_sector(self, track, car, lap_data, lap):
+        artifacts = track_cache.peek(track, car)
+        if artifacts is None or not lap_data.get("valid"):
+            return False
+        closed = np.append(lap["time"], lap_data["time"])
+        sectors = np.diff(closed[SECTOR_BOUNDS])
+        return bool(np.any(sectors < artifacts["best_sectors"]))
+
+    def save_lap(self, lap_data, lap=None):
+        """
+        Append a new lap to history.
+
+        Args:
+            lap_data (dict): Summary ('time', 'valid', 'track', 'car', ...).
+            lap (dict): Optional distance-aligned channels from the lap recorder.
+        """
         history = self.get_history()
+        track, car = lap_data.get("track"), lap_data.get("car")
+        personal_best = False
+        if lap is not None:
+            lap_data["lap_id"] = lap_data.get("lap_id") or f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:6]}"
+            lap_store.save(lap_data["lap_id"], lap)
+            best = self.get_reference_lap(track, car, history)
+            personal_best = lap_data.get("valid") and (best is None or lap_data["time"] < best["time"])
+            personal_best = personal_best or self._improves_best_sector(track, car, lap_data, lap)
+
         history.append(lap_data)
-        # Keep last 100 laps only
+        # Keep last 100 laps only (plus the reference lap of every track/car);
+        # the trimmed lap files move to the ghost training archive
         if len(history) > 100:
-            history = history[-100:]
-        
-        with open(HISTORY_FILE, "w") as f:
+            best_laps = {}
+            for entry in history:
+                if entry.get("lap_id") and entry.get("valid"):
+                    key = (entry.get("track"), entry.get("car"))
+                    if key not in best_laps or entry["time"] < best_laps[key]["time"]:
+                        best_laps[key] = entry
+            references = {entry["lap_id"] for entry in best_laps.values()}
+
+            old_laps = history[:-100]
+            for old in old_laps:
+                if old.get("lap_id") and old["lap_id"] not in references:
+                    lap_store.archive(old, settings.LAP_ARCHIVE_MAX_GB * 1024 ** 3)
+            history = [old for old in old_laps if old.get("lap_id") in references] + history[-100:]
+
+        # Replace atomically: analysis workers read the file concurrently
+        tmp = HISTORY_FILE.with_suffix(".tmp")
+        with open(tmp, "w") as f:
             json.dump(history, f)
+        os.replace(tmp, HISTORY_FILE)
+
+        # New personal best or best sector: rebuild the track/car artifacts
+        if personal_best:
+            track_cache.invalidate(track, car)
+
+        # Keep /weaknesses a lookup: analyse the new lap in the background, the
+        # result replaces the cached weaknesses when it is ready
+        if lap is not None:
+            self._current = (track, car)
+            self._schedule_update(track, car)
+
+    def _schedule_update(self, track, car):
+        key = (track, car)
+        with self._lock:
+            queued = self._updates.get(key)
+            if queued is not None and not queued.running() and not queued.done():
+                return # The queued update will read this lap too
+            self._updates[key] = self._executor.submit(self._background_update, track, car)
+
+    def _background_update(self, track, car):
+        try:
+            self._update_weaknesses(track, car)
+        except Exception as e:
+            logger.error(f"Analysis: weakness update failed for {track} / {car}: {e}")
             
 analysis_engine = AnalysisEngine()
@@ -0,0 +1,148 @@
+import numpy as np
+
+WINDOW_LAPS = 10       # Laps kept for the windowed average
+EWMA_ALPHA = 0.3       # Weight of the newest lap in the exponential average
+NUM_WHEELS = 4         # FL, FR, RL, RR
+BOX_MARGIN_LAPS = 1.0  # Call the box when less than this many laps of fuel are left
+
+
+class ConsumptionEstimator:
+    """
+    Online per-lap fuel and tire wear estimator.
+
+    Frames only compare fuel/wear with the previous frame; the per-lap
+    bookkeeping (ring write, running sums, EWMA) is O(1) and runs on the
+    LAP_COMPLETE session event. Laps with a refuel, tire change or pit
+    visit are not recorded, they only reset the baseline.
+    """
+
+    def __init__(self, window=WINDOW_LAPS, alpha=EWMA_ALPHA):
+        self.window = window
+        self.alpha = alpha
+        # Ring arrays of the last `window` laps
+        self._fuel = np.zeros(window)
+        self._wear = np.zeros((window, NUM_WHEELS))
+        self.reset()
+
+    def reset(self):
+        self._fuel[:] = 0.0
+        self._wear[:] = 0.0
+        self._fuel_sum = 0.0
+        self._wear_sum = np.zeros(NUM_WHEELS)
+        self._head = 0
+        self.laps = 0           # Laps in the window
+        self.fuel_ewma = None
+        self.wear_ewma = None
+
+        self._lap_fuel = None   # Fuel at the start of the current lap
+        self._lap_wear = None
+        self._last_fuel = None
+        self._last_wear = None
+        self._clean = True      # No refuel/tire change during the current lap
+
+    def observe(self, fuel, wear=None):
+        """
+        Per-frame check for a refuel or fresh tires (values going up), which
+        makes the current lap unmeasurable.
+
+        Args:
+            fuel (float): Fuel in the tank (liters).
+            wear (sequence): Optional wear per wheel (0.0-1.0 fraction of maximum).
+        """
+        if self._last_fuel is not None and fuel > self._last_fuel + 0.05:
+            self._clean = False
+        wear_total = None if wear is None else sum(wear)
+        if wear_total is not None and self._last_wear is not None and wear_total < self._last_wear - 1e-4:
+            self._clean = False
+        self._last_fuel = fuel
+        self._last_wear = wear_total
+
+    def on_lap_event(self, event):
+        """
+        LAP_COMPLETE handler (event carries 'fuel' and optionally 'wear').
+
+        Returns:
+            bool: True when the lap was recorded.
+        """
+        fuel = event.get("fuel")
+        if fuel is None:
+            return False
+        wear = event.get("wear")
+
+        # Untimed (joined mid-lap) or pit laps only set the baseline
+        recorded = False
+        if self._lap_fuel is not None and self._clean and event.get("valid"):
+            used = self._lap_fuel - fuel
+            worn = None
+            if wear is not None and self._lap_wear is not None:
+                worn = np.asarray(wear, dtype=np.float64) - self._lap_wear
+            if used > 0:
+                self._record(used, worn)
+                recorded = True
+
+        # Baseline for the lap that starts now
+        self._lap_fuel = fuel
+        self._lap_wear = None if wear is None else np.asarray(wear, dtype=np.float64)
+        self._clean = True
+        return recorded
+
+    def _record(self, used, worn):
+        i = self._head
+        if self.laps == self.window:
+            self._fuel_sum -= self._fuel[i]
+            self._wear_sum -= self._wear[i]
+        else:
+            self.laps += 1
+        self._fuel[i] = used
+        self._wear[i] = 0.0 if worn is None else worn
+        self._fuel_sum += used
+        self._wear_sum += self._wear[i]
+        self._head = (i + 1) % self.window
+
+        if self.fuel_ewma is None:
+            self.fuel_ewma = used
+            self.wear_ewma = self._wear[i].copy()
+        else:
+            self.fuel_ewma += self.alpha * (used - self.fuel_ewma)
+            self.wear_ewma += self.alpha * (self._wear[i] - self.wear_ewma)
+
+    @property
+    def fuel_per_lap(self):
+        """Exponentially weighted fuel per lap (liters), None until a lap is measured."""
+        return self.fuel_ewma
+
+    @property
+    def fuel_per_lap_window(self):
+        """Mean fuel per lap over the last `window` laps."""
+        return self._fuel_sum / self.laps if self.laps else None
+
+    @property
+    def wear_per_lap(self):
+        """Exponentially weighted wear per lap and wheel (fraction of maximum)."""
+        return None if self.wear_ewma is None else self.wear_ewma.tolist()
+
+    @property
+    def wear_per_lap_window(self):
+        return (self._wear_sum / self.laps).tolist() if self.laps else None
+
+    def fuel_status(self, fuel_level, laps_to_go=None, fuel_capacity=None):
+        """
+        Fuel widget data (fuel_strategy frame field).
+
+        Args:
+            laps_to_go (float): Race laps left; None if unknown (practice/timed).
+        """
+        per_lap = self.fuel_per_lap
+        laps_of_fuel = fuel_level / per_lap if per_lap else 0.0
+        fuel_to_add = 0.0
+        if per_lap and laps_to_go is not None:
+            fuel_to_add = max(0.0, laps_to_go * per_lap - fuel_level)
+            if fuel_capacity:
+                fuel_to_add = min(fuel_to_add, fuel_capacity - fuel_level)
+        return {
+            "fuel_level": fuel_level,
+            "cons_per_lap": round(per_lap, 2) if per_lap else 0.0,
+            "laps_remaining": int(laps_of_fuel),
+            "fuel_to_add": fuel_to_add,
+            "box_this_lap": bool(per_lap) and laps_of_fuel < BOX_MARGIN_LAPS and fuel_to_add > 0
+        }
@@ -0,0 +1,155 @@
+import numpy as np
+
+from app.engine.lap_store import GRID_POINTS
+
+CORNER_DTYPE = np.dtype([
+    ("start", np.int32),        # Grid index where the corner phase begins (braking or turn-in)
+    ("brake_point", np.int32),  # First grid index with brake applied, -1 if flat-out
+    ("apex", np.int32),         # Grid index of minimum speed
+    ("end", np.int32),          # Grid index where the car is straight again
+    ("min_speed", np.float32),
+    ("direction", np.int8),     # -1 left, +1 right
+])
+
+BRAKE_THRESHOLD = 0.1
+THROTTLE_THRESHOLD = 0.2
+MIN_CORNER_POINTS = GRID_POINTS // 200   # Ignore wiggles shorter than 0.5% of a lap
+MERGE_GAP_POINTS = GRID_POINTS // 100    # Chicanes closer than 1% of a lap are one complex
+SMOOTHING_POINTS = 9
+
+
+def _smooth(values):
+    """Circular moving average (laps wrap around at the line)."""
+    kernel = np.ones(SMOOTHING_POINTS) / SMOOTHING_POINTS
+    pad = SMOOTHING_POINTS // 2
+    wrapped = np.concatenate([values[-pad:], values, values[:pad]])
+    return np.convolve(wrapped, kernel, mode="valid")
+
+
+def _runs(mask):
+    """Start/end (exclusive) indices of consecutive True runs."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_corners(lap):
+    """
+    Finds braking zones and apexes on a distance-aligned lap.
+
+    A corner is a region where the driver is either braking or holding
+    significant steering lock. The apex is the minimum speed inside it.
+
+    Args:
+        lap (dict): Channels on the lap_store distance grid.
+
+    Returns:
+        np.ndarray: Structured array of CORNER_DTYPE, ordered by distance.
+    """
+    speed = _smooth(lap["speed"].astype(np.float64))
+    steering = _smooth(lap["steering"].astype(np.float64))
+    brake = lap["brake"]
+
+    # Steering units differ per sim (radians vs normalized), so use a relative threshold
+    steer_abs = np.abs(steering)
+    steer_threshold = max(0.2 * np.percentile(steer_abs, 95), 1e-3)
+
+    active = (steer_abs > steer_threshold) | (brake > BRAKE_THRESHOLD)
+    starts, ends = _runs(active)
+    if len(starts) == 0:
+        return np.zeros(0, dtype=CORNER_DTYPE)
+
+    # Merge zones separated by short gaps (chicanes, brake-release-turn-in)
+    keep = np.concatenate([[True], starts[1:] - ends[:-1] > MERGE_GAP_POINTS])
+    starts = starts[keep]
+    ends = np.maximum.reduceat(ends, np.flatnonzero(keep))
+
+    long_enough = (ends - starts) >= MIN_CORNER_POINTS
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    corners = np.zeros(len(starts), dtype=CORNER_DTYPE)
+    for i, (s, e) in enumerate(zip(starts, ends)):
+        apex = s + int(np.argmin(speed[s:e]))
+        braking = np.flatnonzero(brake[s:apex + 1] > BRAKE_THRESHOLD)
+        corners[i] = (
+            s,
+            s + braking[0] if len(braking) else -1,
+            apex,
+            e - 1,
+            speed[apex],
+            1 if steering[s:e].mean() >= 0 else -1,
+        )
+    return corners
+
+
+def braking_zones(lap):
+    """Start/end grid indices [N, 2] of every braking zone."""
+    starts, ends = _runs(lap["brake"] > BRAKE_THRESHOLD)
+    keep = (ends - starts) >= MIN_CORNER_POINTS // 2
+    return np.stack([starts[keep], ends[keep] - 1], axis=1).astype(np.int32)
+
+
+def lift_zones(lap):
+    """Start/end grid indices [N, 2] where the driver lifts off full throttle without braking."""
+    lifting = (lap["throttle"] < 0.9) & (lap["brake"] <= BRAKE_THRESHOLD)
+    starts, ends = _runs(lifting)
+    # A lift only counts when it comes off a full-throttle section
+    keep = ((ends - starts) >= MIN_CORNER_POINTS // 2) & (lap["throttle"][starts - 1] >= 0.9)
+    return np.stack([starts[keep], ends[keep] - 1], axis=1).astype(np.int32)
+
+
+def corner_time_loss(laps, reference, corners):
+    """
+    Time lost per corner for a batch of laps against a reference lap.
+
+    Uses the cumulative delta-time (lap time - reference time at each grid
+    point) so the loss of a corner is the delta growth across it.
+
+    Args:
+        laps (dict): Channel matrices [Laps, GRID_POINTS] (lap_store.load_many).
+        reference (dict): Channels of the reference lap.
+        corners (np.ndarray): Corner table from detect_corners.
+
+    Returns:
+        np.ndarray: Seconds lost, shape [Laps, Corners]. Negative means gained.
+    """
+    delta = laps["time"].astype(np.float64) - reference["time"].astype(np.float64)
+    return delta[:, corners["end"]] - delta[:, corners["start"]]
+
+
+def diagnose_corner(laps, reference, corner):
+    """
+    Picks the most likely reason for time lost in one corner, averaged over laps.
+
+    Returns one of: 'Early Braking', 'Overshooting Apex', 'Late Throttle', 'Coasting'.
+    """
+    s, apex, e = int(corner["start"]), int(corner["apex"]), int(corner["end"])
+    # Look back a bit for braking that starts before the steering does
+    lookback = max(0, s - MERGE_GAP_POINTS * 3)
+
+    scores = {}
+
+    # Braking point (earlier = smaller index)
+    def brake_onset(brake):
+        mask = brake[..., lookback:apex + 1] > BRAKE_THRESHOLD
+        return np.where(mask.any(axis=-1), mask.argmax(axis=-1), apex - lookback)
+
+    scores["Early Braking"] = float(np.mean(brake_onset(reference["brake"]) - brake_onset(laps["brake"])))
+
+    # Minimum speed through the apex window (km/h below reference)
+    window = slice(max(s, apex - MIN_CORNER_POINTS), min(e, apex + MIN_CORNER_POINTS) + 1)
+    scores["Overshooting Apex"] = float(reference["speed"][window].min() - np.mean(laps["speed"][:, window].min(axis=1))) / 5.0
+
+    # Throttle pickup after the apex
+    def throttle_onset(throttle):
+        mask = throttle[..., apex:e + 1] > THROTTLE_THRESHOLD
+        return np.where(mask.any(axis=-1), mask.argmax(axis=-1), e - apex)
+
+    scores["Late Throttle"] = float(np.mean(throttle_onset(laps["throttle"]) - throttle_onset(reference["throttle"])))
+
+    # Neither pedal pressed inside the corner
+    def coasting(throttle, brake):
+        return ((throttle[..., s:e + 1] < 0.05) & (brake[..., s:e + 1] < 0.05)).sum(axis=-1)
+
+    scores["Coasting"] = float(np.mean(coasting(laps["throttle"], laps["brake"]) - coasting(reference["throttle"], reference["brake"])))
+
+    return max(scores, key=scores.get)
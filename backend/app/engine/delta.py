@@ -0,0 +1,117 @@
+import numpy as np
+from loguru import logger
+
+from app.engine.lap_store import GRID_POINTS, NUM_SECTORS, SECTOR_BOUNDS
+from app.engine.track_cache import track_cache
+
+
+class DeltaEngine:
+    """
+    Live delta-time against the reference lap of the current track/car.
+
+    The reference is held as elapsed time per distance grid point, so a
+    frame lookup is direct grid indexing plus one linear interpolation.
+    Everything the frame path touches is prepared when the reference
+    changes, never per frame.
+    """
+
+    def __init__(self):
+        self.track = None
+        self.car = None
+        # GRID_POINTS + 1 entries: the extra one is the lap time at the line
+        self._ref_time = [0.0] * (GRID_POINTS + 1)
+        self.reference_lap_time = 0.0
+        self.best_sectors = [0.0] * NUM_SECTORS
+        self.potential_lap = 0.0
+        self.has_reference = False
+
+        # Current lap
+        self._lap_start = None
+        self._last_pct = None
+        self.delta = 0.0
+        self.predicted_lap = 0.0
+
+    def set_session(self, track, car):
+        """
+        Switches to the reference of a new track/car. The artifacts load in
+        the background; until they arrive the delta reads 0.
+        """
+        if track == self.track and car == self.car:
+            return
+        self.track = track
+        self.car = car
+        self.has_reference = False
+        self.reference_lap_time = 0.0
+        self.best_sectors = [0.0] * NUM_SECTORS
+        self.potential_lap = 0.0
+        self._lap_start = None
+        self._last_pct = None
+        self._poll_reference()
+
+    def _poll_reference(self):
+        artifacts = track_cache.peek(self.track, self.car)
+        if artifacts is None:
+            return
+        self._set_reference(artifacts["reference"]["time"], artifacts["meta"]["reference_lap_time"])
+        self.best_sectors = artifacts["best_sectors"].tolist()
+        self.potential_lap = float(sum(self.best_sectors))
+        logger.info(f"Delta: reference {self.reference_lap_time:.3f}s for {self.track} / {self.car}")
+
+    def on_lap_complete(self, lap_data, lap):
+        """Adopts a new personal best and improved sectors as soon as a lap is stored."""
+        if lap_data.get("track") != self.track or lap_data.get("car") != self.car or not lap_data.get("valid"):
+            return
+        lap_time = lap_data["time"]
+        if not self.has_reference or lap_time < self.reference_lap_time:
+            self._set_reference(lap["time"], lap_time)
+
+        bounds = [float(lap["time"][b]) for b in SECTOR_BOUNDS[:-1]] + [lap_time]
+        for i in range(NUM_SECTORS):
+            sector = bounds[i + 1] - bounds[i]
+            if self.best_sectors[i] <= 0 or sector < self.best_sectors[i]:
+                self.best_sectors[i] = sector
+        self.potential_lap = sum(self.best_sectors)
+
+    def _set_reference(self, ref_time, lap_time):
+        # Plain Python list: indexing it in the frame path allocates no arrays
+        self._ref_time[:GRID_POINTS] = np.asarray(ref_time, dtype=np.float64).tolist()
+        self._ref_time[GRID_POINTS] = lap_time
+        self.reference_lap_time = lap_time
+        self.has_reference = True
+
+    def update(self, lap_dist_pct, timestamp):
+        """
+        Per-frame delta lookup, O(1).
+
+        Returns:
+            float: Delta to the reference in seconds (negative = faster).
+        """
+        if self._last_pct is not None and self._last_pct - lap_dist_pct > 0.5:
+            self._lap_start = timestamp
+        if self._lap_start is None:
+            self._lap_start = timestamp
+        self._last_pct = lap_dist_pct
+
+        if not self.has_reference:
+            # Dict lookup only; the load itself runs on the track cache worker
+            self._poll_reference()
+        if not self.has_reference:
+            self.delta = 0.0
+            self.predicted_lap = 0.0
+            return self.delta
+
+        pos = lap_dist_pct * GRID_POINTS
+        i = int(pos)
+        if i < 0:
+            i, pos = 0, 0.0
+        elif i >= GRID_POINTS:
+            i, pos = GRID_POINTS - 1, float(GRID_POINTS)
+        ref = self._ref_time
+        ref_t = ref[i] + (ref[i + 1] - ref[i]) * (pos - i)
+
+        self.delta = (timestamp - self._lap_start) - ref_t
+        self.predicted_lap = self.reference_lap_time + self.delta
+        return self.delta
+
+
+delta_engine = DeltaEngine()
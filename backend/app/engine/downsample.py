@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.engine.lap_store import lap_store, DISTANCE_GRID
+
+METHODS = ("lttb", "minmax")
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point and, per bucket, the point forming the
+    largest triangle with the previously kept point and the average of the
+    next bucket - so peaks (brake spikes) survive where decimation drops them.
+
+    Returns:
+        np.ndarray: Indices of the kept samples (sorted).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket edges over the interior points (first/last are always kept)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Average point of every bucket, computed up front
+    counts = np.maximum(np.diff(edges), 1)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        if i + 1 < n_out - 2:
+            cx, cy = avg_x[i + 1], avg_y[i + 1]
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(x, y, n_out):
+    """
+    Min/max bucket downsampling: the minimum and maximum of every bucket,
+    in sample order. Returns at most n_out indices (sorted).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    n_buckets = n_out // 2
+    bucket = (np.arange(n) * n_buckets) // n
+    # Sorting by (bucket, value) puts each bucket's min first and max last
+    order = np.lexsort((np.asarray(y), bucket))
+    bounds = np.searchsorted(bucket[order], np.arange(n_buckets + 1))
+    mins = order[bounds[:-1]]
+    maxs = order[bounds[1:] - 1]
+    return np.unique(np.concatenate([mins, maxs]))
+
+
+class TraceService:
+    """
+    Serves reduced lap channels at a requested point count.
+
+    Results are cached per (lap, channel, points, method); laps never change
+    once stored, so entries only leave the cache by LRU eviction.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_trace(self, lap_id, channel, points=500, method="lttb", source="raw"):
+        """
+        Args:
+            source (str): 'raw' for per-frame samples (falls back to the grid),
+                'grid' for the distance grid - use it when traces of different
+                laps must line up point for point.
+
+        Returns:
+            dict: {"x": lap distance fraction, "y": values} or None if the lap/channel is unknown.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown downsampling method '{method}'")
+        key = (lap_id, channel, points, method, source)
+        with self._lock:
+            trace = self._cache.get(key)
+            if trace is not None:
+                self._cache.move_to_end(key)
+                return trace
+
+        series = self._load_channel(lap_id, channel, source)
+        if series is None:
+            return None
+        x, y = series
+        reduce = lttb if method == "lttb" else minmax
+        idx = reduce(x, y, points)
+        trace = {
+            "x": np.round(x[idx], 5).tolist(),
+            "y": np.round(y[idx], 3).tolist()
+        }
+
+        with self._lock:
+            self._cache[key] = trace
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return trace
+
+    def _load_channel(self, lap_id, channel, source):
+        # Prefer the raw per-frame samples; fall back to the distance grid
+        if source == "raw":
+            raw = lap_store.load_raw(lap_id)
+            if raw is not None and channel in raw:
+                return raw["lap_dist_pct"], raw[channel]
+        lap = lap_store.load(lap_id)
+        if lap is None or channel not in lap:
+            return None
+        return DISTANCE_GRID, lap[channel].astype(np.float64)
+
+
+trace_service = TraceService()
@@ -0,0 +1,221 @@
+import asyncio
+import inspect
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+
+from loguru import logger
+
+from app.core.config import settings
+from app.engine.analysis import analysis_engine
+from app.engine.mobile_analysis import run_session_analysis
+from app.engine.strategy_sim import simulate_strategies
+from app.engine.track_cache import track_cache
+
+
+# --- JOB FUNCTIONS (run inside the worker processes) ---
+# Workers rebuild their state from the files under data/, so these only
+# need picklable arguments and return plain JSON-able results.
+
+_worker_version = None
+
+def _run_job(kind, params):
+    global _worker_version
+    # New laps or rebuilt artifacts on disk since this worker last ran: drop its
+    # in-memory caches. Read here, not passed in: the files are the source of truth.
+    version = analysis_engine.data_version()
+    if version != _worker_version:
+        analysis_engine.reset_caches()
+        track_cache.clear()
+        _worker_version = version
+    return JOB_KINDS[kind](**params)
+
+def _job_weaknesses(track=None, car=None):
+    return analysis_engine.get_weaknesses(track, car)
+
+def _job_comparison(channel="speed", points=200):
+    return analysis_engine.get_comparison(channel, points)
+
+def _job_dna():
+    return analysis_engine.get_driver_dna()
+
+JOB_KINDS = {
+    "weaknesses": _job_weaknesses,
+    "comparison": _job_comparison,
+    "dna": _job_dna,
+    "strategy_simulation": simulate_strategies,
+    "mobile_analysis": run_session_analysis,
+}
+
+
+class AnalysisJob:
+    __slots__ = ("id", "kind", "params", "key", "status", "result", "error", "created_at", "finished_at", "future")
+
+    def __init__(self, kind, params, key):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.status = "queued" # queued, running, done, failed, cancelled
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.future = None
+
+    def to_dict(self, include_result=True):
+        status = self.status
+        if status == "queued" and self.future is not None and self.future.running():
+            status = "running"
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.status == "done":
+            data["result"] = self.result
+        return data
+
+
+class AnalysisJobManager:
+    """
+    Runs heavy analysis in a process pool so it never blocks the event loop
+    (and the Socket.IO telemetry fan-out) or competes for the GIL.
+
+    Identical jobs (same kind, params and on-disk data version) that are in
+    flight are shared, and finished results are cached until a new lap is
+    recorded or track artifacts are rebuilt. Jobs can be awaited, polled by id or cancelled.
+    """
+
+    def __init__(self, max_workers=2, max_finished_jobs=256):
+        self.max_workers = max_workers
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = None
+        self._jobs = OrderedDict()   # Job id -> AnalysisJob
+        self._in_flight = {}         # Job key -> AnalysisJob
+        self._results = {}           # Job key -> finished AnalysisJob
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            # 'spawn': forking a process that owns the telemetry/voice threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, kind, **params):
+        """Queues a job (or returns the identical in-flight/cached one)."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown analysis job '{kind}'")
+        # Raises TypeError on bad params here rather than inside a worker
+        inspect.signature(JOB_KINDS[kind]).bind(**params)
+
+        # Results depend on the recorded laps, so their version on disk is part of the key
+        key = (kind, tuple(sorted(params.items())), analysis_engine.data_version())
+        with self._lock:
+            job = self._in_flight.get(key) or self._results.get(key)
+            if job is not None:
+                return job
+
+            job = AnalysisJob(kind, params, key)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            self._prune(key[2])
+            try:
+                job.future = self._get_executor().submit(_run_job, kind, params)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed by the OS): start a fresh pool
+                logger.warning("Analysis pool broken, restarting workers")
+                self._executor = None
+                job.future = self._get_executor().submit(_run_job, kind, params)
+        job.future.add_done_callback(lambda f, job=job: self._on_done(job, f))
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, job, timeout=None):
+        """Awaits a job without blocking the event loop. Raises asyncio.TimeoutError."""
+        if job.status in ("done", "failed", "cancelled"):
+            return job
+        # asyncio.wait never cancels the job on timeout and doesn't raise if it was cancelled
+        done, _ = await asyncio.wait({asyncio.wrap_future(job.future)}, timeout=timeout)
+        if not done:
+            raise asyncio.TimeoutError()
+        return job
+
+    async def run(self, kind, timeout=None, **params):
+        """Submit + await. Returns the job result, raises RuntimeError if it failed."""
+        job = await self.wait(self.submit(kind, **params), timeout)
+        if job.status != "done":
+            raise RuntimeError(job.error or f"Analysis job {job.status}")
+        return job.result
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. Queued jobs never run; a running job cannot be
+        interrupted, so its result is discarded instead.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in ("done", "failed", "cancelled"):
+                return job
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+        # Outside the lock: cancel() runs the done callback synchronously
+        job.future.cancel()
+        return job
+
+    def _on_done(self, job, future):
+        with self._lock:
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+            if job.status == "cancelled":
+                return
+            job.finished_at = time.time()
+            try:
+                job.result = future.result()
+                job.status = "done"
+                self._results[job.key] = job
+            except CancelledError:
+                job.status = "cancelled"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                logger.error(f"Analysis job {job.kind} failed: {e}")
+
+    def _prune(self, version):
+        # Caller holds the lock. Drop the oldest finished jobs and stale results.
+        for key in [k for k in self._results if k[2] != version]:
+            del self._results[key]
+        while len(self._jobs) > self.max_finished_jobs:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            del self._jobs[oldest_id]
+            if self._results.get(oldest.key) is oldest:
+                del self._results[oldest.key]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+analysis_jobs = AnalysisJobManager(max_workers=settings.ANALYSIS_WORKERS)
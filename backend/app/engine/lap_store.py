@@ -0,0 +1,298 @@
+import json
+import os
+import struct
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+LAPS_DIR = Path("data/laps")
+# Laps trimmed from the analysis history, kept as the ghost training corpus
+ARCHIVE_DIR = LAPS_DIR / "archive"
+ARCHIVE_INDEX = ARCHIVE_DIR / "index.jsonl"   # One lap summary per archived lap
+
+# Every stored lap is resampled onto the same normalized distance grid so
+# laps (and the reference) can be compared index for index.
+GRID_POINTS = 1000
+DISTANCE_GRID = np.arange(GRID_POINTS, dtype=np.float64) / GRID_POINTS
+
+# Equal-distance sectors used for best-sector / potential lap times
+NUM_SECTORS = 3
+SECTOR_BOUNDS = [GRID_POINTS * i // NUM_SECTORS for i in range(NUM_SECTORS)] + [GRID_POINTS]
+
+# 'time' is elapsed lap time at each grid point, the rest are driver inputs
+CHANNELS = ("time", "speed", "throttle", "brake", "steering")
+
+# Raw samples buffered per lap (60 Hz * 10 min is plenty for any lap)
+MAX_LAP_SAMPLES = 36000
+
+
+def resample_lap(lap_dist_pct, samples):
+    """
+    Resamples raw per-frame samples onto DISTANCE_GRID.
+
+    Args:
+        lap_dist_pct (array): Lap distance fraction [0, 1) for every sample.
+        samples (dict): Channel name -> array of the same length.
+    """
+    pct = np.asarray(lap_dist_pct, dtype=np.float64)
+    # Distance must never go backwards for np.interp (jitter near the line)
+    pct = np.maximum.accumulate(pct)
+
+    lap = {}
+    for name in CHANNELS:
+        values = np.asarray(samples[name], dtype=np.float64)
+        lap[name] = np.interp(DISTANCE_GRID, pct, values).astype(np.float32)
+    return lap
+
+
+def map_raw(path):
+    """
+    Per-frame samples of a lap file as read-only memory maps: np.savez stores
+    members uncompressed, so each raw_* array is mapped at its offset in the
+    archive instead of being read into memory.
+
+    Returns:
+        dict: 'lap_dist_pct' + CHANNELS -> array, or None if the lap has no raw samples.
+    """
+    names = ("lap_dist_pct",) + CHANNELS
+    raw = {}
+    with zipfile.ZipFile(path) as z, open(path, "rb") as f:
+        for name in names:
+            try:
+                info = z.getinfo(f"raw_{name}.npy")
+            except KeyError:
+                return None
+            if info.compress_type != zipfile.ZIP_STORED:
+                with z.open(info) as member:
+                    raw[name] = np.lib.format.read_array(member)
+                continue
+            # Member data follows its local header: 30 bytes + file name + extra field
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            if 0 in shape:
+                raw[name] = np.zeros(shape, dtype=dtype)
+                continue
+            raw[name] = np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=f.tell(),
+                                  order="F" if fortran else "C")
+    return raw
+
+
+def archived_laps():
+    """Summaries of the archived laps (history entries at the time they were trimmed)."""
+    if not ARCHIVE_INDEX.exists():
+        return []
+    with open(ARCHIVE_INDEX) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class LapStore:
+    def __init__(self, max_cached_laps=200):
+        self.max_cached_laps = max_cached_laps
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._archive_bytes = None   # Size of ARCHIVE_DIR, measured on first use
+
+    def _path(self, lap_id):
+        return LAPS_DIR / f"{lap_id}.npz"
+
+    def save(self, lap_id, lap):
+        """
+        Persist the distance-aligned channels of a lap.
+
+        If the lap carries a 'raw' dict (per-frame samples from the recorder)
+        it is stored alongside as raw_* arrays for full-resolution traces.
+        """
+        LAPS_DIR.mkdir(parents=True, exist_ok=True)
+        arrays = {name: lap[name] for name in CHANNELS}
+        for name, values in (lap.get("raw") or {}).items():
+            arrays[f"raw_{name}"] = np.asarray(values, dtype=np.float32)
+        np.savez(self._path(lap_id), **arrays)
+        self._remember(lap_id, {name: lap[name] for name in CHANNELS})
+
+    def load(self, lap_id):
+        """Returns the channel dict for a lap, or None if it was never stored."""
+        with self._lock:
+            lap = self._cache.get(lap_id)
+            if lap is not None:
+                self._cache.move_to_end(lap_id)
+                return lap
+
+        path = self._path(lap_id)
+        if not path.exists():
+            return None
+        with np.load(path) as f:
+            lap = {name: f[name] for name in CHANNELS}
+        self._remember(lap_id, lap)
+        return lap
+
+    def load_raw(self, lap_id):
+        """Per-frame samples of a lap ('lap_dist_pct' + CHANNELS), read from disk, or None."""
+        path = self._path(lap_id)
+        if not path.exists():
+            return None
+        with np.load(path) as f:
+            if "raw_lap_dist_pct" not in f.files:
+                return None
+            names = ("lap_dist_pct",) + CHANNELS
+            return {name: f[f"raw_{name}"].astype(np.float64) for name in names}
+
+    def load_many(self, lap_ids):
+        """
+        Stacks a channel matrix [Laps, GRID_POINTS] per channel for the given laps.
+
+        Returns:
+            tuple: (ids of the laps found, channel dict) or (ids, None) if none were found.
+        """
+        found, laps = [], []
+        for lap_id in lap_ids:
+            lap = self.load(lap_id)
+            if lap is not None:
+                found.append(lap_id)
+                laps.append(lap)
+        if not laps:
+            return found, None
+        return found, {name: np.stack([lap[name] for lap in laps]) for name in CHANNELS}
+
+    def delete(self, lap_id):
+        with self._lock:
+            self._cache.pop(lap_id, None)
+        try:
+            self._path(lap_id).unlink()
+        except FileNotFoundError:
+            pass
+
+    def archive(self, entry, max_bytes):
+        """
+        Moves a lap trimmed from the history to ARCHIVE_DIR along with its
+        summary. Once the archive exceeds max_bytes the oldest archived laps
+        are deleted (max_bytes <= 0: the lap is deleted right away).
+
+        Args:
+            entry (dict): History entry of the lap ('lap_id', 'track', 'car', 'valid', ...).
+        """
+        lap_id = entry["lap_id"]
+        if max_bytes <= 0:
+            self.delete(lap_id)
+            return
+        with self._lock:
+            self._cache.pop(lap_id, None)
+        ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+        target = ARCHIVE_DIR / f"{lap_id}.npz"
+        try:
+            os.replace(self._path(lap_id), target)
+        except FileNotFoundError:
+            return
+        with open(ARCHIVE_INDEX, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        if self._archive_bytes is None:
+            self._archive_bytes = sum(p.stat().st_size for p in ARCHIVE_DIR.glob("*.npz"))
+        else:
+            self._archive_bytes += target.stat().st_size
+        if self._archive_bytes <= max_bytes:
+            return
+        # Lap ids start with their millisecond timestamp: name order is age order
+        for path in sorted(ARCHIVE_DIR.glob("*.npz")):
+            if self._archive_bytes <= max_bytes:
+                break
+            size = path.stat().st_size
+            path.unlink()
+            self._archive_bytes -= size
+
+    def _remember(self, lap_id, lap):
+        with self._lock:
+            self._cache[lap_id] = lap
+            self._cache.move_to_end(lap_id)
+            while len(self._cache) > self.max_cached_laps:
+                self._cache.popitem(last=False)
+
+
+class LapRecorder:
+    """
+    Buffers live frames of the current lap and hands the finished lap,
+    resampled onto the distance grid, to a callback.
+
+    Line crossings come from the session state machine (LAP_COMPLETE),
+    so frames are only appended here.
+    """
+
+    def __init__(self, on_lap_complete):
+        self.on_lap_complete = on_lap_complete
+        self._pct = np.zeros(MAX_LAP_SAMPLES)
+        self._data = {name: np.zeros(MAX_LAP_SAMPLES) for name in CHANNELS}
+        self._count = 0
+        self._lap_start = None
+
+    def reset(self):
+        self._count = 0
+        self._lap_start = None
+
+    def add_frame(self, data):
+        pct = data.get("lap_dist_pct")
+        t = data.get("timestamp")
+        if pct is None or t is None:
+            return
+        if self._lap_start is None:
+            self._lap_start = t
+
+        i = self._count
+        if i >= MAX_LAP_SAMPLES:
+            return
+        self._pct[i] = pct
+        self._data["time"][i] = t - self._lap_start
+        self._data["speed"][i] = data.get("speed", 0.0)
+        self._data["throttle"][i] = data.get("throttle", 0.0)
+        self._data["brake"][i] = data.get("brake", 0.0)
+        self._data["steering"][i] = data.get("steering_angle", 0.0)
+        self._count = i + 1
+
+    def on_lap_event(self, event):
+        """
+        LAP_COMPLETE handler: closes the buffered lap and starts the next one
+        at the crossing frame.
+        """
+        if event.get("lap_time") is not None:
+            self._finish_lap(event)
+        self._count = 0
+        self._lap_start = event["timestamp"]
+
+    def _finish_lap(self, event):
+        n = self._count
+        # Out-laps and joins mid-lap don't cover the full distance
+        if n < 10 or self._pct[0] > 0.05 or self._pct[n - 1] < 0.95:
+            return
+
+        lap_time = event["lap_time"]
+        samples = {name: self._data[name][:n] for name in CHANNELS}
+        # Close the lap at the line so the time channel ends at the lap time
+        lap = resample_lap(
+            np.append(self._pct[:n], 1.0),
+            {name: np.append(values, lap_time if name == "time" else values[-1]) for name, values in samples.items()},
+        )
+        # Copies: the recorder buffers are reused for the next lap
+        lap["raw"] = {name: values.copy() for name, values in samples.items()}
+        lap["raw"]["lap_dist_pct"] = self._pct[:n].copy()
+        try:
+            self.on_lap_complete({
+                "time": lap_time,
+                "valid": event.get("valid", True),
+                "track": event.get("track", "Unknown"),
+                "car": event.get("car", "Unknown"),
+                "timestamp": time.time()
+            }, lap)
+        except Exception as e:
+            logger.error(f"Lap Store Error: {e}")
+
+
+lap_store = LapStore()
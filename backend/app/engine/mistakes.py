@@ -0,0 +1,208 @@
+import numpy as np
+from loguru import logger
+
+from app.engine.lap_store import GRID_POINTS
+from app.engine.corners import BRAKE_THRESHOLD, MIN_CORNER_POINTS, MERGE_GAP_POINTS
+from app.engine.track_cache import track_cache
+
+# Detection thresholds
+LOCKUP_SLIP = -0.25        # Wheel surface speed this far below ground speed = locked
+LOCKUP_MIN_SPEED = 5.0     # m/s, below this slip ratios are noise
+OVERSTEER_THROTTLE = 0.5
+OVERSTEER_YAW_RATE = 0.3   # rad/s of rotation while countersteering
+EARLY_BRAKE_POINTS = GRID_POINTS // 250   # 0.4% of a lap before the reference brake point
+APEX_TOLERANCE_POINTS = MIN_CORNER_POINTS * 2
+MIN_EVENT_FRAMES = 3       # Frames a signature must last to count
+REPORT_MISTAKES = 3
+
+# Fixed-size state per corner, reset at the start of every lap
+STATE_DTYPE = np.dtype([
+    ("brake_onset", np.int32),       # First grid index with brake in the corner zone, -1 if none
+    ("min_speed", np.float32),
+    ("min_speed_at", np.int32),
+    ("lockup_frames", np.int32),
+    ("oversteer_frames", np.int32),
+    ("delta_in", np.float32),        # Live delta when entering the zone
+    ("delta_out", np.float32),
+    ("entered", np.bool_),
+    ("done", np.bool_),
+])
+
+FEEDBACK = {
+    "Brake Lockup": "Locked a wheel on the brakes. Ease off the initial pressure.",
+    "Throttle Oversteer": "Rear stepped out on power. Feed the throttle in more gently.",
+    "Early Apex": "Turned in too early and missed the apex. Wait a little longer.",
+    "Late Apex": "Apex was too late. Turn in a touch earlier.",
+    "Early Braking": "Braked earlier than the reference. Try braking later."
+}
+
+
+def lmu_lockup(wheels):
+    """True when any LMU wheel (LMUWheel) spins much slower than the ground under it."""
+    for wheel in wheels:
+        ground = abs(wheel.mLongitudinalGroundVel)
+        if ground < LOCKUP_MIN_SPEED:
+            continue
+        radius = wheel.mStaticUndeflectedRadius / 100.0 - wheel.mVerticalTireDeflection
+        if radius > 0 and (abs(wheel.mRotation) * radius - ground) / ground < LOCKUP_SLIP:
+            return True
+    return False
+
+
+class MistakeDetector:
+    """
+    Online per-corner mistake detection against the reference lap.
+
+    The reference corners (app.engine.corners) are turned into a grid
+    lookup when the reference changes; each frame then touches one state
+    row, so the cost per frame is constant and the detector is always on.
+    A corner is evaluated when the car leaves it, and the findings of the
+    lap are handed over on LAP_COMPLETE.
+    """
+
+    def __init__(self):
+        self.track = None
+        self.car = None
+        self.has_reference = False
+        self._corners = None
+        # Grid index -> corner zone (braking lookback to corner end), -1 outside
+        self._zone_at = [-1] * GRID_POINTS
+        self._state = np.zeros(0, dtype=STATE_DTYPE)
+        self._findings = []
+        self._current = -1
+        # Live delta of the latest frame: the delta at the line when LAP_COMPLETE
+        # fires (session events run before this frame's update)
+        self._delta = 0.0
+        self.last_lap = []
+
+    def set_session(self, track, car):
+        if track == self.track and car == self.car:
+            return
+        self.track = track
+        self.car = car
+        self.has_reference = False
+        self._corners = None
+        self._zone_at = [-1] * GRID_POINTS
+        self._state = np.zeros(0, dtype=STATE_DTYPE)
+        self._delta = 0.0
+        self.last_lap = []
+        self._reset_lap()
+        self._poll_reference()
+
+    def _poll_reference(self):
+        artifacts = track_cache.peek(self.track, self.car)
+        if artifacts is None or len(artifacts["corners"]) == 0:
+            return
+        if self._corners is artifacts["corners"]:
+            return
+        corners = artifacts["corners"]
+        self._corners = corners
+        self._ref_apex = corners["apex"].tolist()
+        self._ref_brake = corners["brake_point"].tolist()
+        self._direction = corners["direction"].tolist()
+
+        zone_at = [-1] * GRID_POINTS
+        lookback = MERGE_GAP_POINTS * 3
+        for i, corner in enumerate(corners):
+            for g in range(max(0, int(corner["start"]) - lookback), int(corner["end"]) + 1):
+                zone_at[g] = i
+        self._zone_at = zone_at
+        self._state = np.zeros(len(corners), dtype=STATE_DTYPE)
+        self.has_reference = True
+        self._reset_lap()
+        logger.info(f"Mistake detector: {len(corners)} corners for {self.track} / {self.car}")
+
+    def _reset_lap(self):
+        self._state[:] = 0
+        self._state["brake_onset"] = -1
+        self._state["min_speed"] = np.inf
+        self._findings = []
+        self._current = -1
+
+    def update(self, lap_dist_pct, speed, throttle, brake, steering, delta=0.0, lockup=False, yaw_rate=None):
+        """
+        Per-frame update (O(1)).
+
+        Args:
+            lockup (bool): Wheel lockup signature from the sim (see lmu_lockup), False if unknown.
+            yaw_rate (float): rad/s, None if the sim doesn't provide it.
+        """
+        self._delta = delta
+        if not self.has_reference:
+            return
+        g = min(int(lap_dist_pct * GRID_POINTS), GRID_POINTS - 1)
+        c = self._zone_at[g]
+
+        # Left the previous corner: evaluate it once
+        if c != self._current:
+            if self._current >= 0:
+                self._finish_corner(self._current, delta)
+            self._current = c
+            if c >= 0:
+                row = self._state[c]
+                if not row["entered"]:
+                    row["entered"] = True
+                    row["delta_in"] = delta
+        if c < 0:
+            return
+
+        row = self._state[c]
+        if brake > BRAKE_THRESHOLD and row["brake_onset"] < 0:
+            row["brake_onset"] = g
+        if abs(g - self._ref_apex[c]) <= APEX_TOLERANCE_POINTS * 2 and speed < row["min_speed"]:
+            row["min_speed"] = speed
+            row["min_speed_at"] = g
+        if lockup and brake > BRAKE_THRESHOLD:
+            row["lockup_frames"] += 1
+        # Throttle-on oversteer: rotating while the driver countersteers against the corner
+        if yaw_rate is not None and throttle > OVERSTEER_THROTTLE and abs(yaw_rate) > OVERSTEER_YAW_RATE \
+                and steering * self._direction[c] < 0:
+            row["oversteer_frames"] += 1
+
+    def _finish_corner(self, c, delta):
+        row = self._state[c]
+        if row["done"] or not row["entered"]:
+            return
+        row["done"] = True
+        row["delta_out"] = delta
+        time_lost = round(max(0.0, float(row["delta_out"] - row["delta_in"])), 2)
+
+        found = []
+        if row["lockup_frames"] >= MIN_EVENT_FRAMES:
+            found.append("Brake Lockup")
+        if row["oversteer_frames"] >= MIN_EVENT_FRAMES:
+            found.append("Throttle Oversteer")
+        ref_brake = self._ref_brake[c]
+        if ref_brake >= 0 and 0 <= row["brake_onset"] < ref_brake - EARLY_BRAKE_POINTS:
+            found.append("Early Braking")
+        if np.isfinite(row["min_speed"]):
+            offset = int(row["min_speed_at"]) - self._ref_apex[c]
+            if offset < -APEX_TOLERANCE_POINTS:
+                found.append("Early Apex")
+            elif offset > APEX_TOLERANCE_POINTS:
+                found.append("Late Apex")
+
+        for kind in found:
+            self._findings.append({
+                "corner": f"T{c + 1}",
+                "type": kind,
+                "feedback": FEEDBACK[kind],
+                "time_lost": time_lost
+            })
+
+    def on_lap_event(self, event):
+        """
+        LAP_COMPLETE handler: closes the last corner with the delta at the
+        line, publishes the lap's findings as last_lap (worst first) and
+        starts the next lap.
+        """
+        if self._current >= 0:
+            self._finish_corner(self._current, self._delta)
+        findings = sorted(self._findings, key=lambda f: f["time_lost"], reverse=True)
+        self.last_lap = findings[:REPORT_MISTAKES]
+        # A new reference (e.g. this lap became the best) applies from the next lap
+        self._poll_reference()
+        self._reset_lap()
+
+
+mistake_detector = MistakeDetector()
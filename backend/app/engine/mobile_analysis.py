@@ -0,0 +1,188 @@
+import hashlib
+import json
+from datetime import datetime
+
+import numpy as np
+from loguru import logger
+
+from app.engine.track_map import local_xy, build_track_map
+
+GATE_RADIUS = 20.0          # m, a pass within this of the start/finish point is a crossing
+MIN_LAP_SPAN = 150.0        # m, the car must get this far from the line between crossings
+MIN_LAP_TIME = 20.0         # s
+MOVING_SPEED = 5.0          # First sample above this speed is the start/finish line
+BRAKE_ON = 0.1
+MIN_BRAKE_SAMPLES = 3
+BRAKE_MATCH = 40.0          # m along the track within which zones of two laps are the same corner
+BRAKE_EARLY = 15.0          # m earlier than the best lap counts as early braking
+MAX_FEEDBACK = 3
+
+
+def _runs(mask):
+    # (starts, ends) of True runs, ends exclusive
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def split_laps(columns):
+    """
+    Start/finish crossings from GPS: the line is where the car first moves,
+    a crossing is the closest approach of each pass through a gate around it.
+
+    Returns:
+        list: (start, end) sample indices of every complete lap.
+    """
+    speed, t = columns["speed"], columns["time"]
+    moving = np.flatnonzero(speed > MOVING_SPEED)
+    if len(moving) == 0:
+        return []
+    x, y = local_xy(columns["lat"], columns["lon"])
+    dist = np.hypot(x - x[moving[0]], y - y[moving[0]])
+
+    starts, ends = _runs(dist < GATE_RADIUS)
+    crossings = [s + int(np.argmin(dist[s:e])) for s, e in zip(starts, ends) if e > moving[0]]
+    laps = []
+    for a, b in zip(crossings[:-1], crossings[1:]):
+        if dist[a:b].max() >= MIN_LAP_SPAN and t[b] - t[a] >= MIN_LAP_TIME:
+            laps.append((a, b))
+    return laps
+
+
+def _braking_zones(columns, start, end, track_map):
+    # Zones are placed on the fused track map, so every lap's zones share one distance axis
+    starts, ends = _runs(columns["brake"][start:end] > BRAKE_ON)
+    keep = (ends - starts) >= MIN_BRAKE_SAMPLES
+    zones = []
+    for s, e in zip(starts[keep] + start, ends[keep] + start):
+        position = track_map.locate(columns["lat"][s], columns["lon"][s])
+        if position is None:
+            continue
+        zones.append({
+            "at": round(position[1], 4),
+            "distance": round(position[0], 1),
+            "entry_speed": round(float(columns["speed"][s]), 1),
+            "min_speed": round(float(columns["speed"][s:e].min()), 1)
+        })
+    return zones
+
+
+def _lap_stats(columns, x, y, start, end, track_map):
+    step = np.hypot(np.diff(x[start:end + 1]), np.diff(y[start:end + 1]))
+    throttle, brake = columns["throttle"][start:end], columns["brake"][start:end]
+    return {
+        "lap_time": round(float(columns["time"][end] - columns["time"][start]), 3),
+        "distance_m": round(float(step.sum()), 1),
+        "max_speed": round(float(columns["speed"][start:end].max()), 1),
+        # Share of the lap on both pedals
+        "overlap": round(float(np.mean((throttle > BRAKE_ON) & (brake > BRAKE_ON))), 4),
+        "braking_zones": _braking_zones(columns, start, end, track_map)
+    }
+
+
+def _braking_feedback(lap, best, length):
+    """
+    Braking zones of a lap vs the same zones of the best lap, matched by track
+    distance around the lap (length: track map length in m), so a zone just
+    before the line matches the same zone just after it.
+    """
+    if not best["braking_zones"]:
+        return []
+    ref_distance = np.array([zone["distance"] for zone in best["braking_zones"]])
+    feedback = []
+    for zone in lap["braking_zones"]:
+        # Signed circular difference in (-length / 2, length / 2]: positive = braked before the best lap
+        ahead = ref_distance - zone["distance"]
+        if length > 0:
+            ahead = (ahead + length / 2) % length - length / 2
+        i = int(np.argmin(np.abs(ahead)))
+        ref = best["braking_zones"][i]
+        early = float(ahead[i])
+        if abs(early) > BRAKE_MATCH:
+            continue
+        if early > BRAKE_EARLY:
+            feedback.append((early, f"Braking zone {i + 1}: braking {early:.0f} m earlier than your best lap"))
+        elif zone["min_speed"] < ref["min_speed"] - 5:
+            feedback.append((ref["min_speed"] - zone["min_speed"],
+                             f"Braking zone {i + 1}: scrubbing too much speed ({zone['min_speed']:.0f} vs {ref['min_speed']:.0f})"))
+    return [text for _, text in sorted(feedback, reverse=True)]
+
+
+def analyze(columns):
+    """
+    Mobile session analysis: laps from start/finish crossings, a track map
+    fused from them, a score per lap (pace vs the session best, pedal
+    overlap) and braking feedback vs the best lap.
+
+    Args:
+        columns (dict): Channel arrays as stored by app.engine.mobile_sync.
+
+    Returns:
+        dict: score, feedback, best_lap, laps, track_map.
+    """
+    if len(columns["time"]) < 2:
+        return {"score": None, "feedback": ["Not enough data"], "best_lap": None, "laps": [], "track_map": None}
+
+    bounds = split_laps(columns)
+    track_map = build_track_map(columns, bounds)
+    if track_map is None:
+        return {"score": None, "feedback": ["No complete lap detected"], "best_lap": None, "laps": [], "track_map": None}
+    x, y = local_xy(columns["lat"], columns["lon"])
+    laps = [_lap_stats(columns, x, y, a, b, track_map) for a, b in bounds]
+
+    best_index = int(np.argmin([lap["lap_time"] for lap in laps]))
+    best = laps[best_index]
+    for n, lap in enumerate(laps, 1):
+        lap["lap"] = n
+        # 1 point per 0.1% off the session best, 1 point per 1% of the lap on both pedals
+        off_pace = (lap["lap_time"] / best["lap_time"] - 1) * 1000
+        lap["score"] = int(max(0, min(100, round(100 - off_pace - lap["overlap"] * 100))))
+        lap["feedback"] = _braking_feedback(lap, best, track_map.length) if lap is not best else []
+
+    # Session feedback: the most frequent lap remarks
+    counts = {}
+    for lap in laps:
+        for text in lap["feedback"]:
+            counts[text] = counts.get(text, 0) + 1
+    feedback = sorted(counts, key=counts.get, reverse=True)[:MAX_FEEDBACK]
+    if not feedback:
+        feedback = ["Consistent braking: no zone stands out against your best lap"]
+    return {
+        "score": int(round(np.mean([lap["score"] for lap in laps]))),
+        "feedback": feedback,
+        "best_lap": {"lap": best["lap"], "lap_time": best["lap_time"]},
+        "laps": laps,
+        "track_map": {"length_m": round(track_map.length, 1), "points": track_map.to_latlon()}
+    }
+
+
+def run_session_analysis(session_id, points=None):
+    """
+    Loads a synced session, analyzes it and stores the result (job entry
+    point, runs in the analysis worker pool).
+
+    Args:
+        points (int): Synced points when the job was queued. Part of the job
+            key, so a session that received more chunks is analysed again.
+
+    Returns:
+        str: The stored result's ETag, or None if chunks arrived meanwhile
+        (the job they queued stores the result).
+    """
+    from sqlmodel import Session
+    from app.core.database import engine
+    from app.engine.mobile_sync import load_session, synced_points
+    from app.engine.models.mobile import MobileAnalysis
+
+    with Session(engine) as db:
+        columns = load_session(db, session_id)
+        result = analyze(columns)
+        if synced_points(db, session_id) != len(columns["time"]):
+            logger.info(f"Mobile analysis of {session_id} superseded by new chunks")
+            return None
+        result = dict(result, session_id=session_id, computed_at=datetime.utcnow().isoformat())
+        body = json.dumps(result, separators=(",", ":"))
+        etag = hashlib.sha1(body.encode()).hexdigest()
+        db.merge(MobileAnalysis(session_id=session_id, etag=etag, result=body))
+        db.commit()
+    logger.info(f"Mobile analysis stored: {session_id} ({len(result['laps'])} laps)")
+    return etag
@@ -0,0 +1,260 @@
+import base64
+import binascii
+import zlib
+from operator import itemgetter
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import delete, select
+
+from app.engine.models.mobile import MobileAnalysis, MobileSyncChunk, MobileSample
+
+# Per-point channels of a phone upload, in storage order
+CHANNELS = ("time", "speed", "throttle", "brake", "gear", "rpm", "lat", "lon")
+INT_CHANNELS = ("gear", "rpm")
+MAX_CHUNK_POINTS = 100_000
+
+# Inclusive value ranges per channel (None = unbounded)
+RANGES = {
+    "speed": (0.0, None),
+    "throttle": (0.0, 1.0),
+    "brake": (0.0, 1.0),
+    "gear": (-1, 20),
+    "rpm": (0, None),
+    "lat": (-90.0, 90.0),
+    "lon": (-180.0, 180.0),
+}
+
+# Columnar wire format: schema version -> fixed-point scale per channel.
+# Every channel travels as little-endian int32 (value / scale), optionally
+# delta-encoded along the session and zlib-compressed, base64 in the JSON body.
+COLUMNAR_SCHEMAS = {
+    1: {
+        "time": 1e-3,       # ms
+        "speed": 1e-2,
+        "throttle": 1e-3,
+        "brake": 1e-3,
+        "gear": 1.0,
+        "rpm": 1.0,
+        "lat": 1e-7,        # ~1 cm
+        "lon": 1e-7,
+    },
+}
+COLUMNAR_SCHEMA_VERSION = max(COLUMNAR_SCHEMAS)
+COMPRESSIONS = ("none", "zlib")
+WIRE_DTYPE = np.dtype("<i4")
+
+# Samples go through the DB-API executemany directly: ORM/Core bulk paths
+# build per-row parameter dicts and are several times slower for 36k rows
+SAMPLE_COLUMNS = ("session_id", "seq") + CHANNELS
+INSERT_SAMPLES = (
+    f"INSERT INTO {MobileSample.__tablename__} ({', '.join(SAMPLE_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(SAMPLE_COLUMNS))})"
+)
+
+
+class SyncError(ValueError):
+    """Upload rejected as a whole (bad shape or out-of-range values)."""
+
+
+def columns_from_points(points):
+    """
+    Row-oriented JSON points (list of dicts) -> one float64 array per channel.
+
+    A single pass pulls every channel out of a point; all type and range
+    checks then run over whole columns (validate_columns).
+    """
+    if len(points) > MAX_CHUNK_POINTS:
+        raise SyncError(f"chunk too large ({len(points)} > {MAX_CHUNK_POINTS} points)")
+    if not points:
+        return {name: np.empty(0) for name in CHANNELS}
+    get = itemgetter(*CHANNELS)
+    try:
+        table = np.array([get(point) for point in points], dtype=np.float64)
+    except KeyError as e:
+        raise SyncError(f"missing channel {e}")
+    except (TypeError, ValueError):
+        raise SyncError("non-numeric channel value")
+    return {name: table[:, i] for i, name in enumerate(CHANNELS)}
+
+
+def _schema(version):
+    if version not in COLUMNAR_SCHEMAS:
+        raise SyncError(f"unsupported schema version {version}")
+    return COLUMNAR_SCHEMAS[version]
+
+
+def decode_columnar(columns, points, schema_version=COLUMNAR_SCHEMA_VERSION, delta=True, compression="zlib"):
+    """
+    Columnar payload -> one float64 array per channel (no per-point objects).
+
+    Args:
+        columns (dict): Channel -> base64 of the encoded int32 column.
+        points (int): Declared number of points (every column must match).
+
+    Raises:
+        SyncError: Unknown schema/compression, missing channel or bad column data.
+    """
+    scales = _schema(schema_version)
+    if compression not in COMPRESSIONS:
+        raise SyncError(f"unsupported compression {compression}")
+    if not 0 <= points <= MAX_CHUNK_POINTS:
+        raise SyncError(f"invalid point count {points}")
+    size = points * WIRE_DTYPE.itemsize
+
+    decoded = {}
+    for name, scale in scales.items():
+        if name not in columns:
+            raise SyncError(f"missing channel '{name}'")
+        try:
+            raw = base64.b64decode(columns[name], validate=True)
+            if compression == "zlib":
+                # Bounded: a column can never inflate past its declared size
+                inflater = zlib.decompressobj()
+                raw = inflater.decompress(raw, size + 1)
+        except (binascii.Error, zlib.error, TypeError):
+            raise SyncError(f"undecodable channel '{name}'")
+        if len(raw) != size:
+            raise SyncError(f"channel '{name}' does not hold {points} points")
+        values = np.frombuffer(raw, dtype=WIRE_DTYPE)
+        if delta:
+            values = np.cumsum(values, dtype=np.int64)
+        decoded[name] = values * scale
+    return decoded
+
+
+def encode_columnar(columns, schema_version=COLUMNAR_SCHEMA_VERSION, delta=True, compression="zlib"):
+    """
+    Inverse of decode_columnar (reference encoder for clients and benchmarks).
+
+    Returns:
+        dict: Channel -> base64 string.
+    """
+    scales = _schema(schema_version)
+    encoded = {}
+    for name, scale in scales.items():
+        values = np.round(np.asarray(columns[name], dtype=np.float64) / scale).astype(np.int64)
+        if delta:
+            values = np.diff(values, prepend=0)
+        if len(values) and (values.min() < np.iinfo(WIRE_DTYPE).min or values.max() > np.iinfo(WIRE_DTYPE).max):
+            raise ValueError(f"{name} does not fit the wire format")
+        raw = values.astype(WIRE_DTYPE).tobytes()
+        if compression == "zlib":
+            raw = zlib.compress(raw)
+        encoded[name] = base64.b64encode(raw).decode("ascii")
+    return encoded
+
+
+def validate_columns(columns):
+    """
+    Vectorized validation of a chunk's columns.
+
+    Raises:
+        SyncError: On the first failing check (with the offending channel and index).
+    """
+    lengths = {len(columns[name]) for name in CHANNELS}
+    if len(lengths) != 1:
+        raise SyncError("channels have different lengths")
+
+    for name in CHANNELS:
+        values = columns[name]
+        bad = ~np.isfinite(values)
+        lo_hi = RANGES.get(name)
+        if lo_hi is not None:
+            lo, hi = lo_hi
+            if lo is not None:
+                bad |= values < lo
+            if hi is not None:
+                bad |= values > hi
+        if name in INT_CHANNELS:
+            bad |= values != np.round(values)
+        if bad.any():
+            raise SyncError(f"invalid {name} at index {int(np.argmax(bad))}")
+
+    if np.any(np.diff(columns["time"]) < 0):
+        raise SyncError("time is not monotonic")
+
+
+def store_chunk(db, session_id, user_id, seq, columns, final=False):
+    """
+    Stores one validated chunk: the chunk record and all its samples in a
+    single transaction (one executemany for the samples). A stored analysis
+    of the session is dropped in the same transaction: it misses this chunk.
+
+    Returns:
+        bool: False if this (session_id, seq) was already stored (re-send).
+    """
+    existing = db.exec(
+        select(MobileSyncChunk.id).where(MobileSyncChunk.session_id == session_id, MobileSyncChunk.seq == seq)
+    ).first()
+    if existing is not None:
+        return False
+
+    n = len(columns["time"])
+    values = [columns[name].astype(np.int64 if name in INT_CHANNELS else np.float64).tolist() for name in CHANNELS]
+    try:
+        db.add(MobileSyncChunk(session_id=session_id, user_id=user_id, seq=seq, points=n, final=final))
+        db.flush()
+        if n:
+            rows = zip([session_id] * n, [seq] * n, *values)
+            db.connection().exec_driver_sql(INSERT_SAMPLES, list(rows))
+        db.exec(delete(MobileAnalysis).where(MobileAnalysis.session_id == session_id))
+        db.commit()
+    except IntegrityError:
+        # Concurrent re-send of the same chunk won the unique constraint
+        db.rollback()
+        return False
+    logger.info(f"Mobile sync: {session_id} chunk {seq}, {n} points")
+    return True
+
+
+def session_complete(db, session_id):
+    """
+    True once the highest chunk is final and every chunk before it is stored
+    (any arrival order). Clients that never send final=false complete the
+    session after each chunk; a later chunk reopens it.
+    """
+    chunks = db.exec(
+        select(MobileSyncChunk.seq, MobileSyncChunk.final).where(MobileSyncChunk.session_id == session_id)
+    ).all()
+    if not chunks:
+        return False
+    last_seq, last_final = max(chunks)
+    return bool(last_final) and len(chunks) == last_seq + 1
+
+
+def synced_points(db, session_id):
+    """Number of samples stored for a session."""
+    total = db.exec(select(func.sum(MobileSyncChunk.points)).where(MobileSyncChunk.session_id == session_id)).one()
+    return int(total or 0)
+
+
+def ingest(db, session_id, user_id, seq, columns, final=False):
+    """
+    Validates and stores one upload chunk.
+
+    Returns:
+        dict: status ("success" or "duplicate"), synced_points, seq,
+        complete (all chunks of the session are stored).
+    """
+    validate_columns(columns)
+    stored = store_chunk(db, session_id, user_id, seq, columns, final)
+    return {
+        "status": "success" if stored else "duplicate",
+        "synced_points": len(columns["time"]) if stored else 0,
+        "seq": seq,
+        "complete": session_complete(db, session_id)
+    }
+
+
+def load_session(db, session_id):
+    """All stored samples of a mobile session as columns, ordered by chunk and time."""
+    rows = db.exec(
+        select(*(getattr(MobileSample, name) for name in CHANNELS))
+        .where(MobileSample.session_id == session_id)
+        .order_by(MobileSample.seq, MobileSample.id)
+    ).all()
+    table = np.array(rows, dtype=np.float64).reshape(-1, len(CHANNELS))
+    return {name: table[:, i] for i, name in enumerate(CHANNELS)}
@@ -0,0 +1,38 @@
+from typing import Optional
+from sqlmodel import Field, SQLModel, UniqueConstraint
+from datetime import datetime
+
+# --- MOBILE SYNC MODELS ---
+
+class MobileSyncChunk(SQLModel, table=True):
+    """One accepted upload chunk; (session_id, seq) makes re-sends idempotent."""
+    __table_args__ = (UniqueConstraint("session_id", "seq"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    session_id: str = Field(index=True)
+    user_id: str
+    seq: int
+    points: int
+    # Last chunk of the session (seq of the final chunk + 1 = chunk count)
+    final: bool = False
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+
+class MobileSample(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    session_id: str = Field(index=True)
+    seq: int
+    time: float
+    speed: float
+    throttle: float
+    brake: float
+    gear: int
+    rpm: int
+    lat: float
+    lon: float
+
+class MobileAnalysis(SQLModel, table=True):
+    """Stored result of the post-sync analysis, served as-is (JSON body + ETag)."""
+    session_id: str = Field(primary_key=True)
+    etag: str
+    result: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,103 @@
+import numpy as np
+
+RELATIVE_CARS = 4       # Cars shown ahead and behind the player
+
+# Colors for classes without one from the sim (assigned in order of appearance)
+CLASS_PALETTE = ["#ffffff", "#f59e0b", "#3b82f6", "#ef4444", "#22c55e", "#a855f7", "#ec4899", "#14b8a6"]
+
+
+class RelativeTable:
+    """
+    The relative: +-N cars around the player by track position, with the
+    on-track time gap, class color and lapped/lapping flags.
+
+    Built from a scoring snapshot (see app.engine.scoring) only when the
+    scoring data changes; frames just attach the cached rows.
+    """
+
+    def __init__(self, n=RELATIVE_CARS):
+        self.n = n
+        self.drivers = []
+        self._class_colors = {}
+
+    def reset(self):
+        self.drivers = []
+        self._class_colors = {}
+
+    def class_color(self, vclass):
+        color = self._class_colors.get(vclass)
+        if color is None:
+            color = CLASS_PALETTE[len(self._class_colors) % len(CLASS_PALETTE)]
+            self._class_colors[vclass] = color
+        return color
+
+    def update(self, cars):
+        """
+        Rebuilds the table.
+
+        Args:
+            cars (dict): Scoring snapshot. Uses id, name, vclass, laps, lap_dist_pct,
+                place, in_pits, is_player, est_lap, best_lap and the optional
+                class_color, irating and license arrays.
+
+        Returns:
+            list: Rows from furthest ahead to furthest behind, the player included
+            (gap > 0 = ahead on track, seconds).
+        """
+        player = np.flatnonzero(cars["is_player"])
+        if len(player) == 0:
+            self.drivers = []
+            return self.drivers
+        p = int(player[0])
+        pct = cars["lap_dist_pct"]
+        on_track = pct >= 0
+
+        # Track position relative to the player in [-0.5, 0.5) laps
+        rel = (pct - pct[p] + 0.5) % 1.0 - 0.5
+        # Race distance decides lapped/lapping
+        race = (cars["laps"] + pct) - (cars["laps"][p] + pct[p])
+
+        # On-track gap: distance at the player's lap pace (monotonic in track position,
+        # so rows never swap order between classes of different pace)
+        lap_time = cars["est_lap"][p]
+        if not lap_time > 0:
+            lap_time = cars["best_lap"][p] if cars["best_lap"][p] > 0 else 100.0
+        gap = rel * lap_time
+
+        candidates = np.flatnonzero(on_track & (np.arange(len(pct)) != p))
+        order = candidates[np.argsort(rel[candidates])]
+        behind = order[rel[order] < 0][-self.n:]
+        ahead = order[rel[order] >= 0][:self.n]
+        rows = list(ahead[::-1]) + [p] + list(behind[::-1])
+
+        colors = cars.get("class_color")
+        irating = cars.get("irating")
+        license_ = cars.get("license")
+        self.drivers = [
+            {
+                "pos": f"P{int(cars['place'][i])}",
+                "car_idx": int(cars["id"][i]),
+                "name": _text(cars["name"][i]),
+                "gap": 0.0 if i == p else round(float(gap[i]), 2),
+                "ir": _irating(irating[i]) if irating is not None else None,
+                "sr": _text(license_[i]) if license_ is not None else None,
+                "class_color": _text(colors[i]) if colors is not None else self.class_color(_text(cars["vclass"][i])),
+                "is_lapped": bool(race[i] < -0.5),
+                "is_lapping": bool(race[i] > 0.5),
+                "in_pits": bool(cars["in_pits"][i]),
+                "is_player": i == p
+            }
+            for i in rows
+        ]
+        return self.drivers
+
+
+def _text(value):
+    return value.decode(errors="ignore") if isinstance(value, bytes) else str(value)
+
+
+def _irating(value):
+    return f"{value / 1000:.1f}k" if value > 0 else None
+
+
+relative_table = RelativeTable()
@@ -0,0 +1,356 @@
+import ctypes
+
+import numpy as np
+
+from app.engine.strategy import strategy_engine
+
+try:
+    from app.engine.lmu import LMUConstants
+    from app.engine.lmu.lmu_data import LMUVehicleScoring
+    LMU_AVAILABLE = True
+except ImportError:
+    LMU_AVAILABLE = False
+
+MAX_CARS = 128          # Car slots tracked by the gap engine (LMU maps up to 104)
+MAP_BINS = 512          # Distance-to-time map resolution per lap
+PIT_LOSS_DEFAULT = 22.0 # Seconds, until a pit stop has been observed
+PIT_LOSS_ALPHA = 0.3    # Weight of a new observation in the pit loss estimate
+IRACING_CARS = 64       # Length of iRacing's CarIdx arrays
+SCORING_INTERVAL = 0.2  # Seconds between iRacing scoring snapshots (it has no scoring event)
+
+
+# --- SCORING SNAPSHOTS ---
+# Every source is reduced to the same per-car arrays so the gap engine and
+# the relative table don't care where the data came from.
+
+# Fields read from LMU's vehScoringInfo, as (numpy format, snapshot name)
+LMU_FIELDS = {
+    "mID": ("<i4", "id"),
+    "mDriverName": ("S32", "name"),
+    "mVehicleClass": ("S32", "vclass"),
+    "mTotalLaps": ("<i2", "laps"),
+    "mLapDist": ("<f8", "lap_dist"),
+    "mBestLapTime": ("<f8", "best_lap"),
+    "mLastLapTime": ("<f8", "last_lap"),
+    "mEstimatedLapTime": ("<f8", "est_lap"),
+    "mNumPitstops": ("<i2", "pitstops"),
+    "mIsPlayer": ("?", "is_player"),
+    "mInPits": ("?", "in_pits"),
+    "mPlace": ("u1", "place"),
+}
+
+_lmu_dtype = None
+if LMU_AVAILABLE:
+    # Only the fields we need, at their ctypes offsets: a zero-copy view of the shared memory
+    _lmu_dtype = np.dtype({
+        "names": list(LMU_FIELDS),
+        "formats": [fmt for fmt, _ in LMU_FIELDS.values()],
+        "offsets": [getattr(LMUVehicleScoring, name).offset for name in LMU_FIELDS],
+        "itemsize": ctypes.sizeof(LMUVehicleScoring)
+    })
+
+
+def read_lmu_scoring(scoring):
+    """
+    Per-car arrays of an LMU scoring update (vectorized read, ~µs).
+
+    Returns:
+        dict: Arrays keyed by snapshot name plus lap_dist_pct and track_length,
+        or None if no car is on track.
+    """
+    n = min(scoring.scoringInfo.mNumVehicles, LMUConstants.MAX_MAPPED_VEHICLES)
+    track_length = scoring.scoringInfo.mLapDist
+    if n <= 0 or track_length <= 0:
+        return None
+    rows = np.frombuffer(scoring.vehScoringInfo, dtype=_lmu_dtype, count=n)
+    # Copy out: the buffer is overwritten on the next update
+    cars = {snapshot: rows[field].copy() for field, (_, snapshot) in LMU_FIELDS.items()}
+    cars["lap_dist_pct"] = np.clip(cars.pop("lap_dist") / track_length, 0.0, 1.0)
+    cars["track_length"] = track_length
+    return cars
+
+
+def read_iracing_drivers(driver_info):
+    """
+    Per-CarIdx driver arrays from the DriverInfo session string. Only needs
+    rebuilding when the session info changes (drivers join/leave).
+    """
+    drivers = {
+        "name": np.zeros(IRACING_CARS, dtype="S32"),
+        "vclass": np.zeros(IRACING_CARS, dtype="S32"),
+        "class_color": np.full(IRACING_CARS, "#ffffff", dtype="U7"),
+        "irating": np.zeros(IRACING_CARS, dtype=np.int32),
+        "license": np.zeros(IRACING_CARS, dtype="S16"),
+        "est_lap": np.zeros(IRACING_CARS),
+        "ignore": np.ones(IRACING_CARS, dtype=bool),
+        "player": driver_info.get("DriverCarIdx", -1)
+    }
+    for d in driver_info.get("Drivers", []):
+        i = d.get("CarIdx", -1)
+        if not 0 <= i < IRACING_CARS:
+            continue
+        drivers["name"][i] = str(d.get("UserName", "")).encode()[:32]
+        drivers["vclass"][i] = str(d.get("CarClassShortName") or d.get("CarClassID", "")).encode()[:32]
+        color = d.get("CarClassColor")
+        if isinstance(color, int) and color > 0:
+            drivers["class_color"][i] = f"#{color:06x}"
+        drivers["irating"][i] = d.get("IRating", 0) or 0
+        drivers["license"][i] = str(d.get("LicString", "")).encode()[:16]
+        drivers["est_lap"][i] = d.get("CarClassEstLapTime", 0.0) or 0.0
+        drivers["ignore"][i] = bool(d.get("CarIsPaceCar")) or bool(d.get("IsSpectator"))
+    return drivers
+
+
+def read_iracing_scoring(ir, drivers):
+    """
+    Scoring snapshot from iRacing's CarIdx arrays (same layout as read_lmu_scoring).
+    """
+    pct = np.asarray(ir["CarIdxLapDistPct"], dtype=np.float64)
+    # Cars not in the world report -1
+    rows = np.flatnonzero((pct >= 0) & ~drivers["ignore"])
+    if len(rows) == 0:
+        return None
+    best = np.asarray(ir["CarIdxBestLapTime"], dtype=np.float64)[rows]
+    est_lap = np.where(best > 0, best, drivers["est_lap"][rows])
+    cars = {
+        "id": rows,
+        "name": drivers["name"][rows],
+        "vclass": drivers["vclass"][rows],
+        "class_color": drivers["class_color"][rows],
+        "irating": drivers["irating"][rows],
+        "license": drivers["license"][rows],
+        "laps": np.maximum(np.asarray(ir["CarIdxLapCompleted"])[rows], 0),
+        "lap_dist_pct": pct[rows],
+        "best_lap": best,
+        "last_lap": np.asarray(ir["CarIdxLastLapTime"], dtype=np.float64)[rows],
+        "est_lap": est_lap,
+        "pitstops": np.zeros(len(rows), dtype=np.int16),
+        "is_player": rows == drivers["player"],
+        "in_pits": np.asarray(ir["CarIdxOnPitRoad"], dtype=bool)[rows],
+        "place": np.asarray(ir["CarIdxPosition"])[rows]
+    }
+    return cars
+
+
+class GapEngine:
+    """
+    Time gaps from the player to every car, from the scoring table.
+
+    Each car keeps a distance-to-time map: the session time at which it last
+    passed each of MAP_BINS points around the lap, in a slot assigned to its
+    id while it is in the scoring table. The gap to a car ahead is
+    how long ago it passed the player's position, the gap to a car behind is
+    how long ago the player passed its position. The maps are only written on
+    scoring updates (a few Hz) and everything is vectorized over the field.
+    """
+
+    def __init__(self, max_cars=MAX_CARS, bins=MAP_BINS):
+        self.max_cars = max_cars
+        self.bins = bins
+        self._pass_time = np.full((max_cars, bins), np.nan)
+        self._slots = {}                                # Car id -> slot
+        self._free = list(range(max_cars - 1, -1, -1))  # Free slots (pop from the end)
+        self._prev_pos = np.full(max_cars, np.nan)      # Total distance in bins at the last update
+        self._pit_entry = np.full(max_cars, np.nan)     # Session time the car entered the pit lane
+        self._pit_entry_pos = np.full(max_cars, np.nan) # Total distance in bins at the pit entry
+        self._prev_in_pits = np.zeros(max_cars, dtype=bool)
+        self._prev_time = None
+        self.pit_loss = PIT_LOSS_DEFAULT
+        self.pit_samples = 0
+        self.result = None
+
+    def reset(self):
+        self._pass_time[:] = np.nan
+        self._slots.clear()
+        self._free = list(range(self.max_cars - 1, -1, -1))
+        self._prev_pos[:] = np.nan
+        self._pit_entry[:] = np.nan
+        self._pit_entry_pos[:] = np.nan
+        self._prev_in_pits[:] = False
+        self._prev_time = None
+        self.result = None
+
+    def update(self, cars, now, laps_remaining=None):
+        """
+        Processes one scoring update.
+
+        Args:
+            cars (dict): Scoring snapshot (see read_lmu_scoring).
+            now (float): Session time of the update (seconds).
+            laps_remaining (int): Race laps left, None if unknown.
+
+        Returns:
+            dict: Gaps ahead/behind, pit loss, rejoin estimate and pit alert.
+        """
+        slot, fresh = self._assign_slots(cars["id"])
+        pos = (cars["laps"] + cars["lap_dist_pct"]) * self.bins
+        lap_time = np.where(cars["est_lap"] > 0, cars["est_lap"], np.where(cars["best_lap"] > 0, cars["best_lap"], np.nan))
+
+        # 1. Slot newly given to a car (joined, or took a leaver's slot): no history yet
+        if len(fresh):
+            self._pass_time[fresh] = np.nan
+            self._prev_pos[fresh] = np.nan
+            self._pit_entry[fresh] = np.nan
+            self._pit_entry_pos[fresh] = np.nan
+            self._prev_in_pits[fresh] = False
+
+        # 2. Distance-to-time maps: stamp every bin crossed since the last update
+        if self._prev_time is not None and now > self._prev_time:
+            self._stamp_crossings(slot, pos, now)
+        self._prev_pos[slot] = pos
+        self._prev_time = now
+
+        # 3. Pit loss from observed pit lane times
+        self._track_pit_stops(slot, cars["in_pits"], pos, lap_time, now)
+
+        player = np.flatnonzero(cars["is_player"])
+        if len(player) == 0:
+            self.result = None
+            return None
+        self.result = self._gaps(cars, slot, pos, lap_time, int(player[0]), now, laps_remaining)
+        return self.result
+
+    def _assign_slots(self, ids):
+        """
+        Slots of the cars in a snapshot. Cars no longer listed free their slot.
+
+        Returns:
+            tuple: (slot per car, slots newly assigned in this update).
+        """
+        ids = ids.tolist()
+        listed = set(ids)
+        for car_id in [car_id for car_id in self._slots if car_id not in listed]:
+            self._free.append(self._slots.pop(car_id))
+        slot = np.empty(len(ids), dtype=np.int64)
+        fresh = []
+        for i, car_id in enumerate(ids):
+            s = self._slots.get(car_id)
+            if s is None:
+                s = self._slots[car_id] = self._free.pop()
+                fresh.append(s)
+            slot[i] = s
+        return slot, np.array(fresh, dtype=np.int64)
+
+    def _stamp_crossings(self, slot, pos, now):
+        prev = self._prev_pos[slot]
+        moved = pos - prev
+        # Skip unknown cars and jumps (teleport to garage, session restart)
+        valid = np.isfinite(prev) & (moved > 0) & (moved < self.bins / 2)
+        first = np.floor(np.where(valid, prev, 0.0)).astype(np.int64) + 1
+        count = np.where(valid, np.floor(np.where(valid, pos, 0.0)).astype(np.int64) - first + 1, 0)
+        total = int(count.sum())
+        if total == 0:
+            return
+        car = np.repeat(np.arange(len(slot)), count)
+        offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+        crossed = first[car] + offset
+        frac = (crossed - prev[car]) / moved[car]
+        self._pass_time[slot[car], crossed % self.bins] = self._prev_time + frac * (now - self._prev_time)
+
+    def _track_pit_stops(self, slot, in_pits, pos, lap_time, now):
+        prev = self._prev_in_pits[slot]
+        entered = in_pits & ~prev
+        exited = ~in_pits & prev
+        self._pit_entry[slot[entered]] = now
+        self._pit_entry_pos[slot[entered]] = pos[entered]
+        if exited.any():
+            rows = slot[exited]
+            lane_times = now - self._pit_entry[rows]
+            # The loss is the lane time minus the car's racing time over the same stretch
+            stretch = (pos[exited] - self._pit_entry_pos[rows]) / self.bins
+            losses = lane_times - stretch * lap_time[exited]
+            # Drive-throughs and garage visits would skew the estimate
+            keep = (lane_times > 5.0) & (lane_times < 120.0) & np.isfinite(losses) & (losses > 0)
+            for loss in losses[keep]:
+                if self.pit_samples == 0:
+                    self.pit_loss = float(loss)
+                else:
+                    self.pit_loss += PIT_LOSS_ALPHA * (float(loss) - self.pit_loss)
+                self.pit_samples += 1
+            self._pit_entry[rows] = np.nan
+            self._pit_entry_pos[rows] = np.nan
+        self._prev_in_pits[slot] = in_pits
+
+    def _pass_times_at(self, rows, where):
+        # Session time each car in `rows` last passed distance `where` (bins, modulo lap)
+        b = np.floor(where).astype(np.int64) % self.bins
+        t0 = self._pass_time[rows, b]
+        t1 = self._pass_time[rows, (b + 1) % self.bins]
+        # Interpolate only within the same pass (the next bin may be a lap older)
+        return np.where(t1 >= t0, t0 + (t1 - t0) * (where - np.floor(where)), t0)
+
+    def _gaps(self, cars, slot, pos, lap_time, p, now, laps_remaining):
+        d = pos - pos[p]
+        ahead = d > 0
+        player_lap = lap_time[p]
+        whole_laps = np.floor(np.abs(d) / self.bins)
+
+        # The trailing car's lap time converts whole laps (and the fallback distance) to time
+        trailing_lap = np.where(ahead, lap_time, player_lap)
+
+        # Ahead: when did they pass our position; behind: when did we pass theirs
+        since = np.empty(len(d))
+        since[ahead] = now - self._pass_times_at(slot[ahead], np.full(ahead.sum(), pos[p]))
+        since[~ahead] = now - self._pass_times_at(np.full((~ahead).sum(), slot[p]), pos[~ahead])
+        # No (or a stale) pass recorded yet: fall back to distance over lap time
+        stale = ~np.isfinite(since) | (since > 1.5 * trailing_lap)
+        since = np.where(stale, (np.abs(d) / self.bins - whole_laps) * trailing_lap, since)
+        gap = since + whole_laps * trailing_lap
+        gap = np.where(ahead, gap, -gap)
+        gap[p] = 0.0
+
+        # Race order by covered distance
+        order = np.argsort(-d, kind="stable")
+        same_class = cars["vclass"] == cars["vclass"][p]
+        deg = np.where((cars["last_lap"] > 0) & (cars["best_lap"] > 0), np.maximum(cars["last_lap"] - cars["best_lap"], 0.0), 0.0)
+
+        def _car(i):
+            return {
+                "id": int(cars["id"][i]),
+                "name": cars["name"][i].decode(errors="ignore"),
+                "vclass": cars["vclass"][i].decode(errors="ignore"),
+                "place": int(cars["place"][i]),
+                "gap": round(float(gap[i]), 3) if np.isfinite(gap[i]) else None,
+                "laps": int(np.sign(d[i]) * whole_laps[i]),
+                "in_pits": bool(cars["in_pits"][i]),
+                "pitstops": int(cars["pitstops"][i])
+            }
+
+        ahead_idx = [i for i in order if d[i] > 0][::-1]   # Nearest first
+        behind_idx = [i for i in order if d[i] < 0]
+
+        # Nearest same-class rivals decide the pit window
+        rival_ahead = next((i for i in ahead_idx if same_class[i]), None)
+        rival_behind = next((i for i in behind_idx if same_class[i]), None)
+        gap_ahead = float(gap[rival_ahead]) if rival_ahead is not None else None
+        gap_behind = float(-gap[rival_behind]) if rival_behind is not None else None
+
+        # Where a stop now would rejoin: cars behind within the pit loss get past
+        passed = [i for i in behind_idx if -gap[i] < self.pit_loss and not cars["in_pits"][i]]
+        rejoin_ahead = passed[-1] if passed else None
+        rejoin_behind = next((i for i in behind_idx if -gap[i] >= self.pit_loss and not cars["in_pits"][i]), None)
+
+        alert = strategy_engine.analyze_pit_window(
+            gap_ahead, gap_behind, laps_remaining,
+            own_deg=float(deg[p]),
+            rival_ahead_deg=float(deg[rival_ahead]) if rival_ahead is not None else 0.0,
+            rival_ahead_pitting=rival_ahead is not None and bool(cars["in_pits"][rival_ahead])
+        )
+
+        return {
+            "ahead": [_car(i) for i in ahead_idx],
+            "behind": [_car(i) for i in behind_idx],
+            "gap_ahead": None if gap_ahead is None else round(gap_ahead, 3),
+            "gap_behind": None if gap_behind is None else round(gap_behind, 3),
+            "pit_loss": round(self.pit_loss, 2),
+            "pit_rejoin": {
+                "cars_lost": len(passed),
+                "gap_ahead": None if rejoin_ahead is None else round(float(self.pit_loss + gap[rejoin_ahead]), 3),
+                "gap_behind": None if rejoin_behind is None else round(float(-gap[rejoin_behind] - self.pit_loss), 3)
+            },
+            "pit_alert": alert,
+            "time": now
+        }
+
+
+gap_engine = GapEngine()
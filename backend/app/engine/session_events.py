@@ -0,0 +1,182 @@
+from loguru import logger
+
+from app.engine.lap_store import NUM_SECTORS
+
+# --- EVENTS ---
+LAP_COMPLETE = "lap_complete"
+SECTOR_COMPLETE = "sector_complete"
+PIT_ENTRY = "pit_entry"
+PIT_EXIT = "pit_exit"
+FLAG_CHANGE = "flag_change"
+SESSION_CHANGE = "session_change"   # payload 'session' is None when the session ends
+CAR_CHANGE = "car_change"
+ALL_EVENTS = "*"
+
+
+class SessionStateMachine:
+    """
+    Turns consecutive frames into session events (lap/sector complete, pit
+    entry/exit, flag, session and car change) and dispatches them to
+    subscribers.
+
+    The per-frame work is a handful of comparisons; everything expensive
+    (storing laps, reports, database writes) lives in subscribers and runs
+    once per event.
+
+    Frames are small dicts built by each source:
+        timestamp, lap_dist_pct, session, track, car, in_pits, flag,
+        and optionally sector (0-based, from the sim), fuel and wear.
+    """
+
+    def __init__(self, num_sectors=NUM_SECTORS):
+        self.num_sectors = num_sectors
+        self._subscribers = {}
+        self.session = None
+        self.car = None
+        self.reset()
+
+    def subscribe(self, event, callback):
+        """Registers callback(event_dict) for an event name (or ALL_EVENTS)."""
+        self._subscribers.setdefault(event, []).append(callback)
+
+    def reset(self):
+        # Lap state only: session/car are kept so a change is still detected
+        self.lap = 0
+        self.in_pits = False
+        self.flag = None
+        self._last_pct = None
+        self._lap_start = None
+        self._lap_in_pits = False      # Lap touched the pit lane (not a clean lap)
+        self._sector = None
+        self._sector_start = None
+
+    def update(self, frame):
+        """
+        Processes one frame.
+
+        Returns:
+            list: Names of the events emitted for this frame.
+        """
+        emitted = []
+        t = frame["timestamp"]
+        pct = frame["lap_dist_pct"]
+
+        # 1. Session / car
+        session = frame.get("session")
+        if session != self.session:
+            previous, self.session = self.session, session
+            self.car = frame.get("car")
+            self.reset()
+            self._emit(SESSION_CHANGE, frame, emitted, previous=previous)
+        elif frame.get("car") != self.car:
+            previous, self.car = self.car, frame.get("car")
+            self.reset()
+            self._emit(CAR_CHANGE, frame, emitted, previous=previous)
+
+        # 2. Pit lane
+        in_pits = bool(frame.get("in_pits"))
+        if in_pits != self.in_pits:
+            self.in_pits = in_pits
+            self._emit(PIT_ENTRY if in_pits else PIT_EXIT, frame, emitted)
+        if in_pits:
+            self._lap_in_pits = True
+
+        # 3. Flag
+        flag = frame.get("flag")
+        if flag != self.flag:
+            previous, self.flag = self.flag, flag
+            if previous is not None:
+                self._emit(FLAG_CHANGE, frame, emitted, previous=previous)
+
+        # 4. Line crossing: distance wraps from ~1.0 back to ~0.0
+        # (the first crossing after a join mid-lap has no lap_time and is never valid)
+        if self._last_pct is not None and self._last_pct - pct > 0.5:
+            timed = self._lap_start is not None
+            if timed:
+                self.lap += 1
+            self._emit(LAP_COMPLETE, frame, emitted, lap=self.lap,
+                       lap_time=round(t - self._lap_start, 3) if timed else None,
+                       valid=timed and not self._lap_in_pits)
+            self._lap_start = t
+            self._lap_in_pits = in_pits
+        self._last_pct = pct
+
+        # 5. Sectors (the sim's when it has them, else equal thirds of the distance)
+        sector = frame.get("sector")
+        if sector is None:
+            sector = min(int(pct * self.num_sectors), self.num_sectors - 1)
+        if sector != self._sector:
+            if self._sector is not None and self._sector_start is not None and sector == (self._sector + 1) % self.num_sectors:
+                self._emit(SECTOR_COMPLETE, frame, emitted,
+                           sector=self._sector, sector_time=round(t - self._sector_start, 3))
+                self._sector_start = t
+            else:
+                # Joined mid-sector or skipped one (reset to pits): time from the next boundary
+                self._sector_start = t if self._sector is not None else None
+            self._sector = sector
+
+        return emitted
+
+    def end(self):
+        """Closes the current session (disconnect/shutdown)."""
+        if self.session is None:
+            return
+        previous, self.session = self.session, None
+        self.car = None
+        self.reset()
+        self._emit(SESSION_CHANGE, {"session": None, "track": None, "car": None}, [], previous=previous)
+
+    def _emit(self, name, frame, emitted, **payload):
+        event = dict(frame, event=name, **payload)
+        emitted.append(name)
+        for callback in self._subscribers.get(name, []) + self._subscribers.get(ALL_EVENTS, []):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Session event {name} handler failed: {e}")
+
+
+# --- FLAGS ---
+# iRacing SessionFlags bits, most important first
+IRACING_FLAGS = (
+    (0x0001, "checkered"),
+    (0x0010, "red"),
+    (0x4000 | 0x8000, "fcy"),     # caution / caution waving
+    (0x0008 | 0x0100, "yellow"),  # yellow / yellow waving
+    (0x0020, "blue"),
+    (0x0002, "white"),
+)
+LMU_PHASE_FLAGS = {6: "fcy", 7: "red", 8: "checkered"}
+LMU_BLUE_FLAG = 6
+
+
+def iracing_flag(session_flags):
+    """Flag shown to the player from the iRacing SessionFlags bitfield."""
+    for mask, name in IRACING_FLAGS:
+        if session_flags & mask:
+            return name
+    return "green"
+
+
+def lmu_flag(game_phase, player_flag, local_yellow):
+    """
+    Flag shown to the player from LMU scoring.
+
+    Args:
+        game_phase (int): scoringInfo.mGamePhase.
+        player_flag (int): Player vehScoringInfo.mFlag (0 = green, 6 = blue).
+        local_yellow (bool): Yellow in the player's sector (mSectorFlag).
+    """
+    flag = LMU_PHASE_FLAGS.get(game_phase)
+    if flag:
+        return flag
+    if local_yellow:
+        return "yellow"
+    if player_flag == LMU_BLUE_FLAG:
+        return "blue"
+    return "green"
+
+
+def lmu_sector(sector):
+    """LMU mSector (0 = sector 3, 1 = sector 1, 2 = sector 2) as a 0-based index."""
+    return (sector + 2) % 3
@@ -0,0 +1,285 @@
+import bisect
+import json
+import math
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+SESSIONS_DIR = Path("data/sessions")
+
+# Recorded per frame, in file column order. 'time' is seconds since the
+# session started, 'lap' the lap the frame belongs to: 0 until the first
+# line crossing, then N for the lap whose LAP_COMPLETE carries lap=N.
+CHANNELS = (
+    "time", "lap", "lap_dist_pct", "speed", "rpm", "gear",
+    "throttle", "brake", "clutch", "steering_angle", "delta",
+)
+DTYPE = np.dtype("<f4")
+FLUSH_ROWS = 60             # Frames buffered before an append (~1 s at 60 Hz)
+CHUNK_ROWS = 16384          # Rows read from the memmap per streamed chunk
+DOWNSAMPLE_METHODS = ("stride", "mean")
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _session_dir(session_id):
+    if not _SESSION_ID.match(session_id or ""):
+        return None
+    return SESSIONS_DIR / session_id
+
+
+def _write_meta(path, meta):
+    # Replace atomically: readers may open the recording at any time
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(meta))
+    tmp.replace(path)
+
+
+class SessionRecorder:
+    """
+    Records every frame of a session to disk for later range queries.
+
+    A session is a directory with frames.f32 (row-major float32
+    [frames, CHANNELS], append-only, memory-mappable) and meta.json (track,
+    car, start time, first row of every lap). Frames are appended once a
+    second, so a crash loses at most FLUSH_ROWS frames and readers always
+    see whole rows.
+
+    Runs on the telemetry thread (frames and session events alike).
+    """
+
+    def __init__(self):
+        self._buffer = np.zeros((FLUSH_ROWS, len(CHANNELS)), dtype=DTYPE)
+        self._count = 0
+        self._rows = 0
+        self._file = None
+        self._meta = None
+        self._dir = None
+        self._lap = 0
+
+    @property
+    def session_id(self):
+        return self._meta["session_id"] if self._meta else None
+
+    @property
+    def path(self):
+        """Directory of the open recording (TelemetrySession.data_file_path), or None."""
+        return str(self._dir) if self._file is not None else None
+
+    def start(self, track, car, session=None, timestamp=None):
+        """Closes any open recording and starts a new one. Returns its session id."""
+        self.close()
+        started = timestamp or time.time()
+        session_id = datetime.fromtimestamp(started).strftime("%Y%m%d-%H%M%S-%f")
+        self._dir = SESSIONS_DIR / session_id
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._meta = {
+            "session_id": session_id,
+            "session": session,
+            "track": track or "Unknown",
+            "car": car or "Unknown",
+            "started_at": started,
+            "channels": list(CHANNELS),
+            "dtype": DTYPE.str,
+            "laps": [[0, 0]],      # [lap, first row]
+            "closed": False
+        }
+        self._file = open(self._dir / "frames.f32", "ab")
+        self._count = 0
+        self._rows = 0
+        self._lap = 0
+        _write_meta(self._dir / "meta.json", self._meta)
+        logger.info(f"Recording session {session_id}")
+        return session_id
+
+    def add_frame(self, data):
+        if self._file is None:
+            return
+        t = data.get("timestamp")
+        if t is None:
+            return
+        row = self._buffer[self._count]
+        row[0] = t - self._meta["started_at"]
+        row[1] = self._lap
+        for i, name in enumerate(CHANNELS[2:], 2):
+            value = data.get(name)
+            row[i] = value if value is not None else np.nan
+        self._count += 1
+        if self._count == FLUSH_ROWS:
+            self.flush()
+
+    def on_lap_event(self, event):
+        """LAP_COMPLETE handler: the next recorded frame starts the new lap."""
+        if self._file is None:
+            return
+        self._lap = event.get("lap", self._lap) + 1
+        self._meta["laps"].append([self._lap, self._rows + self._count])
+        self.flush()
+        _write_meta(self._dir / "meta.json", self._meta)
+
+    def flush(self):
+        if self._file is None or self._count == 0:
+            return
+        self._file.write(self._buffer[:self._count].tobytes())
+        self._file.flush()
+        self._rows += self._count
+        self._count = 0
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        self._meta["closed"] = True
+        self._meta["frames"] = self._rows
+        _write_meta(self._dir / "meta.json", self._meta)
+        logger.info(f"Session recording closed: {self._meta['session_id']} ({self._rows} frames)")
+
+
+class SessionRecording:
+    """
+    Read side of a recorded session: the frame file is memory-mapped, so a
+    query only pages in the rows it streams (a 2 h session is never loaded).
+    Safe to open while the session is still being recorded (whole flushed
+    rows only).
+    """
+
+    def __init__(self, directory):
+        self.meta = json.loads((directory / "meta.json").read_text())
+        self.channels = tuple(self.meta["channels"])
+        row_bytes = np.dtype(self.meta["dtype"]).itemsize * len(self.channels)
+        path = directory / "frames.f32"
+        self.frames = path.stat().st_size // row_bytes if path.exists() else 0
+        self._frames = (
+            np.memmap(path, dtype=self.meta["dtype"], mode="r", shape=(self.frames, len(self.channels)))
+            if self.frames else np.zeros((0, len(self.channels)), dtype=self.meta["dtype"])
+        )
+
+    @classmethod
+    def open(cls, session_id):
+        """The recording of a session id, or None if there is none."""
+        directory = _session_dir(session_id)
+        if directory is None or not (directory / "meta.json").exists():
+            return None
+        return cls(directory)
+
+    def summary(self):
+        duration = float(self._frames[-1, 0]) if self.frames else 0.0
+        return {
+            "session_id": self.meta["session_id"],
+            "track": self.meta["track"],
+            "car": self.meta["car"],
+            "started_at": datetime.fromtimestamp(self.meta["started_at"]).isoformat(),
+            "frames": self.frames,
+            "duration_s": round(duration, 3),
+            "laps": [lap for lap, _ in self.meta["laps"]],
+            "channels": list(self.channels),
+            "recording": not self.meta.get("closed", False)
+        }
+
+    def row_range(self, lap=None, t_from=None, t_to=None):
+        """
+        Rows [start, end) of a lap and/or session time window, found by
+        bisecting the lap table and the (monotonic) time column.
+
+        Returns:
+            tuple: (start, end), or None for an unknown lap.
+        """
+        start, end = 0, self.frames
+        if lap is not None:
+            laps = [n for n, _ in self.meta["laps"]]
+            if lap not in laps:
+                return None
+            i = laps.index(lap)
+            start = self.meta["laps"][i][1]
+            end = self.meta["laps"][i + 1][1] if i + 1 < len(laps) else self.frames
+        # bisect reads ~log2(frames) rows of the memmap; np.searchsorted would copy the column
+        times = self._frames[:, 0]
+        if t_from is not None:
+            start = max(start, bisect.bisect_left(times, t_from))
+        if t_to is not None:
+            end = min(end, bisect.bisect_right(times, t_to))
+        return start, max(start, end)
+
+    def iter_rows(self, channels, start, end, dist_from=None, dist_to=None, max_points=None,
+                  method="stride", chunk_rows=CHUNK_ROWS):
+        """
+        Streams the selected channels of rows [start, end) as C-contiguous
+        float32 blocks [k, len(channels)], CHUNK_ROWS at a time.
+
+        Args:
+            dist_from, dist_to (float): Lap distance fraction window (within each lap).
+            max_points (int): Downsample to about this many rows: every n-th row
+                ('stride') or the mean of every n rows ('mean').
+        """
+        columns = [self.channels.index(name) for name in channels]
+        dist_col = self.channels.index("lap_dist_pct")
+        filtered = dist_from is not None or dist_to is not None
+        step = 1
+        if max_points:
+            # The step is sized on the rows that pass the distance window
+            rows = self._count_in_window(start, end, dist_col, dist_from, dist_to, chunk_rows) if filtered else end - start
+            step = max(1, math.ceil(rows / max_points))
+
+        carry = None   # Rows of a 'mean' bucket that straddles two chunks
+        phase = 0      # Filtered rows since the last kept one ('stride')
+        for a in range(start, end, chunk_rows):
+            block = self._frames[a:min(end, a + chunk_rows)]
+            if filtered:
+                block = block[_in_window(block[:, dist_col], dist_from, dist_to)]
+            block = np.ascontiguousarray(block[:, columns])
+            if step == 1:
+                if len(block):
+                    yield block
+                continue
+
+            if method == "stride":
+                out = np.ascontiguousarray(block[(step - phase) % step::step])
+                phase = (phase + len(block)) % step
+            else:
+                if carry is not None:
+                    block = np.concatenate([carry, block])
+                full = len(block) // step * step
+                carry = block[full:] if full < len(block) else None
+                out = block[:full].reshape(-1, step, len(columns)).mean(axis=1, dtype=np.float64).astype(DTYPE)
+            if len(out):
+                yield out
+        if carry is not None and len(carry):
+            yield carry.mean(axis=0, dtype=np.float64).astype(DTYPE)[None, :]
+
+    def _count_in_window(self, start, end, dist_col, dist_from, dist_to, chunk_rows):
+        # Counting pass over the distance column only (no row copies)
+        count = 0
+        for a in range(start, end, chunk_rows):
+            dist = self._frames[a:min(end, a + chunk_rows), dist_col]
+            count += int(np.count_nonzero(_in_window(dist, dist_from, dist_to)))
+        return count
+
+
+def _in_window(dist, dist_from, dist_to):
+    keep = np.ones(len(dist), dtype=bool)
+    if dist_from is not None:
+        keep &= dist >= dist_from
+    if dist_to is not None:
+        keep &= dist <= dist_to
+    return keep
+
+
+def list_recordings():
+    """Summaries of every recorded session, newest first."""
+    if not SESSIONS_DIR.exists():
+        return []
+    recordings = []
+    for directory in sorted(SESSIONS_DIR.iterdir(), reverse=True):
+        if not (directory / "meta.json").exists():
+            continue
+        try:
+            recordings.append(SessionRecording(directory).summary())
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Unreadable session recording {directory.name}: {e}")
+    return recordings
@@ -1,10 +1,130 @@
 import random
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.core.config import settings
+
+TEMP_HISTORY = 10       # Track temp samples kept for the pressure trend
+LIVE_SESSION = "live"   # Session key of the local telemetry loop
+
+# Pit window
+UNDERCUT_LAPS = 2       # Laps on fresh tires before the rival can respond
+OUT_LAP_PENALTY = 1.0   # Seconds lost on the out lap warming the tires
+OVERCUT_MAX_DEG = 0.5   # Our tire loss per lap (s) that still makes staying out pay
+
+
+class StrategyState:
+    """
+    Strategy state of one driver/session. Fixed size: the temperature
+    history is a ring array, so a session never grows.
+    """
+    __slots__ = ("key", "base_tire_psi", "fuel_per_lap", "tire_wear_per_lap",
+                 "_temps", "_temp_head", "_temp_count", "last_seen")
+
+    def __init__(self, key, base_tire_psi=23.0):
+        self.key = key
+        self.base_tire_psi = base_tire_psi
+        self.fuel_per_lap = None        # Measured liters per lap (None = model default)
+        self.tire_wear_per_lap = None   # Measured wear per wheel (fraction of maximum)
+        self._temps = np.zeros(TEMP_HISTORY)
+        self._temp_head = 0
+        self._temp_count = 0
+        self.last_seen = time.monotonic()
+
+    def push_temp(self, temp):
+        self._temps[self._temp_head] = temp
+        self._temp_head = (self._temp_head + 1) % TEMP_HISTORY
+        self._temp_count = min(self._temp_count + 1, TEMP_HISTORY)
+
+    def temp_trend(self):
+        """Newest minus oldest temperature in the history."""
+        if self._temp_count < 2:
+            return 0.0
+        newest = self._temps[self._temp_head - 1]
+        oldest = self._temps[(self._temp_head - self._temp_count) % TEMP_HISTORY]
+        return float(newest - oldest)
+
+    def update_consumption(self, fuel_per_lap, tire_wear_per_lap=None):
+        """
+        Adopts the consumption measured by the ConsumptionEstimator.
+        """
+        if fuel_per_lap:
+            self.fuel_per_lap = fuel_per_lap
+        if tire_wear_per_lap is not None:
+            self.tire_wear_per_lap = tire_wear_per_lap
+
+
+class StrategySessionStore:
+    """
+    Per-driver/session StrategyState, so concurrent API users and the live
+    loop don't share one trend.
+
+    Sessions idle longer than `idle_timeout` seconds are evicted, and the
+    least recently used one goes once `max_sessions` is reached - every
+    state has a fixed size, so this caps the memory. `pinned` sessions (the
+    live loop) are never evicted.
+    """
+
+    def __init__(self, max_sessions=1000, idle_timeout=1800, pinned=()):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._pinned = {key: StrategyState(key) for key in pinned}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def get(self, key):
+        """Returns the state of a session, creating it on first use."""
+        pinned = self._pinned.get(key)
+        if pinned is not None:
+            return pinned
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(key)
+            if state is None:
+                state = StrategyState(key)
+                self._sessions[key] = state
+            else:
+                self._sessions.move_to_end(key)
+            state.last_seen = now
+            self._evict(now)
+        return state
+
+    def peek(self, key):
+        """Returns the state of a session or None, without touching it."""
+        if key in self._pinned:
+            return self._pinned[key]
+        with self._lock:
+            return self._sessions.get(key)
+
+    def drop(self, key):
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def __len__(self):
+        return len(self._sessions) + len(self._pinned)
+
+    def _evict(self, now):
+        # Caller holds the lock
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        # Idle sweep at most once a second; LRU order puts idle sessions first
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + 1.0
+        while self._sessions:
+            key, state = next(iter(self._sessions.items()))
+            if now - state.last_seen < self.idle_timeout:
+                break
+            del self._sessions[key]
+
 
 class StrategyEngine:
     def __init__(self):
-        self.track_temp_history = []
-        self.base_tire_psi = 23.0  # Starting PSI
-        self.fuel_per_lap_avg = 1.85 # Liters
+        self.fuel_per_lap_avg = 1.85 # Liters (default until a session has measured laps)
         self.tire_life_expectancy = {"SOFT": 15, "MEDIUM": 25, "HARD": 40}
 
     def calculate_tire_degradation(self, laps_driven, tire_compound="SOFT", track_temp=30.0):
@@ -22,12 +142,23 @@ class StrategyEngine:
         degradation = min(100.0, wear_factor * temp_factor * 100)
         return round(degradation, 1)
 
-    def calculate_fuel_strategy(self, total_laps, laps_completed, fuel_remaining):
+    def calculate_tire_degradation_batch(self, laps_driven, tire_compound="SOFT", track_temp=30.0):
+        """
+        Vectorized calculate_tire_degradation: same model over a NumPy array of lap counts.
+        """
+        base_life = self.tire_life_expectancy.get(tire_compound, 20)
+        temp_factor = 1.0 + (max(0, track_temp - 25) * 0.02)
+        wear_factor = (np.asarray(laps_driven, dtype=np.float64) / base_life) ** 1.5
+        return np.minimum(100.0, wear_factor * temp_factor * 100)
+
+    def calculate_fuel_strategy(self, total_laps, laps_completed, fuel_remaining, fuel_per_lap=None):
         """
         Calculates fuel requirements and saving suggestions.
         """
+        if not fuel_per_lap:
+            fuel_per_lap = self.fuel_per_lap_avg
         laps_remaining = total_laps - laps_completed
-        fuel_needed = laps_remaining * self.fuel_per_lap_avg
+        fuel_needed = laps_remaining * fuel_per_lap
         
         diff = fuel_remaining - fuel_needed
         
@@ -45,6 +176,7 @@ class StrategyEngine:
             action = "MAX POWER"
             
         return {
+            "fuel_per_lap": round(fuel_per_lap, 3),
             "fuel_needed": round(fuel_needed, 2),
             "fuel_remaining": round(fuel_remaining, 2),
             "delta": round(diff, 2),
@@ -52,55 +184,58 @@ class StrategyEngine:
             "recommended_action": action
         }
 
-    def predict_tire_pressures(self, current_temp):
+    def predict_tire_pressures(self, current_temp, state):
         """
         Predicts tire pressure 5 laps ahead based on track temp trend.
         Physics: +1C Track Temp ~= +0.1 PSI (Rough rule of thumb)
+
+        Args:
+            state (StrategyState): Session whose temperature history is used.
         """
-        self.track_temp_history.append(current_temp)
-        if len(self.track_temp_history) > 10:
-            self.track_temp_history.pop(0)
+        state.push_temp(current_temp)
 
         # Calculate Trend
-        trend = 0
-        if len(self.track_temp_history) >= 2:
-            trend = self.track_temp_history[-1] - self.track_temp_history[0]
+        trend = state.temp_trend()
         
         # Forecast 5 laps (approx 5 mins maybe?)
         # Mock logic: If trend is positive, pressure rises.
         predicted_rise = trend * 0.5 # multiplier
         
-        predicted_psi = self.base_tire_psi + predicted_rise + random.uniform(-0.1, 0.1)
+        predicted_psi = state.base_tire_psi + predicted_rise + random.uniform(-0.1, 0.1)
         
         return {
-            "current_psi": round(self.base_tire_psi + (trend * 0.1), 1),
+            "current_psi": round(state.base_tire_psi + (trend * 0.1), 1),
             "predicted_psi": round(predicted_psi, 1),
             "trend_direction": "UP" if trend > 0.5 else "DOWN" if trend < -0.5 else "STABLE"
         }
 
-    def analyze_pit_window(self, gap_ahead, gap_behind, laps_remaining):
+    def analyze_pit_window(self, gap_ahead, gap_behind, laps_remaining, own_deg=0.0, rival_ahead_deg=0.0, rival_ahead_pitting=False):
         """
         Determines Undercut/Overcut opportunity.
+
+        Args:
+            gap_ahead (float): Seconds to the same-class car ahead (None if none).
+            gap_behind (float): Seconds to the same-class car behind (None if none).
+            laps_remaining (int): Race laps left (None if unknown).
+            own_deg (float): Our last lap minus best lap (seconds lost to tire wear).
+            rival_ahead_deg (float): Same for the car ahead.
+            rival_ahead_pitting (bool): The car ahead is in the pit lane.
         """
-        # Mock Logic
-        # If rival ahead is < 2.0s, Undercut is powerful.
-        # If rival behind is < 2.0s, they might Undercut you (Alert).
-        
-        if laps_remaining > 0 and laps_remaining < 5:
-             # End of stint logic
-             pass
+        # Too late for a stop to pay off
+        if laps_remaining is not None and laps_remaining <= UNDERCUT_LAPS:
+            return None
 
-        alert = None
-        
-        # Randomly trigger an opportunity for demo purposes
-        # In real app, this would check relative gaps and pit stops.
-        rng = random.random()
-        if rng > 0.98:
-            alert = "UNDERCUT AVAILABLE (Gap: 1.2s)"
-        elif rng < 0.02:
-            alert = "DEFEND UNDERCUT (Box Now!)"
-            
-        return alert
+        # Fresh tires gain the rival's wear per lap until they respond, minus the cold out lap
+        undercut_gain = rival_ahead_deg * UNDERCUT_LAPS - OUT_LAP_PENALTY
+        undercut_threat = own_deg * UNDERCUT_LAPS - OUT_LAP_PENALTY
+
+        if gap_ahead is not None and rival_ahead_pitting and own_deg < OVERCUT_MAX_DEG:
+            return "OVERCUT: STAY OUT (Push!)"
+        if gap_ahead is not None and 0 < gap_ahead < undercut_gain:
+            return f"UNDERCUT AVAILABLE (Gap: {gap_ahead:.1f}s)"
+        if gap_behind is not None and 0 < gap_behind < undercut_threat:
+            return "DEFEND UNDERCUT (Box Now!)"
+        return None
 
     def calculate_lift_coast(self, lap_dist_pct):
         """
@@ -131,9 +266,12 @@ class StrategyEngine:
             "type": "LIFT"
         }
 
-    def get_strategy_recommendation(self, session_data):
+    def get_strategy_recommendation(self, session_data, state):
         """
         Aggregates all models to provide a holistic race strategy.
+
+        Args:
+            state (StrategyState): State of the requesting driver/session.
         """
         # Extract data (mocking the extraction for now)
         laps_done = session_data.get("laps_completed", 0)
@@ -143,8 +281,9 @@ class StrategyEngine:
         track_temp = session_data.get("track_temp", 30.0)
         
         deg = self.calculate_tire_degradation(laps_done, tire_compound, track_temp)
-        fuel_strat = self.calculate_fuel_strategy(total_laps, laps_done, fuel_level)
-        tire_pred = self.predict_tire_pressures(track_temp) # Add Prediction
+        fuel_per_lap = session_data.get("fuel_per_lap") or state.fuel_per_lap
+        fuel_strat = self.calculate_fuel_strategy(total_laps, laps_done, fuel_level, fuel_per_lap)
+        tire_pred = self.predict_tire_pressures(track_temp, state) # Add Prediction
         
         pit_recommendation = "STAY OUT"
         if deg > 70 or fuel_strat["status"] == "CRITICAL":
@@ -156,7 +295,16 @@ class StrategyEngine:
             "pit_recommendation": pit_recommendation,
             "tire_compound": tire_compound,
             "tire_prediction": tire_pred, # Include in response
-            "pit_alert": self.analyze_pit_window(0, 0, 0) # Include Pit Alert (mocked for now)
+            "tire_wear_per_lap": state.tire_wear_per_lap,
+            "pit_alert": self.analyze_pit_window(
+                session_data.get("gap_ahead"), session_data.get("gap_behind"), total_laps - laps_done,
+                own_deg=session_data.get("tire_time_loss", 0.0)
+            )
         }
 
 strategy_engine = StrategyEngine()
+strategy_sessions = StrategySessionStore(
+    max_sessions=settings.STRATEGY_MAX_SESSIONS,
+    idle_timeout=settings.STRATEGY_SESSION_IDLE_SECONDS,
+    pinned=(LIVE_SESSION,)
+)
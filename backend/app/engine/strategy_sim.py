@@ -0,0 +1,224 @@
+import itertools
+import math
+import time
+
+import numpy as np
+
+from app.engine.strategy import strategy_engine
+
+# --- RACE MODEL CONSTANTS ---
+DEG_TIME_LOSS = 3.0          # Seconds per lap lost at 100% tire degradation
+CLIFF_TIME_LOSS = 4.0        # Extra seconds per lap once the tire is fully worn
+FUEL_TIME_PER_LITER = 0.03   # Lap time cost of carrying one liter
+FUEL_SAVE_COST = 2.5         # Seconds lost per liter that has to be saved by lift & coast
+MAX_FUEL_SAVE = 0.1          # Largest share of a stint's fuel that lift & coast can save
+REFUEL_RATE = 2.5            # Liters per second during a stop
+SC_PIT_FACTOR = 0.45         # Share of the pit loss paid when stopping under safety car
+SC_LAP_TIME_LOSS = 25.0      # Extra seconds per safety car lap (same for every plan)
+SC_DURATION = (3, 6)         # Safety car length in laps [min, max)
+DEG_VARIANCE = 0.15          # Sigma of the log-normal degradation multiplier per stint
+
+MAX_PIT_CANDIDATES = 16      # Candidate pit laps per race (coarser grid on long races)
+CHUNK_BYTES = 32 * 1024 * 1024   # Size of the [sims, plans] block evaluated at once
+
+
+def _enumerate_plans(remaining, current_compound, compounds, max_stops):
+    """
+    Every plan with 0..max_stops stops on a grid of candidate pit laps.
+
+    Returns:
+        pit_laps (int [P, K]): Lap offset of each stop, padded with `remaining`.
+        n_stops (int [P]).
+        stint_compounds (int [P, K + 1]): Compound index per stint.
+    """
+    step = max(1, math.ceil((remaining - 1) / MAX_PIT_CANDIDATES))
+    candidates = list(range(step, remaining, step))
+    first = compounds.index(current_compound)
+
+    pit_rows, stop_counts, compound_rows = [], [], []
+    for k in range(max_stops + 1):
+        for pits in itertools.combinations(candidates, k):
+            for sequence in itertools.product(range(len(compounds)), repeat=k):
+                pit_rows.append(list(pits) + [remaining] * (max_stops - k))
+                stop_counts.append(k)
+                compound_rows.append([first] + list(sequence) + [first] * (max_stops - k))
+
+    return (
+        np.array(pit_rows, dtype=np.int64).reshape(-1, max_stops),
+        np.array(stop_counts, dtype=np.int64),
+        np.array(compound_rows, dtype=np.int64)
+    )
+
+
+def simulate_strategies(
+    total_laps=50,
+    laps_completed=0,
+    fuel_level=100.0,
+    fuel_capacity=110.0,
+    fuel_per_lap=None,
+    tire_compound="SOFT",
+    tire_age=0,
+    track_temp=30.0,
+    base_lap_time=95.0,
+    pit_loss=22.0,
+    pit_loss_std=1.5,
+    safety_car_prob=0.02,
+    compounds=("SOFT", "MEDIUM", "HARD"),
+    max_stops=3,
+    n_sims=500,
+    top=10,
+    seed=None
+):
+    """
+    Monte Carlo race strategy simulation, fully batched in NumPy.
+
+    Every pit plan (stop laps x compounds) is evaluated against the same
+    random outcomes (common random numbers): safety car periods, per-stint
+    degradation variance and pit loss. Degradation and fuel use the
+    StrategyEngine models. Plans are evaluated in blocks of CHUNK_BYTES and
+    only the running top plans are kept, so memory doesn't grow with the
+    number of plans.
+
+    Args:
+        fuel_per_lap (float): Liters per lap, defaults to the StrategyEngine average.
+
+    Returns:
+        dict: Ranked strategies with expected remaining race time and
+        95% confidence intervals.
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    remaining = total_laps - laps_completed
+    compounds = list(compounds)
+    if tire_compound not in compounds:
+        compounds.insert(0, tire_compound)
+    if remaining < 1:
+        return {"strategies": [], "simulated_plans": 0, "n_sims": 0, "elapsed_ms": 0.0}
+
+    if fuel_per_lap is None:
+        fuel_per_lap = strategy_engine.fuel_per_lap_avg
+
+    # 1. Plans
+    pit_laps, n_stops, stint_compounds = _enumerate_plans(remaining, tire_compound, compounds, max_stops)
+    n_plans = len(n_stops)
+    bounds = np.concatenate([np.zeros((n_plans, 1), dtype=np.int64), pit_laps, np.full((n_plans, 1), remaining)], axis=1)
+    stint_len = np.diff(bounds, axis=1)                      # [P, K + 1]
+    stop_valid = np.arange(max_stops)[None, :] < n_stops[:, None]
+
+    # 2. Degradation tables: cumulative lap time loss after L laps on a compound
+    max_age = tire_age + remaining + 1
+    ages = np.arange(max_age + 1)
+    deg_cost = np.zeros((len(compounds), max_age + 1))
+    cliff_cost = np.zeros((len(compounds), max_age + 1))
+    for c, name in enumerate(compounds):
+        deg = strategy_engine.calculate_tire_degradation_batch(ages, name, track_temp)
+        deg[0] = 0.0
+        deg_cost[c] = np.cumsum(deg / 100.0 * DEG_TIME_LOSS)
+        cliff_cost[c] = np.cumsum(np.where(deg >= 100.0, CLIFF_TIME_LOSS, 0.0))
+
+    start_age = np.zeros_like(stint_len)
+    start_age[:, 0] = tire_age
+    end_age = start_age + stint_len
+    stint_deg = deg_cost[stint_compounds, end_age] - deg_cost[stint_compounds, start_age]       # [P, K + 1]
+    stint_cliff = cliff_cost[stint_compounds, end_age] - cliff_cost[stint_compounds, start_age]
+
+    # 3. Fuel (deterministic per plan): first stint runs on current fuel, later stints refuel to need
+    stint_fuel = stint_len * fuel_per_lap
+    start_fuel = stint_fuel.copy()
+    start_fuel[:, 0] = fuel_level
+    carried = stint_len * start_fuel - fuel_per_lap * stint_len * (stint_len - 1) / 2.0
+    fuel_time = FUEL_TIME_PER_LITER * np.maximum(carried, 0.0).sum(axis=1)
+    # First stint: the shortfall on what's in the tank is saved by lift & coast, up to MAX_FUEL_SAVE
+    shortfall = np.maximum(stint_fuel[:, 0] - fuel_level, 0.0)
+    fuel_time += FUEL_SAVE_COST * shortfall
+    refuel_time = np.where(stop_valid, stint_fuel[:, 1:] / REFUEL_RATE, 0.0).sum(axis=1)
+    feasible = (stint_fuel[:, 1:] <= fuel_capacity).all(axis=1) & (shortfall <= MAX_FUEL_SAVE * stint_fuel[:, 0])
+
+    plan_fixed = fuel_time + refuel_time + stint_cliff.sum(axis=1)     # [P]
+
+    # 4. Random outcomes [S, ...], shared by every plan
+    deg_mult = rng.lognormal(0.0, DEG_VARIANCE, size=(n_sims, max_stops + 1)).astype(np.float32)
+    stop_loss = np.maximum(rng.normal(pit_loss, pit_loss_std, size=(n_sims, max_stops)), pit_loss * 0.5).astype(np.float32)
+
+    sc_start = rng.random((n_sims, remaining)) < safety_car_prob
+    sc_length = rng.integers(SC_DURATION[0], SC_DURATION[1], size=(n_sims, remaining))
+    # A lap is under SC if any deployment started within its length before it
+    sc_until = np.where(sc_start, np.arange(remaining)[None, :] + sc_length, -1)
+    under_sc = np.maximum.accumulate(sc_until, axis=1) > np.arange(remaining)[None, :]
+    # Identical for every plan: only added back for the absolute race time
+    common_time = base_lap_time * remaining + under_sc.sum(axis=1) * SC_LAP_TIME_LOSS    # [S]
+
+    # 5. Batched evaluation [S, chunk], as matrix products over stints and pit laps
+    # Pit loss per sim and lap (cheaper under SC), scattered onto each plan's stop laps
+    sc_weight = np.where(under_sc, SC_PIT_FACTOR, 1.0).astype(np.float32)              # [S, R]
+    stop_weight = [sc_weight * stop_loss[:, k, None] for k in range(max_stops)]
+    chunk = max(top, CHUNK_BYTES // (4 * n_sims))
+    best_plans = np.zeros(0, dtype=np.int64)
+    best_mean = np.zeros(0)
+    best_time = np.zeros((n_sims, 0), dtype=np.float32)
+    for a in range(0, n_plans, chunk):
+        plans = np.arange(a, min(n_plans, a + chunk))
+        plan_time = deg_mult @ stint_deg[plans].T.astype(np.float32)
+        plan_time += plan_fixed[plans].astype(np.float32)[None, :]
+        for k in range(max_stops):
+            stops = np.flatnonzero(stop_valid[plans, k])
+            if len(stops) == 0:
+                continue
+            on_lap = np.zeros((remaining, len(plans)), dtype=np.float32)
+            on_lap[pit_laps[plans[stops], k], stops] = 1.0
+            plan_time += stop_weight[k] @ on_lap
+        plan_time[:, ~feasible[plans]] = np.inf
+
+        # 6. Keep the running top plans by expected time
+        mean = plan_time.mean(axis=0, dtype=np.float64)
+        keep = np.argsort(mean, kind="stable")[:top]
+        best_plans = np.concatenate([best_plans, plans[keep]])
+        best_mean = np.concatenate([best_mean, mean[keep]])
+        best_time = np.concatenate([best_time, plan_time[:, keep]], axis=1)
+        keep = np.argsort(best_mean, kind="stable")[:top]
+        best_plans, best_mean, best_time = best_plans[keep], best_mean[keep], best_time[:, keep]
+
+    finite = np.isfinite(best_mean)
+    order = best_plans[finite]
+    if len(order) == 0:
+        # No plan within max_stops covers the race on the available fuel
+        return {
+            "strategies": [],
+            "simulated_plans": int(n_plans),
+            "n_sims": int(n_sims),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    top_time = best_time[:, finite].astype(np.float64) + common_time[:, None]
+    p10, p90 = np.percentile(top_time, [10, 90], axis=0)
+    stderr = top_time.std(axis=0) / math.sqrt(n_sims)
+    # Paired differences (same outcomes for every plan) give a much tighter interval on the gap
+    gap = top_time - top_time[:, :1]
+    gap_stderr = gap.std(axis=0) / math.sqrt(n_sims)
+    # How often each of the top plans is the fastest in a given outcome
+    win_rate = np.bincount(np.argmin(top_time, axis=1), minlength=len(order)) / n_sims
+
+    strategies = []
+    for rank, p in enumerate(order):
+        k = int(n_stops[p])
+        expected = float(top_time[:, rank].mean())
+        delta = float(gap[:, rank].mean())
+        strategies.append({
+            "rank": rank + 1,
+            "stops": k,
+            "pit_laps": [int(laps_completed + lap) for lap in pit_laps[p, :k]],
+            "compounds": [compounds[c] for c in stint_compounds[p, :k + 1]],
+            "expected_time": round(expected, 2),
+            "ci95": [round(expected - 1.96 * stderr[rank], 2), round(expected + 1.96 * stderr[rank], 2)],
+            "delta_to_best": round(delta, 2),
+            "delta_ci95": [round(delta - 1.96 * gap_stderr[rank], 2), round(delta + 1.96 * gap_stderr[rank], 2)],
+            "p10": round(float(p10[rank]), 2),
+            "p90": round(float(p90[rank]), 2),
+            "win_probability": round(float(win_rate[rank]), 3)
+        })
+
+    return {
+        "strategies": strategies,
+        "simulated_plans": int(n_plans),
+        "n_sims": int(n_sims),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
@@ -5,9 +5,25 @@ import platform
 import random
 import math
 from loguru import logger
-from app.engine.strategy import strategy_engine
+from app.engine.strategy import strategy_engine, strategy_sessions, LIVE_SESSION
 from app.engine.hardware import hardware_engine
 from app.engine.iot import iot_engine
+from app.engine.analysis import analysis_engine
+from app.engine.lap_store import LapRecorder
+from app.engine.session_recorder import SessionRecorder
+from app.engine.delta import delta_engine
+from app.engine.mistakes import mistake_detector, lmu_lockup
+from app.engine.consumption import ConsumptionEstimator
+from app.engine.scoring import gap_engine, read_lmu_scoring, read_iracing_scoring, read_iracing_drivers, SCORING_INTERVAL
+from app.engine.relative import relative_table
+from app.engine.track_cache import track_cache
+from app.engine.lap_store import GRID_POINTS
+from app.ai.ghost_registry import ghost_registry
+from app.ai.ghost_features import STEERING_LOCK
+from app.engine.session_events import (
+    SessionStateMachine, LAP_COMPLETE, SESSION_CHANGE, CAR_CHANGE,
+    iracing_flag, lmu_flag, lmu_sector
+)
 
 # Try import irsdk
 try:
@@ -26,6 +42,9 @@ except ImportError as e:
     logger.warning(f"LMU modules not found: {e}")
 
 class TelemetryEngine:
+    # Events clients send to the engine (see handle_client_event)
+    CLIENT_EVENTS = ('debug_command', 'set_active_user')
+
     def __init__(self, sio_server, loop):
         self.sio = sio_server
         self.loop = loop
@@ -55,6 +74,34 @@ class TelemetryEngine:
         # Session Management
         self.active_user_id = None
         self.current_session_id = None
+        self.track = "Unknown"
+        self.car = "Unknown"
+
+        # Lap Recording (distance-aligned laps for analysis)
+        self.lap_recorder = LapRecorder(self._on_lap_complete)
+        # Every frame of the session on disk, for range queries (/api/telemetry)
+        self.session_recorder = SessionRecorder()
+        # Measured fuel/tire use per lap
+        self.consumption = ConsumptionEstimator()
+        # Session events: per-lap/per-session work runs in the subscribers
+        self.session_events = SessionStateMachine()
+        self.session_events.subscribe(SESSION_CHANGE, self._on_session_change)
+        self.session_events.subscribe(CAR_CHANGE, self._on_session_change)
+        self.session_events.subscribe(LAP_COMPLETE, self.lap_recorder.on_lap_event)
+        self.session_events.subscribe(LAP_COMPLETE, self.session_recorder.on_lap_event)
+        self.session_events.subscribe(LAP_COMPLETE, mistake_detector.on_lap_event)
+        self.session_events.subscribe(LAP_COMPLETE, self._on_lap_event)
+        self._session_laps = 0
+        self._session_best = None
+        self._lmu_epoch = 0        # Bumped when the LMU session clock restarts
+        self._lmu_last_et = None
+        self._iracing_subsession = None
+        self._ghost_model = None   # GhostModel currently streaming (reset on switch)
+        # Scoring-rate state (gaps, pit window), recomputed only when scoring changes
+        self._scoring_stamp = None
+        self.strategy_state = None
+        self._driver_info = None   # iRacing DriverInfo the driver arrays were built from
+        self._drivers = None
 
 
     def start(self):
@@ -68,6 +115,18 @@ class TelemetryEngine:
         # Register Event Handlers directly
         @self.sio.on('debug_command')
         async def on_debug_command(sid, data):
+            self.handle_client_event('debug_command', data)
+
+        @self.sio.on('set_active_user')
+        async def on_set_active_user(sid, user_id):
+            self.handle_client_event('set_active_user', user_id)
+
+    def handle_client_event(self, event, data):
+        """
+        Client -> engine events, from this worker's clients or relayed from
+        the other workers (app.core.fanout).
+        """
+        if event == 'debug_command':
             cmd = data.get('type')
             logger.info(f"Debug Command Received: {cmd}")
             
@@ -100,16 +159,36 @@ class TelemetryEngine:
             elif cmd == 'trigger_spotter_right':
                 self.manual_state['spotter_right'] = True
                 threading.Timer(3.0, lambda: self.manual_state.update({'spotter_right': False})).start()
-                
-        @self.sio.on('set_active_user')
-        async def on_set_active_user(sid, user_id):
-             logger.info(f"Setting active user to: {user_id}")
-             self.active_user_id = user_id
+
+        elif event == 'set_active_user':
+            logger.info(f"Setting active user to: {data}")
+            self.active_user_id = data
+
+    def live_state(self):
+        """
+        Owner state the REST endpoints read (/strategy/gaps, the live session's
+        measured consumption), published to the other workers (app.core.fanout).
+        """
+        live = strategy_sessions.get(LIVE_SESSION)
+        return {
+            "gaps": gap_engine.result,
+            "fuel_per_lap": live.fuel_per_lap,
+            "tire_wear_per_lap": live.tire_wear_per_lap
+        }
+
+    @staticmethod
+    def apply_live_state(state):
+        """Other workers: adopt the owner's live state."""
+        gap_engine.result = state.get("gaps")
+        live = strategy_sessions.get(LIVE_SESSION)
+        live.fuel_per_lap = state.get("fuel_per_lap")
+        live.tire_wear_per_lap = state.get("tire_wear_per_lap")
 
     def stop(self):
         self.running = False
         if self.thread:
             self.thread.join()
+        self.session_events.end()
         if self.lmu:
             try:
                 self.lmu.close()
@@ -149,6 +228,8 @@ class TelemetryEngine:
             if self.ir and self.ir.startup():
                 self.connected = True
                 self.game_running = 'iracing'
+                self._read_iracing_session_info()
+                self._reset_scoring()
                 logger.success("Connected to iRacing Simulator")
                 return True
         except Exception:
@@ -161,12 +242,243 @@ class TelemetryEngine:
             self.lmu.create(access_mode=0)
             self.connected = True
             self.game_running = 'lmu'
+            self._lmu_epoch += 1
+            self._lmu_last_et = None
+            self._reset_scoring()
             logger.success("Connected to Le Mans Ultimate")
             return True
         except Exception:
             # Likely file not found or permission error if game not running
             return False
 
+    def _read_iracing_session_info(self):
+        # Session strings are YAML parsed by irsdk, so read them once per connection
+        try:
+            self.track = self.ir['WeekendInfo']['TrackDisplayName']
+            self._iracing_subsession = self.ir['WeekendInfo'].get('SubSessionID')
+            car_idx = self.ir['DriverInfo']['DriverCarIdx']
+            self.car = self.ir['DriverInfo']['Drivers'][car_idx]['CarScreenName']
+        except Exception:
+            self.track = "Unknown"
+            self.car = "Unknown"
+            self._iracing_subsession = None
+
+    def _on_lap_complete(self, lap_data, lap):
+        delta_engine.on_lap_complete(lap_data, lap)
+        analysis_engine.save_lap(lap_data, lap)
+
+    def _update_session(self, frame):
+        """
+        Runs the session state machine on the frame; subscribers do the
+        per-event work (lap store, consumption, report, session rows).
+        Must run before the frame is buffered by the lap recorder.
+        """
+        self.consumption.observe(frame['fuel'], frame.get('wear'))
+        self.session_events.update(frame)
+
+    def _on_session_change(self, event):
+        # New session or car: close the previous TelemetrySession row, start fresh
+        self._close_session()
+        self.lap_recorder.reset()
+        self.consumption.reset()
+        self._ghost_model = None
+        if event.get('session') is None:
+            self.session_recorder.close()
+            return
+        self.session_recorder.start(event.get('track'), event.get('car'), event.get('session'), event.get('timestamp'))
+        # Start loading the ghost model in the background; reference ghost until then
+        ghost_registry.peek(event.get('track'), event.get('car'))
+        logger.info(f"Session started: {event.get('track')} / {event.get('car')} ({event.get('session')})")
+        self._open_session(event.get('track'), event.get('car'))
+
+    def _on_lap_event(self, event):
+        # Measured consumption feeds the live strategy state
+        if self.consumption.on_lap_event(event):
+            strategy_sessions.get(LIVE_SESSION).update_consumption(self.consumption.fuel_per_lap, self.consumption.wear_per_lap)
+        if event['lap_time'] is None or not event['valid']:
+            return
+
+        self._session_laps += 1
+        if self._session_best is None or event['lap_time'] < self._session_best:
+            self._session_best = event['lap_time']
+        self._save_session()
+        self._emit_report(self._build_report(event))
+
+    def _build_report(self, event):
+        lap_time = event['lap_time']
+        report = {
+            "track": event.get('track'),
+            "car": event.get('car'),
+            "lap": event.get('lap'),
+            "lap_time_s": lap_time,
+            "lap_time": f"{int(lap_time // 60)}:{lap_time % 60:06.3f}",
+            "pilot_score": 100,
+            "mistakes": [],
+            "traces": {"speed_you": [], "speed_ref": []}
+        }
+        # The lap was saved by the lap recorder subscriber just before this one;
+        # laps it rejected (partial) have no traces
+        comparison = analysis_engine.get_comparison("speed", points=100, wait=False)
+        if comparison and abs(comparison["lap_time"] - lap_time) < 1e-3:
+            report["traces"] = {"speed_you": comparison["trace_you"], "speed_ref": comparison["trace_ref"]}
+            # 1 point per tenth off the reference lap
+            report["pilot_score"] = int(max(0, min(100, 100 - comparison["delta"] * 10)))
+        if mistake_detector.has_reference:
+            report["mistakes"] = mistake_detector.last_lap
+        else:
+            # No reference corners yet: fall back to the history-wide weak spots
+            weaknesses = analysis_engine.cached_weaknesses(event.get('track'), event.get('car')) or []
+            report["mistakes"] = [
+                {"corner": w["corner"], "feedback": w["recommendation"], "time_lost": w["time_loss"]}
+                for w in weaknesses
+            ]
+        report["bio"] = iot_engine.get_data()
+        return report
+
+    def _open_session(self, track, car):
+        self._session_laps = 0
+        self._session_best = None
+        self.current_session_id = None
+        if not self.active_user_id:
+            return
+        try:
+            from app.core.database import engine as db_engine
+            from sqlmodel import Session
+            from app.engine.models.telemetry_session import TelemetrySession
+
+            with Session(db_engine) as session:
+                t_session = TelemetrySession(
+                    user_id=self.active_user_id, track=track or "Unknown", car=car or "Unknown",
+                    data_file_path=self.session_recorder.path
+                )
+                session.add(t_session)
+                session.commit()
+                session.refresh(t_session)
+                self.current_session_id = t_session.id
+        except Exception as e:
+            logger.error(f"Session open failed: {e}")
+
+    def _save_session(self, close=False):
+        if self.current_session_id is None:
+            return
+        try:
+            from datetime import datetime
+            from app.core.database import engine as db_engine
+            from sqlmodel import Session
+            from app.engine.models.telemetry_session import TelemetrySession
+
+            with Session(db_engine) as session:
+                t_session = session.get(TelemetrySession, self.current_session_id)
+                if t_session is None:
+                    return
+                t_session.lap_count = self._session_laps
+                t_session.best_lap = self._session_best
+                if close:
+                    t_session.end_time = datetime.utcnow()
+                session.add(t_session)
+                session.commit()
+        except Exception as e:
+            logger.error(f"Session update failed: {e}")
+
+    def _close_session(self):
+        self._save_session(close=True)
+        self.current_session_id = None
+
+    def _apply_delta(self, data):
+        # Live delta vs the cached reference lap (O(1) lookup per frame)
+        delta_engine.set_session(self.track, self.car)
+        delta_engine.update(data['lap_dist_pct'], data['timestamp'])
+        data['delta'] = delta_engine.delta
+        data['predicted_lap'] = delta_engine.predicted_lap
+        data['potential_lap'] = delta_engine.potential_lap
+
+    def _apply_mistakes(self, data, lockup=False, yaw_rate=None):
+        # Online mistake detection against the reference corners (O(1) per frame)
+        mistake_detector.set_session(self.track, self.car)
+        mistake_detector.update(
+            data['lap_dist_pct'], data['speed'], data['throttle'], data['brake'], data['steering_angle'],
+            delta=data['delta'], lockup=lockup, yaw_rate=yaw_rate
+        )
+
+    def _apply_ghost(self, data):
+        """
+        Ghost controls for this frame: GhostNet once its model is loaded,
+        the reference lap at the same distance until then (or if the model fails).
+        """
+        model = ghost_registry.peek(self.track, self.car)
+        if model is not None:
+            if model is not self._ghost_model:
+                model.reset()
+                self._ghost_model = model
+            try:
+                steering, throttle, brake = model.step(data['speed'], data['timestamp'], data['lap_dist_pct'])
+            except Exception as e:
+                # Must not reach the sim loop's handler (it disconnects): drop the model, use the reference
+                logger.error(f"Ghost model {model.track} / {model.car} {model.version} failed, using the reference lap: {e}")
+                ghost_registry.reject(model)
+                self._ghost_model = None
+            else:
+                data['ghost_controls'] = {
+                    "steering": steering, "throttle": throttle, "brake": brake,
+                    "source": "model", "version": model.version
+                }
+                return
+
+        artifacts = track_cache.peek(self.track, self.car)
+        if artifacts is None:
+            data['ghost_controls'] = None
+            return
+        reference = artifacts["reference"]
+        i = min(int(data['lap_dist_pct'] * GRID_POINTS), GRID_POINTS - 1)
+        data['ghost_controls'] = {
+            "steering": max(-1.0, min(1.0, float(reference["steering"][i]) / STEERING_LOCK)),
+            "throttle": float(reference["throttle"][i]),
+            "brake": float(reference["brake"][i]),
+            "source": "reference", "version": None
+        }
+
+    def _reset_scoring(self):
+        gap_engine.reset()
+        relative_table.reset()
+        self._scoring_stamp = None
+        self.strategy_state = None
+        self._driver_info = None
+        self._drivers = None
+
+    def _on_lmu_scoring(self, scoring, laps_to_go):
+        cars = read_lmu_scoring(scoring)
+        if cars is not None:
+            self._on_scoring(cars, scoring.scoringInfo.mCurrentET, laps_to_go, scoring.scoringInfo.mTrackTemp)
+
+    def _on_iracing_scoring(self, now, laps_to_go):
+        # Driver arrays only change with the session info (irsdk re-parses it on update)
+        driver_info = self.ir['DriverInfo']
+        if driver_info is not self._driver_info:
+            self._driver_info = driver_info
+            self._drivers = read_iracing_drivers(driver_info or {})
+        cars = read_iracing_scoring(self.ir, self._drivers)
+        if cars is not None:
+            self._on_scoring(cars, now, laps_to_go, self.ir['TrackTempCrew'])
+
+    def _on_scoring(self, cars, now, laps_to_go, track_temp):
+        # Runs at scoring rate; frames attach the cached results
+        relative_table.update(cars)
+        gaps = gap_engine.update(cars, now, laps_to_go)
+        if gaps is None:
+            return
+        self.strategy_state = {
+            "tire_prediction": strategy_engine.predict_tire_pressures(track_temp, strategy_sessions.get(LIVE_SESSION)),
+            "pit_alert": gaps["pit_alert"],
+            "gap_ahead": gaps["gap_ahead"],
+            "gap_behind": gaps["gap_behind"],
+            "pit_loss": gaps["pit_loss"],
+            "pit_rejoin": gaps["pit_rejoin"]
+        }
+
+    def _apply_consumption(self, data, fuel, laps_to_go=None, fuel_capacity=None):
+        # The estimate only changes on LAP_COMPLETE (see _on_lap_event)
+        data['fuel_strategy'] = self.consumption.fuel_status(fuel, laps_to_go, fuel_capacity)
+
     def _emit(self, data):
         asyncio.run_coroutine_threadsafe(
             self.sio.emit('telemetry_update', data), 
@@ -183,25 +495,9 @@ class TelemetryEngine:
             from app.core.database import engine as db_engine
             from sqlmodel import Session, select
             from app.engine.models.community import League, LeagueEntry
-            from app.engine.models.telemetry_session import TelemetrySession
 
+            # TelemetrySession rows are opened/closed on session events
             with Session(db_engine) as session:
-                # 1. Update/Create Telemetry Session
-                if self.active_user_id:
-                     # Check if we have an open session or create new
-                     # For simplicity, let's treat each 'report' as a session summary or part of it
-                     # Ideally, we open session on game start, close on end.
-                     # Here just logging the lap.
-                     t_session = TelemetrySession(
-                        user_id=self.active_user_id,
-                        track=data.get('track', 'Unknown'),
-                        car=data.get('car', 'Unknown'),
-                        best_lap=94.215, # Mock
-                        lap_count=1
-                     )
-                     session.add(t_session)
-                     session.commit()
-
                 league = session.exec(select(League).where(League.name == "Global Daily")).first()
                 if not league:
                     league = League(name="Global Daily", criteria="cleanest")
@@ -216,7 +512,7 @@ class TelemetryEngine:
                 entry = LeagueEntry(
                     league_id=league.id,
                     driver_name="You",
-                    lap_time=94.215,
+                    lap_time=data.get('lap_time_s', 0.0),
                     cleanliness_score=cleanliness_score,
                     consistency_score=consistency_score
                 )
@@ -245,6 +541,8 @@ class TelemetryEngine:
                 return
 
             player = telemetry.telemInfo[player_idx]
+            self.track = scoring.scoringInfo.mTrackName.decode(errors='ignore') or "Unknown"
+            self.car = player.mVehicleName.decode(errors='ignore') or "Unknown"
 
             # Speed Calculation (Vector Magnitude)
             vx = player.mLocalVel.x
@@ -344,6 +642,51 @@ class TelemetryEngine:
             hw_events = hardware_engine.process(data)
             data['hardware'] = hw_events
 
+            # Race laps left (timed races report a huge lap limit)
+            laps_to_go = None
+            max_laps = scoring.scoringInfo.mMaxLaps
+            if 0 < max_laps < 10000:
+                laps_to_go = max(0, max_laps - player_scoring.mTotalLaps)
+
+            # Scoring updates at a few Hz: only then rebuild gaps and the pit window
+            stamp = (self.lmu.data.generic.events.SME_UPDATE_SCORING, scoring.scoringInfo.mCurrentET)
+            if stamp != self._scoring_stamp:
+                self._scoring_stamp = stamp
+                self._on_lmu_scoring(scoring, laps_to_go)
+            if self.strategy_state:
+                data['strategy'] = self.strategy_state
+            data['relative_drivers'] = relative_table.drivers
+
+            # Session clock going back = session restarted
+            now = scoring.scoringInfo.mCurrentET
+            if self._lmu_last_et is not None and now < self._lmu_last_et - 1.0:
+                self._lmu_epoch += 1
+            self._lmu_last_et = now
+            wear = tuple(wheel.mWear for wheel in player.mWheels)
+            self._update_session({
+                "timestamp": data['timestamp'],
+                "lap_dist_pct": lap_dist_pct,
+                "sector": lmu_sector(player_scoring.mSector),
+                "in_pits": player_scoring.mInPits,
+                "flag": lmu_flag(
+                    scoring.scoringInfo.mGamePhase, player_scoring.mFlag,
+                    bool(scoring.scoringInfo.mSectorFlag[player_scoring.mSector % 3])
+                ),
+                "session": f"lmu:{self._lmu_epoch}:{scoring.scoringInfo.mSession}:{self.track}",
+                "track": self.track,
+                "car": self.car,
+                "fuel": player.mFuel,
+                "wear": wear
+            })
+            data['flag_state'] = self.session_events.flag
+            self._apply_consumption(data, player.mFuel, laps_to_go, player.mFuelCapacity)
+
+            self._apply_delta(data)
+            self._apply_mistakes(data, lockup=lmu_lockup(player.mWheels), yaw_rate=player.mLocalRot.y)
+            self._apply_ghost(data)
+            self.lap_recorder.add_frame(data)
+            self.session_recorder.add_frame(data)
+
             self.latest_data = data
             self._emit(data)
 
@@ -356,6 +699,7 @@ class TelemetryEngine:
             except:
                 pass
             self.lmu = None
+            self.session_events.end()
 
 
     def _process_iracing(self):
@@ -371,6 +715,7 @@ class TelemetryEngine:
         except:
              self.connected = False
              self.game_running = None
+             self.session_events.end()
              return
 
         try:
@@ -412,12 +757,48 @@ class TelemetryEngine:
             hw_events = hardware_engine.process(data)
             data['hardware'] = hw_events
 
+            # iRacing has no live tire wear (only measured in the pits)
+            laps_to_go = self.ir['SessionLapsRemainEx']
+            if laps_to_go is None or laps_to_go < 0 or laps_to_go >= 32767:
+                laps_to_go = None
+            fuel = self.ir['FuelLevel']
+            fuel_pct = self.ir['FuelLevelPct']
+            self._update_session({
+                "timestamp": data['timestamp'],
+                "lap_dist_pct": data['lap_dist_pct'],
+                "in_pits": self.ir['OnPitRoad'],
+                "flag": iracing_flag(self.ir['SessionFlags'] or 0),
+                "session": f"iracing:{self._iracing_subsession}:{self.ir['SessionNum']}:{self.track}",
+                "track": self.track,
+                "car": self.car,
+                "fuel": fuel
+            })
+            data['flag_state'] = self.session_events.flag
+            self._apply_consumption(data, fuel, laps_to_go, fuel / fuel_pct if fuel_pct else None)
+
+            # No scoring event in iRacing: snapshot the CarIdx arrays at a fixed rate
+            now = self.ir['SessionTime']
+            if self._scoring_stamp is None or now < self._scoring_stamp or now - self._scoring_stamp >= SCORING_INTERVAL:
+                self._scoring_stamp = now
+                self._on_iracing_scoring(now, laps_to_go)
+            if self.strategy_state:
+                data['strategy'] = self.strategy_state
+            data['relative_drivers'] = relative_table.drivers
+
+            self._apply_delta(data)
+            # No per-wheel rotation in iRacing's live telemetry: yaw rate only
+            self._apply_mistakes(data, yaw_rate=self.ir['YawRate'])
+            self._apply_ghost(data)
+            self.lap_recorder.add_frame(data)
+            self.session_recorder.add_frame(data)
+
             self.latest_data = data
             self._emit(data)
         except Exception as e:
             logger.error(f"Telemetry Error: {e}")
             self.connected = False
             self.game_running = None
+            self.session_events.end()
 
     def _process_mock(self):
         # Mock Data Generator for Mac Development
@@ -473,11 +854,6 @@ class TelemetryEngine:
         # Speed Logic
         speed = (abs(math.sin(t * 0.5)) * 200) + random.uniform(-2, 2)
         
-        # Lap Prediction
-        base_lap = 94.0
-        predicted_lap = base_lap + (math.sin(t * 0.2) * 0.5) 
-        potential_lap = base_lap - 0.8 
-        
         # Coach Audio
         coach_msg = None
         if self.manual_state.get('coach_audio'):
@@ -492,21 +868,11 @@ class TelemetryEngine:
             { "pos": "P5", "car_idx": 12, "name": "Max Ver", "gap": 5.2, "ir": "8.2k", "sr": "A 4.99", "class_color": "white", "is_lapped": False },
             { "pos": "P6", "car_idx": 4,  "name": "Lando No", "gap": 2.1, "ir": "7.5k", "sr": "A 3.50", "class_color": "white", "is_lapped": False },
             { "pos": "P7", "car_idx": 44, "name": "Lew Ham",  "gap": 0.8, "ir": "9.0k", "sr": "A 4.99", "class_color": "red", "is_lapped": False },
+            { "pos": "P8", "car_idx": 0,  "name": "You",      "gap": 0.0, "ir": "6.1k", "sr": "B 3.20", "class_color": "white", "is_lapped": False, "is_player": True },
         ]
         
-        # Fuel Strategy
-        mock_fuel_level = 50 - (t % 50)
-        box_call = mock_fuel_level < 5.0
-
-        fuel_strategy = {
-            "fuel_level": mock_fuel_level,
-            "cons_per_lap": 2.5,
-            "laps_remaining": 12,
-            "fuel_to_add": max(0, 32.0 - mock_fuel_level),
-            "box_this_lap": box_call
-        }
-        if box_call and (int(t) % 5 == 0):
-             coach_msg = "Box box, box box. Low fuel."
+        # Fuel: 2.5 L per 20 s mock lap, refuelled every 20 laps
+        mock_fuel_level = 50 - ((t / 20) % 20) * 2.5
 
         # Trail Braking
         steering_val = abs(math.sin(t * 0.3))
@@ -544,8 +910,11 @@ class TelemetryEngine:
             
         # Strategy Logic
         mock_dist = (t * 0.05) % 1.0
-        tire_pred = strategy_engine.predict_tire_pressures(current_temp=25 + (mock_dist * 5)) 
-        pit_alert = strategy_engine.analyze_pit_window(gap_ahead=2.5, gap_behind=1.5, laps_remaining=20)
+        tire_pred = strategy_engine.predict_tire_pressures(25 + (mock_dist * 5), strategy_sessions.get(LIVE_SESSION))
+        pit_alert = strategy_engine.analyze_pit_window(
+            gap_ahead=2.5, gap_behind=1.5, laps_remaining=20,
+            own_deg=(t % 120) / 60, rival_ahead_deg=(t % 90) / 30
+        )
         lift_coast = strategy_engine.calculate_lift_coast(mock_dist)
 
         data = {
@@ -564,12 +933,9 @@ class TelemetryEngine:
             "ar_apex_corridor": ar_apex_corridor,
             "ar_lift_coast": lift_coast,
             "ghost_data": ghost_data,
-            "predicted_lap": predicted_lap,
-            "potential_lap": potential_lap,
             "coach_msg": coach_msg,
             "relative_drivers": relative_drivers,
             "bio": iot_engine.get_data(),
-            "fuel_strategy": fuel_strategy, 
             "radar_cars": radar_cars,
             "setup_suggestion": setup_suggestion, 
             "strategy": {
@@ -580,23 +946,30 @@ class TelemetryEngine:
             "timestamp": t
         }
         
-        # Neural Report
-        if 40.0 < (t % 60) < 40.05:
-            # Generate Report (Simplified)
-            report_data = {
-                "lap_time": "1:34.215",
-                "pilot_score": int(70 + random.uniform(0, 25)),
-                "mistakes": [{"corner": "T1", "feedback": "Missed Apex", "time_lost": 0.2}],
-                "traces": { "speed_you": [100]*20, "speed_ref": [110]*20 }
-            }
-            report_data["bio"] = iot_engine.get_data()
-            self._emit_report(report_data)
-
         # Hardware & IoT Processing
         hw_events = hardware_engine.process(data)
         data['hardware'] = hw_events
         
         iot_engine.update_mock_data(speed, brake_val, 5000)
+        self.track, self.car = "Mock Track", "Mock Car"
+        self._update_session({
+            "timestamp": t,
+            "lap_dist_pct": data['lap_dist_pct'],
+            "in_pits": False,
+            "flag": data['flag_state'],
+            "session": "mock",
+            "track": self.track,
+            "car": self.car,
+            "fuel": mock_fuel_level
+        })
+        self._apply_consumption(data, mock_fuel_level, laps_to_go=12, fuel_capacity=50.0)
+        if data['fuel_strategy']['box_this_lap'] and not data['coach_msg'] and (int(t) % 5 == 0):
+             data['coach_msg'] = "Box box, box box. Low fuel."
+        self._apply_delta(data)
+        self._apply_mistakes(data)
+        self._apply_ghost(data)
+        self.lap_recorder.add_frame(data)
+        self.session_recorder.add_frame(data)
         
         self.latest_data = data
         self._emit(data)
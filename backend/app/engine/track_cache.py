@@ -0,0 +1,241 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.engine.corners import detect_corners, braking_zones, lift_zones
+from app.engine.lap_store import lap_store, CHANNELS, SECTOR_BOUNDS
+
+TRACKS_DIR = Path("data/tracks")
+
+# Bump when the artifact format or the distance grid changes
+LAYOUT_VERSION = 1
+
+
+def _artifact_path(key):
+    track, car, layout_version = key
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{track}__{car}").strip("_")
+    return TRACKS_DIR / f"{slug}__v{layout_version}.npz"
+
+
+def _nbytes(artifacts):
+    size = sum(a.nbytes for a in artifacts["reference"].values())
+    for name in ("corners", "braking_zones", "lift_zones", "best_sectors"):
+        size += artifacts[name].nbytes
+    return size
+
+
+def build_artifacts(track, car):
+    """
+    Derives the per-track/car artifacts from recorded laps.
+
+    Returns:
+        dict: reference (channels), corners, braking_zones, lift_zones,
+        best_sectors and meta - or None if no valid lap is recorded.
+    """
+    from app.engine.analysis import analysis_engine
+
+    history = [
+        lap for lap in analysis_engine.get_history()
+        if lap.get("lap_id") and lap.get("valid") and lap.get("track") == track and lap.get("car") == car
+    ]
+    if not history:
+        return None
+
+    found, laps = lap_store.load_many([lap["lap_id"] for lap in history])
+    if laps is None:
+        return None
+    times = {lap["lap_id"]: lap["time"] for lap in history}
+    lap_times = np.array([times[lap_id] for lap_id in found])
+
+    best = int(np.argmin(lap_times))
+    reference = {name: laps[name][best] for name in CHANNELS}
+
+    # Sector times of every stored lap (last sector ends at the line)
+    closed = np.concatenate([laps["time"], lap_times[:, None]], axis=1)
+    best_sectors = np.diff(closed[:, SECTOR_BOUNDS], axis=1).min(axis=0)
+
+    return {
+        "reference": reference,
+        "corners": detect_corners(reference),
+        "braking_zones": braking_zones(reference),
+        "lift_zones": lift_zones(reference),
+        "best_sectors": best_sectors.astype(np.float64),
+        "meta": {
+            "track": track,
+            "car": car,
+            "reference_lap_id": found[best],
+            "reference_lap_time": float(lap_times[best])
+        }
+    }
+
+
+def save_artifacts(key, artifacts):
+    """
+    Writes artifacts as one compressed .npz (metadata stored as a JSON string).
+    The file is replaced atomically, so other processes never load a half-written one.
+    """
+    TRACKS_DIR.mkdir(parents=True, exist_ok=True)
+    arrays = {f"ref_{name}": values for name, values in artifacts["reference"].items()}
+    for name in ("corners", "braking_zones", "lift_zones", "best_sectors"):
+        arrays[name] = artifacts[name]
+    arrays["meta"] = np.array(json.dumps(artifacts["meta"]))
+    path = _artifact_path(key)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+def disk_version():
+    """Changes whenever an artifacts file is written (the rename updates the directory)."""
+    try:
+        return TRACKS_DIR.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_artifacts(key):
+    path = _artifact_path(key)
+    if not path.exists():
+        return None
+    with np.load(path) as f:
+        return {
+            "reference": {name: f[f"ref_{name}"] for name in CHANNELS},
+            "corners": f["corners"],
+            "braking_zones": f["braking_zones"],
+            "lift_zones": f["lift_zones"],
+            "best_sectors": f["best_sectors"],
+            "meta": json.loads(str(f["meta"]))
+        }
+
+
+class TrackArtifactCache:
+    """
+    LRU cache of per-track/car artifacts keyed by (track, car, layout version).
+
+    Artifacts are loaded from disk (or built from recorded laps and then
+    persisted) on a background worker, so callers on the capture thread use
+    peek() and never wait on I/O. An invalidated entry keeps being served
+    by peek() until its rebuild lands. Entries are evicted least-recently-
+    used once the memory budget is exceeded.
+    """
+
+    def __init__(self, memory_budget_mb=64):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.memory_used = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._missing = set()   # Keys with nothing recorded yet (avoid rebuilding every frame)
+        self._pending = {}      # Key -> Future of the background load
+        self._stale = set()     # Keys whose entry is being rebuilt (still served by peek)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="track-cache")
+
+    def peek(self, track, car, layout_version=LAYOUT_VERSION):
+        """
+        Non-blocking lookup. Schedules a background load on a miss and
+        returns None; returns the previous artifacts while a rebuild runs.
+        """
+        key = (track, car, layout_version)
+        with self._lock:
+            artifacts = self._entries.get(key)
+            if artifacts is not None:
+                self._entries.move_to_end(key)
+                return artifacts
+            if key not in self._missing:
+                self._schedule(key)
+        return None
+
+    def get(self, track, car, layout_version=LAYOUT_VERSION, timeout=None):
+        """
+        Blocking lookup for API/analysis code (waits for a pending rebuild).
+        Never call it from the capture thread. Returns None if nothing is recorded.
+        """
+        key = (track, car, layout_version)
+        with self._lock:
+            artifacts = self._entries.get(key)
+            if artifacts is not None and key not in self._stale:
+                self._entries.move_to_end(key)
+                return artifacts
+            if key in self._missing:
+                return None
+            future = self._schedule(key)
+        return future.result(timeout=timeout)
+
+    def invalidate(self, track, car, layout_version=LAYOUT_VERSION):
+        """
+        Rebuilds the artifacts of a track/car in the background (e.g. on a
+        new personal best). peek() keeps returning the old ones until then.
+        """
+        key = (track, car, layout_version)
+        with self._lock:
+            if key in self._entries:
+                self._stale.add(key)
+            self._missing.discard(key)
+            self._schedule(key, rebuild=True)
+
+    def clear(self):
+        """Drops every in-memory entry (disk files are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._missing.clear()
+            self._stale.clear()
+            self.memory_used = 0
+
+    def _schedule(self, key, rebuild=False):
+        # Caller holds the lock
+        future = self._pending.get(key)
+        if future is None or rebuild:
+            future = self._executor.submit(self._load, key, rebuild)
+            self._pending[key] = future
+        return future
+
+    def _load(self, key, rebuild):
+        artifacts = None
+        try:
+            if not rebuild:
+                artifacts = load_artifacts(key)
+            if artifacts is None:
+                artifacts = build_artifacts(key[0], key[1])
+                if artifacts is not None:
+                    save_artifacts(key, artifacts)
+        except Exception as e:
+            logger.error(f"Track Cache: failed to load {key}: {e}")
+
+        with self._lock:
+            if not rebuild and key in self._stale:
+                # A rebuild queued behind this load (single worker, FIFO) supersedes it
+                return artifacts
+            self._pending.pop(key, None)
+            self._stale.discard(key)
+            self._evict(key)
+            if artifacts is None:
+                self._missing.add(key)
+            else:
+                self._insert(key, artifacts)
+        return artifacts
+
+    def _insert(self, key, artifacts):
+        size = _nbytes(artifacts)
+        self._entries[key] = artifacts
+        self._sizes[key] = size
+        self.memory_used += size
+        while self.memory_used > self.memory_budget and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._evict(oldest)
+
+    def _evict(self, key):
+        if self._entries.pop(key, None) is not None:
+            self.memory_used -= self._sizes.pop(key)
+
+
+track_cache = TrackArtifactCache(memory_budget_mb=settings.TRACK_CACHE_MB)
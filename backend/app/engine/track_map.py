@@ -0,0 +1,188 @@
+import heapq
+import math
+
+import numpy as np
+
+EARTH_RADIUS = 6371000.0
+RESAMPLE_POINTS = 1000      # Per-lap samples the centerline is fused from
+SMOOTH_POINTS = 9           # Circular moving average over the fused centerline (GPS jitter)
+MAX_POINTS = 400            # Upper bound of the simplified centerline
+TOLERANCE = 1.0             # m, Douglas-Peucker stops once every dropped point is this close
+CELL_SIZE = 25.0            # m, spatial grid resolution
+MAX_OFFSET = 40.0           # m, fixes farther than this from the centerline are off track
+
+
+def local_xy(lat, lon, origin=None):
+    """
+    Equirectangular projection (meters) around origin (lat, lon), default
+    the first fix. Accurate to well under a meter over a circuit.
+    """
+    lat0, lon0 = origin if origin is not None else (lat[0], lon[0])
+    x = np.radians(np.asarray(lon) - lon0) * math.cos(math.radians(lat0)) * EARTH_RADIUS
+    y = np.radians(np.asarray(lat) - lat0) * EARTH_RADIUS
+    return x, y
+
+
+def _deviation(x, y, a, b):
+    # Distance of points a+1..b-1 from the chord a-b (from point a if the chord is degenerate)
+    dx, dy = x[b] - x[a], y[b] - y[a]
+    px, py = x[a + 1:b] - x[a], y[a + 1:b] - y[a]
+    chord = math.hypot(dx, dy)
+    if chord < 1e-9:
+        return np.hypot(px, py)
+    return np.abs(px * dy - py * dx) / chord
+
+
+def simplify(x, y, max_points=MAX_POINTS, tolerance=TOLERANCE):
+    """
+    Douglas-Peucker, top-down with a priority queue: the span with the
+    largest deviation is split first, so stopping at max_points keeps the
+    most significant vertices (a plain recursive DP can't bound the count).
+
+    Returns:
+        np.ndarray: Indices of the kept points (sorted, first and last included).
+    """
+    n = len(x)
+    if n <= 2:
+        return np.arange(n)
+    keep = [0, n - 1]
+    heap = []
+
+    def push(a, b):
+        if b - a < 2:
+            return
+        d = _deviation(x, y, a, b)
+        i = int(np.argmax(d))
+        if d[i] > tolerance:
+            heapq.heappush(heap, (-d[i], a, b, a + 1 + i))
+
+    push(0, n - 1)
+    while heap and len(keep) < max_points:
+        _, a, b, i = heapq.heappop(heap)
+        keep.append(i)
+        push(a, i)
+        push(i, b)
+    return np.sort(np.array(keep))
+
+
+class TrackMap:
+    """
+    Closed track centerline (local meters) with a uniform grid index over
+    its segments.
+
+    Every segment is registered in each cell within MAX_OFFSET of it, so a
+    fix only tests the few segments of its own cell: locate() is O(1) in
+    the number of centerline points.
+
+    Args:
+        origin (tuple): (lat, lon) of the projection origin (start/finish).
+        points (np.ndarray): [N, 2] centerline, first point == last point.
+    """
+
+    def __init__(self, origin, points, cell_size=CELL_SIZE):
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.points = np.asarray(points, dtype=np.float64)
+        self.cell_size = cell_size
+
+        self._a = self.points[:-1]
+        self._seg = np.diff(self.points, axis=0)
+        self._seg_len2 = np.maximum((self._seg ** 2).sum(axis=1), 1e-12)
+        seg_len = np.sqrt(self._seg_len2)
+        self.distance = np.concatenate([[0.0], np.cumsum(seg_len)])
+        self.length = float(self.distance[-1])
+
+        # Grid: segment bounding boxes grown by MAX_OFFSET -> covered cells (CSR layout)
+        self._lo = self.points.min(axis=0) - MAX_OFFSET
+        self._shape = np.ceil((self.points.max(axis=0) + MAX_OFFSET - self._lo) / cell_size).astype(np.int64) + 1
+        lo_cells = np.floor((np.minimum(self._a, self.points[1:]) - MAX_OFFSET - self._lo) / cell_size).astype(np.int64)
+        hi_cells = np.floor((np.maximum(self._a, self.points[1:]) + MAX_OFFSET - self._lo) / cell_size).astype(np.int64)
+        cells, segments = [], []
+        for i, ((x0, y0), (x1, y1)) in enumerate(zip(lo_cells, hi_cells)):
+            gx, gy = np.meshgrid(np.arange(x0, x1 + 1), np.arange(y0, y1 + 1), indexing="ij")
+            cells.append((gx * self._shape[1] + gy).ravel())
+            segments.append(np.full(gx.size, i))
+        cells, segments = np.concatenate(cells), np.concatenate(segments)
+        order = np.argsort(cells, kind="stable")
+        self._cell_segments = segments[order]
+        self._cell_start = np.searchsorted(cells[order], np.arange(self._shape[0] * self._shape[1] + 1))
+
+    def locate(self, lat, lon):
+        """
+        Where is a GPS fix on track.
+
+        Returns:
+            tuple: (lap distance m, lap fraction, offset m from the centerline, left > 0),
+            or None off track.
+        """
+        x, y = local_xy(lat, lon, self.origin)
+        cx = int((x - self._lo[0]) // self.cell_size)
+        cy = int((y - self._lo[1]) // self.cell_size)
+        if not (0 <= cx < self._shape[0] and 0 <= cy < self._shape[1]):
+            return None
+        cell = cx * self._shape[1] + cy
+        candidates = self._cell_segments[self._cell_start[cell]:self._cell_start[cell + 1]]
+        if len(candidates) == 0:
+            return None
+
+        # Project onto every candidate segment, keep the closest
+        a, seg = self._a[candidates], self._seg[candidates]
+        px, py = x - a[:, 0], y - a[:, 1]
+        t = np.clip((px * seg[:, 0] + py * seg[:, 1]) / self._seg_len2[candidates], 0.0, 1.0)
+        ox, oy = px - t * seg[:, 0], py - t * seg[:, 1]
+        d2 = ox * ox + oy * oy
+        j = int(np.argmin(d2))
+        offset = math.sqrt(d2[j])
+        if offset > MAX_OFFSET:
+            return None
+        i = int(candidates[j])
+        distance = float(self.distance[i] + t[j] * (self.distance[i + 1] - self.distance[i]))
+        side = 1.0 if seg[j, 0] * py[j] - seg[j, 1] * px[j] >= 0 else -1.0
+        return distance, distance / self.length if self.length else 0.0, side * offset
+
+    def to_latlon(self):
+        """Centerline as [[lat, lon], ...] (for map display)."""
+        lat0, lon0 = self.origin
+        lat = lat0 + np.degrees(self.points[:, 1] / EARTH_RADIUS)
+        lon = lon0 + np.degrees(self.points[:, 0] / (EARTH_RADIUS * math.cos(math.radians(lat0))))
+        return np.round(np.column_stack([lat, lon]), 7).tolist()
+
+
+def build_track_map(columns, laps, resample=RESAMPLE_POINTS, max_points=MAX_POINTS):
+    """
+    Fuses GPS laps into one centerline: every lap is resampled at the same
+    lap fractions, the per-fraction median across laps is the centerline
+    (robust to an off-line lap), which is then smoothed and simplified.
+
+    Args:
+        columns (dict): Session channels with lat/lon.
+        laps (list): (start, end) sample indices, end = next start/finish crossing.
+
+    Returns:
+        TrackMap: None without a usable lap.
+    """
+    if not laps:
+        return None
+    lat, lon = columns["lat"], columns["lon"]
+    origin = (lat[laps[0][0]], lon[laps[0][0]])
+    x, y = local_xy(lat, lon, origin)
+
+    fractions = np.linspace(0.0, 1.0, resample, endpoint=False)
+    resampled = []
+    for a, b in laps:
+        lx, ly = x[a:b + 1], y[a:b + 1]
+        d = np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(lx), np.diff(ly)))])
+        if d[-1] <= 0:
+            continue
+        resampled.append(np.column_stack([np.interp(fractions * d[-1], d, lx), np.interp(fractions * d[-1], d, ly)]))
+    if not resampled:
+        return None
+
+    center = np.median(np.stack(resampled), axis=0)
+    # Residual jitter would zig-zag the line and inflate the lap length
+    half = SMOOTH_POINTS // 2
+    padded = np.vstack([center[-half:], center, center[:half]])
+    kernel = np.ones(SMOOTH_POINTS) / SMOOTH_POINTS
+    center = np.column_stack([np.convolve(padded[:, k], kernel, mode="valid") for k in range(2)])
+    center = np.vstack([center, center[:1]])
+    keep = simplify(center[:, 0], center[:, 1], max_points)
+    return TrackMap(origin, center[keep])
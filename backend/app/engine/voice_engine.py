@@ -157,11 +157,12 @@ class VoiceEngine:
         data = self.telemetry.latest_data
         drivers = data.get('relative_drivers', [])
         if drivers:
-            ahead = next((d for d in drivers if d['gap'] > 0), None)
+            # Nearest car ahead on track
+            ahead = min((d for d in drivers if d['gap'] > 0), key=lambda d: d['gap'], default=None)
             if ahead:
                 self._speak(f"Gap to {ahead['name']} is {ahead['gap']} seconds")
             else:
-                self._speak("You are leading")
+                self._speak("No car ahead")
         else:
             self._speak("No gap data")
 
@@ -0,0 +1,168 @@
+"""
+API database concurrency benchmark: the community endpoints on the async
+engine (aiosqlite, pooled, WAL) vs the previous sync handlers on the
+threadpool, under many concurrent clients.
+
+    cd backend && python -m benchmarks.db_concurrency [--clients 64] [--requests 2000]
+
+Small-response endpoints (setup by id, league list, entry submit) so the
+database layer dominates; serialization of the large lists is covered by
+benchmarks.json_responses. Runs against a throwaway database file; a busy
+thread stands in for the telemetry loop competing for the GIL.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import warnings
+
+os.environ["DATABASE_FILE"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import httpx
+import numpy as np
+from fastapi import APIRouter, Depends, FastAPI
+from sqlmodel import Session, SQLModel, select
+
+from app.core.database import engine, get_session
+from app.api.endpoints import community
+from app.engine.models.community import Setup, League, LeagueEntry, LeagueEntryCreate
+
+SETUPS = 300
+ENTRIES = 50
+WRITE_SHARE = 0.1
+
+
+# --- The handlers as they were before the async migration ---
+legacy = APIRouter()
+
+@legacy.get("/setups/{setup_id}")
+def read_setup(*, session: Session = Depends(get_session), setup_id: int):
+    return session.get(Setup, setup_id)
+
+@legacy.get("/leagues/")
+def read_leagues(*, session: Session = Depends(get_session), offset: int = 0, limit: int = 100):
+    return session.exec(select(League).offset(offset).limit(limit)).all()
+
+@legacy.post("/leagues/submit")
+def submit_league_entry(*, session: Session = Depends(get_session), entry: LeagueEntryCreate):
+    db_entry = LeagueEntry.from_orm(entry)
+    session.add(db_entry)
+    session.commit()
+    session.refresh(db_entry)
+    return db_entry
+
+
+def _seed():
+    SQLModel.metadata.create_all(engine)
+    rng = np.random.default_rng(0)
+    with Session(engine) as session:
+        league = League(name="Bench")
+        session.add(league)
+        for i in range(SETUPS):
+            session.add(Setup(name=f"setup {i}", car="GT3", track="Spa", author="bench", data_json="{}"))
+        session.commit()
+        session.refresh(league)
+        for i in range(ENTRIES):
+            session.add(LeagueEntry(
+                league_id=league.id, driver_name=f"driver {i}", lap_time=float(rng.uniform(120, 130)),
+                cleanliness_score=90.0, consistency_score=80.0
+            ))
+        session.commit()
+        return league.id
+
+
+async def _load(app, league_id, clients, requests):
+    rng = np.random.default_rng(1)
+    plan = rng.random(requests)
+    latencies = []
+    probes = []
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            start = time.perf_counter()
+            if plan[i] < WRITE_SHARE:
+                response = await client.post("/community/leagues/submit", json={
+                    "league_id": league_id, "driver_name": "bench", "lap_time": 125.0,
+                    "cleanliness_score": 90.0, "consistency_score": 80.0
+                })
+            elif plan[i] < 0.55:
+                response = await client.get(f"/community/setups/{int(plan[i] * 1e6) % SETUPS + 1}")
+            else:
+                response = await client.get("/community/leagues/")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+        queue = iter(range(requests))
+
+        async def worker():
+            for i in queue:
+                await one(i)
+
+        async def probe():
+            # Any other sync endpoint (e.g. mobile sync) waits for a free threadpool slot
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/probe")
+                probes.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    return requests / elapsed, p50, p99, np.percentile(np.array(probes) * 1000, 99)
+
+
+def _busy(stop, lateness):
+    # Stand-in for the 60 Hz telemetry thread; records how late each frame starts
+    period = 1 / 60
+    deadline = time.perf_counter()
+    while not stop.is_set():
+        lateness.append(max(0.0, time.perf_counter() - deadline))
+        sum(i * i for i in range(2000))
+        deadline += period
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+
+
+def main():
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    league_id = _seed()
+    apps = {}
+    for name, router in (("sync (threadpool)", legacy), ("async (aiosqlite)", community.router)):
+        app = FastAPI()
+        app.include_router(router, prefix="/community")
+        app.add_api_route("/probe", lambda: {})
+        apps[name] = app
+
+    async def run_all():
+        # One event loop for everything: the async engine's pool is bound to it
+        for name, app in apps.items():
+            await _load(app, league_id, args.clients, 100)   # warm-up
+            lateness = []
+            stop = threading.Event()
+            busy = threading.Thread(target=_busy, args=(stop, lateness), daemon=True)
+            busy.start()
+            rps, p50, p99, probe_p99 = await _load(app, league_id, args.clients, args.requests)
+            stop.set()
+            busy.join()
+            frame_p99 = np.percentile(np.array(lateness) * 1000, 99)
+            print(f"{name:<20} {rps:>8.0f} {p50:>8.1f} {p99:>8.1f} {probe_p99:>14.1f} {frame_p99:>15.1f}")
+
+    print(f"{args.clients} clients, {args.requests} requests ({WRITE_SHARE:.0%} writes), WAL on, {os.cpu_count()} CPUs\n")
+    print(f"{'handlers':<20} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'other def p99':>14} {'60Hz late p99':>15}")
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
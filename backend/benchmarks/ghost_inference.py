@@ -0,0 +1,109 @@
+"""
+GhostNet CPU inference benchmark: streaming step (carried LSTM state) vs
+re-running the full window every frame.
+
+    cd backend && python -m benchmarks.ghost_inference [--model ghost_v1.onnx] [--frames 2000]
+
+Without --model a randomly initialised GhostNet is exported to a temp dir
+(latency does not depend on the weights).
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import torch
+from loguru import logger
+
+from app.ai.ghost_model_arch import GhostNet, export_onnx
+from app.ai.ghost_runtime import GhostRuntime, ONNX_AVAILABLE, INFERENCE_THREADS
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def _timed(fn, frames, warmup=50):
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(frames)
+    for i in range(frames):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    return samples * 1000
+
+
+def _row(name, samples):
+    p50, p99 = np.percentile(samples, [50, 99])
+    status = "OK" if p99 < FRAME_BUDGET_MS else "OVER BUDGET"
+    print(f"{name:<34} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms   {status}")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="ghost_v1.onnx / .pth (default: random weights)")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--window", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=INFERENCE_THREADS)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    tmp = tempfile.mkdtemp()
+    model = GhostNet().eval()
+    if args.model and args.model.endswith(".pth"):
+        model.load_state_dict(torch.load(args.model, map_location="cpu"))
+    pth_path = os.path.join(tmp, "ghost.pth")
+    torch.save(model.state_dict(), pth_path)
+    onnx_path = args.model if args.model and args.model.endswith(".onnx") else export_onnx(model, os.path.join(tmp, "ghost.onnx"), args.window)
+
+    rng = np.random.default_rng(0)
+    stream = rng.standard_normal((args.frames + args.window, model.lstm.input_size)).astype(np.float32)
+    print(f"\nGhostNet CPU inference, {args.threads} thread(s), window {args.window}, budget {FRAME_BUDGET_MS:.1f} ms/frame\n")
+
+    # 1. Windowed: every frame re-runs the LSTM over the last `window` frames
+    frame = [args.window]
+
+    def torch_window():
+        i = frame[0] = frame[0] + 1 if frame[0] < len(stream) else args.window
+        with torch.inference_mode():
+            model(torch.from_numpy(stream[i - args.window:i])[None])
+
+    windowed = _row("torch eager, full window", _timed(torch_window, args.frames))
+
+    runtimes = []
+    if ONNX_AVAILABLE:
+        runtimes.append(("onnxruntime", GhostRuntime.load(onnx_path, args.threads)))
+    runtimes.append(("torchscript", GhostRuntime.load(pth_path, args.threads)))
+
+    for name, runtime in runtimes:
+        def window_call():
+            i = frame[0] = frame[0] + 1 if frame[0] < len(stream) else args.window
+            runtime.predict_window(stream[i - args.window:i])
+
+        _row(f"{name}, full window", _timed(window_call, args.frames))
+
+        # 2. Streaming: one LSTM step per frame, (h, c) carried between calls
+        runtime.reset()
+        pos = [0]
+
+        def step_call():
+            pos[0] = (pos[0] + 1) % len(stream)
+            runtime.step(stream[pos[0]])
+
+        streaming = _row(f"{name}, streaming step", _timed(step_call, args.frames))
+        print(f"{'':<34} {windowed / streaming:.1f}x faster than the eager window")
+
+        # Same result as the window when the stream starts with it
+        runtime.reset()
+        for x in stream[:args.window]:
+            out = runtime.step(x)
+        diff = np.abs(out - runtime.predict_window(stream[:args.window])).max()
+        print(f"{'':<34} max |step - window| over {args.window} frames: {diff:.2e}\n")
+
+    if args.model is None:
+        logger.info(f"Benchmark models left in {tmp}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+GhostNet CPU variants: accuracy vs latency of the fp32, fused and int8
+exports across intra-op thread counts, and the variant the runtime picks.
+
+    cd backend && python -m benchmarks.ghost_variants [--model ghost_v1.onnx] [--threads 1 2 4]
+
+Held-out windows come from the validation split of the ghost dataset
+(data/ghost_dataset); without one, random windows are used and only the
+difference to fp32 is meaningful. Without --model a randomly initialised
+GhostNet is exported to a temp dir.
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from app.ai.ghost_dataset import GhostDataset, DATASET_DIR, FEATURES
+from app.ai.ghost_optimize import optimize_ghost, held_out_windows, THREAD_COUNTS, BENCH_FRAMES
+from app.ai.ghost_runtime import select_variant
+from app.core.config import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="fp32 ONNX export (default: random weights)")
+    parser.add_argument("--dataset", default=str(DATASET_DIR))
+    parser.add_argument("--threads", type=int, nargs="+", default=list(THREAD_COUNTS))
+    parser.add_argument("--frames", type=int, default=BENCH_FRAMES)
+    parser.add_argument("--max-loss", type=float, default=settings.GHOST_MAX_ACCURACY_LOSS)
+    args = parser.parse_args()
+
+    model_path = args.model
+    if model_path is None:
+        from app.ai.ghost_model_arch import GhostNet, export_onnx
+        model_path = export_onnx(GhostNet(input_size=len(FEATURES)).eval(), os.path.join(tempfile.mkdtemp(), "ghost.onnx"))
+
+    windows, targets = None, None
+    if os.path.exists(os.path.join(args.dataset, "meta.json")):
+        windows, targets = held_out_windows(GhostDataset(args.dataset, split="val"))
+    if windows is None:
+        print("No held-out laps, using random windows (accuracy = difference to fp32 only)")
+        windows = np.random.default_rng(0).standard_normal((1024, 50, len(FEATURES))).astype(np.float32)
+
+    report = optimize_ghost(model_path, windows, targets, thread_counts=args.threads, frames=args.frames)
+
+    print(f"\n{len(windows)} held-out windows, {report['cpu_count']} CPUs, streaming step latency p50 / p99 (ms)\n")
+    header = f"{'variant':<8} {'size KB':>8} {'loss':>9} {'max diff':>9} {'mse':>9}"
+    print(header + "".join(f"{f'{t} thr':>18}" for t in args.threads))
+    for name, entry in report["variants"].items():
+        mse = "-" if entry["mse"] is None else f"{entry['mse']:.5f}"
+        row = f"{name:<8} {entry['size_kb']:>8} {entry['accuracy_loss']:>9.5f} {entry['max_abs_diff']:>9.5f} {mse:>9}"
+        for t in args.threads:
+            latency = entry["latency_ms"][str(t)]
+            row += f"{latency['p50']:>9.4f} / {latency['p99']:<6.4f}"
+        print(row)
+
+    name, threads, p99 = select_variant(report, args.max_loss)
+    print(f"\nSelected (max loss {args.max_loss}): {name}, {threads} thread(s), p99 {p99:.4f} ms/step")
+
+
+if __name__ == "__main__":
+    main()
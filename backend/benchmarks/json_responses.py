@@ -0,0 +1,145 @@
+"""
+REST serialization benchmark for the large community lists: FastAPI's
+default path (response_model re-validation, stdlib json) vs
+model_list_response (rows straight to orjson), plus the bytes on the wire
+with gzip/brotli.
+
+    cd backend && python -m benchmarks.json_responses [--rows 500] [--requests 200]
+
+Runs against a throwaway database file.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import warnings
+from typing import List
+
+os.environ["DATABASE_FILE"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import httpx
+import numpy as np
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_response_field
+from sqlmodel import Session, SQLModel, select
+
+from app.core.compression import CompressionMiddleware, BROTLI_AVAILABLE
+from app.core.database import engine, get_session
+from app.core.responses import FastJSONResponse, model_list_response, ORJSON_AVAILABLE
+from app.api.endpoints import community
+from app.engine.models.community import Setup, SetupRead, League, LeagueEntry, LeagueEntryRead
+
+
+# --- The list handlers as they were: response_model does the serialization ---
+legacy = APIRouter()
+
+@legacy.get("/setups/", response_model=List[SetupRead])
+def read_setups(*, session: Session = Depends(get_session), offset: int = 0, limit: int = 100):
+    return session.exec(select(Setup).offset(offset).limit(limit)).all()
+
+@legacy.get("/leagues/{league_id}/entries", response_model=List[LeagueEntryRead])
+def read_league_entries(*, session: Session = Depends(get_session), league_id: int):
+    entries = session.exec(select(LeagueEntry).where(LeagueEntry.league_id == league_id)).all()
+    return sorted(entries, key=lambda x: x.lap_time)
+
+
+def _seed(rows):
+    SQLModel.metadata.create_all(engine)
+    rng = np.random.default_rng(0)
+    with Session(engine) as session:
+        league = League(name="Bench", description="Weekly GT3 hotlap league")
+        session.add(league)
+        for i in range(rows):
+            data = {"wing": int(rng.integers(1, 12)), "pressures": rng.uniform(26, 28, 4).round(1).tolist(),
+                    "arb": [int(rng.integers(1, 8)), int(rng.integers(1, 8))], "brake_bias": 56.5}
+            session.add(Setup(name=f"Spa qualifying {i}", car="Porsche 911 GT3 R", track="Spa-Francorchamps",
+                              author=f"driver{i % 40}", description="Low downforce, stable on the brakes",
+                              data_json=json.dumps(data)))
+        session.commit()
+        session.refresh(league)
+        for i in range(rows):
+            session.add(LeagueEntry(
+                league_id=league.id, driver_name=f"driver {i}", lap_time=float(rng.uniform(137, 142)),
+                cleanliness_score=float(rng.uniform(70, 100)), consistency_score=float(rng.uniform(60, 100))
+            ))
+        session.commit()
+        return league.id
+
+
+def _encode_times(league_id, rows, repeats=30):
+    # In-process: rows already loaded, only the serialization differs
+    with Session(engine) as session:
+        lists = {
+            "setups": (session.exec(select(Setup).limit(rows)).all(), SetupRead),
+            "league entries": (session.exec(select(LeagueEntry).where(LeagueEntry.league_id == league_id)).all(),
+                               LeagueEntryRead),
+        }
+    results = {}
+    for name, (items, model) in lists.items():
+        field = create_response_field(name="response", type_=List[model])
+
+        def default_path():
+            value, _ = field.validate(items, {}, loc=("response",))
+            return JSONResponse(field.serialize(value)).body
+
+        def fast_path():
+            return model_list_response(items, model).body
+
+        timings = []
+        for fn in (default_path, fast_path):
+            fn()
+            start = time.perf_counter()
+            for _ in range(repeats):
+                body = fn()
+            timings.append(((time.perf_counter() - start) / repeats * 1000, len(body)))
+        results[name] = timings
+    return results
+
+
+async def _wire(apps, league_id, rows, requests):
+    paths = {"setups": f"/community/setups/?limit={rows}", "league entries": f"/community/leagues/{league_id}/entries"}
+    encodings = ["identity", "gzip"] + (["br"] if BROTLI_AVAILABLE else [])
+    for label, app in apps.items():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for name, path in paths.items():
+                for encoding in encodings:
+                    headers = {"Accept-Encoding": encoding}
+                    response = await client.get(path, headers=headers)
+                    wire = len(response.content) if encoding == "identity" else int(response.headers["content-length"])
+                    start = time.perf_counter()
+                    for _ in range(requests):
+                        (await client.get(path, headers=headers)).raise_for_status()
+                    ms = (time.perf_counter() - start) / requests * 1000
+                    print(f"{label:<10} {name:<16} {encoding:<9} {wire / 1024:>9.1f} {ms:>9.2f}")
+
+
+def main():
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    league_id = _seed(args.rows)
+    print(f"{args.rows} rows per list, orjson {'on' if ORJSON_AVAILABLE else 'off'}, "
+          f"brotli {'on' if BROTLI_AVAILABLE else 'off'}\n")
+
+    print(f"{'list':<16} {'default ms':>11} {'fast ms':>9} {'speedup':>8} {'KiB':>7}")
+    for name, ((slow, size), (fast, _)) in _encode_times(league_id, args.rows).items():
+        print(f"{name:<16} {slow:>11.2f} {fast:>9.2f} {slow / fast:>7.1f}x {size / 1024:>7.1f}")
+
+    before = FastAPI()
+    before.include_router(legacy, prefix="/community")
+    after = FastAPI(default_response_class=FastJSONResponse)
+    after.add_middleware(CompressionMiddleware)
+    after.include_router(community.router, prefix="/community")
+
+    print(f"\n{'app':<10} {'list':<16} {'encoding':<9} {'wire KiB':>9} {'ms/req':>9}")
+    asyncio.run(_wire({"before": before, "after": after}, league_id, args.rows, args.requests))
+
+
+if __name__ == "__main__":
+    main()
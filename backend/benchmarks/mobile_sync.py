@@ -0,0 +1,94 @@
+"""
+Mobile sync benchmark: payload size and server-side cost of one phone
+session in the row JSON format vs the columnar wire format, and the bulk
+store into an in-memory session DB.
+
+    cd backend && python -m benchmarks.mobile_sync [--minutes 30] [--hz 20]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.engine.models.mobile import MobileSyncChunk, MobileSample
+from app.engine.mobile_sync import (
+    CHANNELS, columns_from_points, decode_columnar, encode_columnar, validate_columns, store_chunk
+)
+
+
+def _session(points, hz):
+    # A car lapping a ~2 km loop: smooth speed/pedals, GPS on a circle
+    rng = np.random.default_rng(0)
+    t = np.arange(points) / hz
+    phase = 2 * np.pi * t / 90.0
+    speed = 30 + 15 * np.sin(phase * 7) + rng.normal(0, 0.2, points)
+    throttle = np.clip(0.5 + 0.5 * np.sin(phase * 7 + 0.3), 0, 1)
+    brake = np.clip(-np.sin(phase * 7 + 0.3), 0, 1)
+    return {
+        "time": np.round(t, 3),
+        "speed": np.round(np.abs(speed), 2),
+        "throttle": np.round(throttle, 3),
+        "brake": np.round(brake, 3),
+        "gear": np.clip(np.round(speed / 12), 1, 6),
+        "rpm": np.round(4000 + 60 * speed),
+        "lat": np.round(45.0 + 0.003 * np.sin(phase), 7),
+        "lon": np.round(7.0 + 0.004 * np.cos(phase), 7),
+    }
+
+
+def _timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--hz", type=float, default=20)
+    args = parser.parse_args()
+
+    points = int(args.minutes * 60 * args.hz)
+    session = _session(points, args.hz)
+
+    # Row format: what the endpoint parses, then the column extraction
+    rows = [
+        {name: (int(session[name][i]) if name in ("gear", "rpm") else float(session[name][i])) for name in CHANNELS}
+        for i in range(points)
+    ]
+    row_body = json.dumps({"session_id": "bench", "user_id": "bench", "data": rows})
+    _, row_ms = _timed(lambda: columns_from_points(json.loads(row_body)["data"]))
+
+    print(f"{points} points ({args.minutes:g} min @ {args.hz:g} Hz)\n")
+    print(f"{'format':<22} {'body KB':>9} {'parse+decode ms':>16}")
+    print(f"{'rows (JSON objects)':<22} {len(row_body) / 1024:>9.0f} {row_ms:>16.1f}")
+    for delta, compression in ((False, "none"), (True, "none"), (False, "zlib"), (True, "zlib")):
+        encoded = encode_columnar(session, delta=delta, compression=compression)
+        body = json.dumps({"session_id": "bench", "user_id": "bench", "columnar": {
+            "schema_version": 1, "points": points, "delta": delta, "compression": compression, "columns": encoded
+        }})
+
+        def decode():
+            columnar = json.loads(body)["columnar"]
+            return decode_columnar(columnar["columns"], points, 1, delta, compression)
+
+        decoded, ms = _timed(decode)
+        name = f"columnar{' delta' if delta else ''}{' zlib' if compression == 'zlib' else ''}"
+        print(f"{name:<22} {len(body) / 1024:>9.0f} {ms:>16.1f}")
+    assert all(np.allclose(decoded[name], session[name]) for name in CHANNELS)
+
+    _, validate_ms = _timed(lambda: validate_columns(decoded))
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[MobileSyncChunk.__table__, MobileSample.__table__])
+    with Session(engine) as db:
+        _, store_ms = _timed(lambda: store_chunk(db, "bench", "bench", 0, decoded), repeat=1)
+    print(f"\nvalidate {validate_ms:.1f} ms, store (one transaction) {store_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
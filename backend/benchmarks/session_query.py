@@ -0,0 +1,115 @@
+"""
+Historical telemetry query benchmark: a recorded 2 h, 60 Hz session
+served by the streaming endpoint (memory-mapped, chunked NDJSON/binary)
+vs loading the whole session and answering with one JSON document.
+
+    cd backend && python -m benchmarks.session_query [--hours 2]
+
+Measures the server side (encoding generators, no HTTP): time, time to
+the first chunk, bytes and peak Python heap (tracemalloc; mapped file
+pages are page cache, not heap).
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from app.core.responses import FastJSONResponse
+from app.engine import session_recorder
+from app.engine.session_recorder import SessionRecorder, SessionRecording, CHANNELS
+from app.api.endpoints.telemetry import _ndjson, _binary
+
+HZ = 60
+LAP_SECONDS = 138.0
+QUERY_CHANNELS = ["time", "lap_dist_pct", "speed", "throttle", "brake"]
+
+
+def _record(hours):
+    recorder = SessionRecorder()
+    started = time.time()
+    session_id = recorder.start("Spa-Francorchamps", "Porsche 911 GT3 R", "bench", timestamp=started)
+    rng = np.random.default_rng(0)
+    frames = int(hours * 3600 * HZ)
+    lap = 0
+    last_pct = 0.0
+    for i in range(frames):
+        t = i / HZ
+        pct = (t % LAP_SECONDS) / LAP_SECONDS
+        if pct < last_pct:
+            recorder.on_lap_event({"lap": lap})
+            lap += 1
+        last_pct = pct
+        recorder.add_frame({
+            "timestamp": started + t, "lap_dist_pct": pct, "speed": 150 + 80 * np.sin(pct * 40),
+            "rpm": 7000.0, "gear": 4, "throttle": rng.random(), "brake": 0.0, "clutch": 0.0,
+            "steering_angle": 0.1, "delta": 0.05
+        })
+    recorder.close()
+    return session_id, frames
+
+
+def _measure(make_chunks):
+    start = time.perf_counter()
+    first = None
+    size = 0
+    for chunk in make_chunks():
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    # Second pass for the heap peak (tracemalloc slows allocation-heavy code down)
+    tracemalloc.start()
+    for chunk in make_chunks():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, first, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=2.0)
+    args = parser.parse_args()
+
+    session_recorder.SESSIONS_DIR = Path(tempfile.mkdtemp())
+    start = time.perf_counter()
+    session_id, frames = _record(args.hours)
+    record_us = (time.perf_counter() - start) / frames * 1e6
+    recording = SessionRecording.open(session_id)
+    file_mb = recording.frames * len(CHANNELS) * 4 / 1e6
+    print(f"{args.hours:g} h session: {frames} frames, {len(recording.meta['laps'])} laps, "
+          f"{file_mb:.1f} MB on disk, recording {record_us:.1f} us/frame (incl. synthetic frame)\n")
+
+    header = {"session_id": session_id, "channels": QUERY_CHANNELS, "rows": frames}
+    lap_rows = recording.row_range(lap=10)
+
+    def whole_document():
+        # Baseline: everything in memory, one JSON response
+        table = np.fromfile(session_recorder.SESSIONS_DIR / session_id / "frames.f32", dtype="<f4")
+        table = table.reshape(-1, len(CHANNELS))
+        columns = [CHANNELS.index(name) for name in QUERY_CHANNELS]
+        rows = [dict(zip(QUERY_CHANNELS, row)) for row in table[:, columns].tolist()]
+        yield FastJSONResponse(rows).body
+
+    cases = [
+        ("whole session, one JSON document", whole_document),
+        ("whole session, NDJSON stream", lambda: _ndjson(header, recording.iter_rows(QUERY_CHANNELS, 0, frames))),
+        ("whole session, binary stream", lambda: _binary(recording.iter_rows(QUERY_CHANNELS, 0, frames))),
+        ("whole session, 2000 points (mean)", lambda: _ndjson(header, recording.iter_rows(
+            QUERY_CHANNELS, 0, frames, max_points=2000, method="mean"))),
+        ("lap 10, braking zone 40-60%", lambda: _ndjson(header, recording.iter_rows(
+            QUERY_CHANNELS, *lap_rows, dist_from=0.4, dist_to=0.6))),
+        ("last 10 min, binary", lambda: _binary(recording.iter_rows(
+            QUERY_CHANNELS, *recording.row_range(t_from=args.hours * 3600 - 600)))),
+    ]
+    print(f"{'query':<36} {'total ms':>9} {'first ms':>9} {'MB out':>8} {'peak heap MB':>13}")
+    for name, make_chunks in cases:
+        elapsed, first, size, peak = _measure(make_chunks)
+        print(f"{name:<36} {elapsed * 1000:>9.1f} {first * 1000:>9.2f} {size / 1e6:>8.2f} {peak / 1e6:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Socket.IO fan-out benchmark: one driver's 60 Hz telemetry stream to many
+viewers, from a single process (in-memory manager) vs N workers on the
+built-in bus (app.core.fanout).
+
+    cd backend && python -m benchmarks.socketio_fanout [--viewers 400] [--workers 1 2 4] [--seconds 5]
+
+Viewers are simulated inside each worker's AsyncServer (per-viewer packet
+and send task, no sockets), so the numbers are the server-side cost of
+the fan-out. Reported latency: frame produced -> every viewer of a worker
+handed its packet (p50/p99 across workers and frames).
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import socketio
+
+from app.core.fanout import LocalBusManager, claim_telemetry_owner, start_fanout
+
+BUS_PORT = 18765
+HZ = 60
+
+
+def _mock_frame():
+    # A real mock-mode frame as TelemetryEngine emits it (its session recording goes to a temp dir)
+    from app.engine import session_recorder
+    from app.engine.telemetry import TelemetryEngine
+    session_recorder.SESSIONS_DIR = Path(tempfile.mkdtemp())
+    engine = TelemetryEngine(None, None)
+    frames = []
+    engine._emit = frames.append
+    for _ in range(3):
+        engine._process_mock()
+    return frames[-1]
+
+
+def _server(manager):
+    sio = socketio.AsyncServer(async_mode="asgi", client_manager=manager)
+
+    async def send(eio_sid, pkt):
+        pkt.encode()   # What engine.io does per recipient before the socket write
+
+    sio._send_eio_packet = send
+    return sio
+
+
+async def _connect_viewers(sio, viewers):
+    for v in range(viewers):
+        await sio.manager.connect(f"viewer{v}", "/")
+
+
+def _worker(viewers, seconds, results):
+    # Fan-out worker process: its own AsyncServer on the bus, latency per frame
+    async def run():
+        latencies = []
+        sio = _server(LocalBusManager(BUS_PORT))
+        original = sio.manager._handle_emit
+
+        async def timed(message):
+            await original(message)
+            data = message.get("data")
+            if isinstance(data, dict) and "produced" in data:
+                latencies.append(time.time() - data["produced"])
+
+        sio.manager._handle_emit = timed
+        start_fanout(sio, False)
+        await _connect_viewers(sio, viewers)
+        await asyncio.sleep(seconds + 2)
+        results.put(latencies)
+
+    asyncio.run(run())
+
+
+async def _owner(frame, viewers, workers, seconds, ready):
+    if workers == 1:
+        sio = _server(None)
+        hub = None
+    else:
+        _, hub = await claim_telemetry_owner("local", BUS_PORT)
+        sio = _server(LocalBusManager(BUS_PORT))
+        start_fanout(sio, True, relay=lambda event, data: None)
+    await _connect_viewers(sio, viewers)
+    await asyncio.to_thread(ready.wait)
+    await asyncio.sleep(0.5)
+    for _ in range(HZ):   # Warm-up second, not recorded
+        await sio.emit("telemetry_update", dict(frame))
+        await asyncio.sleep(1 / HZ)
+
+    latencies = []
+    lateness = []
+    period = 1 / HZ
+    deadline = time.perf_counter()
+    for _ in range(int(seconds * HZ)):
+        lateness.append(max(0.0, time.perf_counter() - deadline))
+        produced = time.time()
+        await sio.emit("telemetry_update", dict(frame, produced=produced))
+        latencies.append(time.time() - produced)
+        deadline += period
+        await asyncio.sleep(max(0.0, deadline - time.perf_counter()))
+    await asyncio.sleep(0.5)
+    if hub is not None:
+        hub.close()
+        await asyncio.sleep(0.1)   # Let the hub's connections see EOF
+    return latencies, lateness
+
+
+def _run(frame, viewers, workers, seconds):
+    per_worker = viewers // workers
+    results = mp.Queue()
+    ready = mp.Event()
+    procs = [mp.Process(target=_worker, args=(per_worker, seconds, results), daemon=True) for _ in range(workers - 1)]
+    for p in procs:
+        p.start()
+    ready.set()
+    owner_latencies, lateness = asyncio.run(_owner(frame, per_worker, workers, seconds, ready))
+    latencies = list(owner_latencies)
+    for _ in procs:
+        latencies.extend(results.get())
+    for p in procs:
+        p.join()
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    late = np.percentile(np.array(lateness) * 1000, 99)
+    return p50, p99, late, len(latencies) / max(1, workers)
+
+
+def main():
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--viewers", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    frame = _mock_frame()
+    print(f"{args.viewers} viewers, {HZ} Hz frames, {os.cpu_count()} CPUs\n")
+    print(f"{'workers':>7} {'viewers/worker':>15} {'p50 ms':>8} {'p99 ms':>8} {'frame late p99':>15} {'frames/worker':>14}")
+    for workers in args.workers:
+        p50, p99, late, frames = _run(frame, args.viewers, workers, args.seconds)
+        print(f"{workers:>7} {args.viewers // workers:>15} {p50:>8.2f} {p99:>8.2f} {late:>15.2f} {frames:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,13 @@ import socketio
 import uvicorn
 from app.api import api_router
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.fanout import client_manager, claim_telemetry_owner, start_fanout
+from app.core.responses import FastJSONResponse
 from loguru import logger
 
 # 1. Create FastAPI App
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
+app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, default_response_class=FastJSONResponse)
 
 # 2. CORS Middleware
 app.add_middleware(
@@ -17,9 +20,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_BYTES,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
 
 # 3. Socket.IO Setup (Async)
-sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+sio = socketio.AsyncServer(
+    async_mode='asgi', cors_allowed_origins='*',
+    client_manager=client_manager(settings.SOCKETIO_MESSAGE_QUEUE, settings.SOCKETIO_OWNER_PORT)
+)
 sio_app = socketio.ASGIApp(sio, app)
 
 # 4. Include Routers
@@ -32,6 +44,7 @@ from app.engine.voice_engine import VoiceEngine # NEW
 # Global Engine Instance
 telemetry_engine = None
 voice_engine = None
+fanout_owner = None   # Local bus hub / owner lock of the telemetry worker (multi-worker mode)
 
 import asyncio
 
@@ -39,11 +52,20 @@ import asyncio
 async def startup_event():
     from app.core.database import create_db_and_tables
     create_db_and_tables()
-    global telemetry_engine
+    global telemetry_engine, fanout_owner
     logger.info("Neural Lap Backend Starting...")
+
+    # Multi-worker: only one worker reads the sim, the others fan its frames out
+    is_owner, fanout_owner = await claim_telemetry_owner(settings.SOCKETIO_MESSAGE_QUEUE, settings.SOCKETIO_OWNER_PORT)
+    if not is_owner:
+        start_fanout(sio, False, relayed_events=TelemetryEngine.CLIENT_EVENTS, on_state=TelemetryEngine.apply_live_state)
+        logger.info("Socket.IO fan-out worker (telemetry runs in another worker)")
+        return
+
     loop = asyncio.get_running_loop()
     telemetry_engine = TelemetryEngine(sio, loop)
     telemetry_engine.start()
+    start_fanout(sio, True, relay=telemetry_engine.handle_client_event, state=telemetry_engine.live_state)
 
     # Start Voice Engine
     global voice_engine
@@ -57,6 +79,10 @@ async def shutdown_event():
         telemetry_engine.stop()
     if voice_engine:
         voice_engine.stop()
+    from app.engine.jobs import analysis_jobs
+    analysis_jobs.shutdown()
+    if fanout_owner:
+        fanout_owner.close()
 
 @app.get("/")
 async def root():
@@ -72,7 +98,11 @@ async def disconnect(sid):
     logger.info(f"Client disconnected: {sid}")
 
 def start():
-    """Launched with `poetry run start` at root level"""
+    """
+    Launched with `poetry run start` at root level. For several workers
+    (spectator load), run uvicorn directly with SOCKETIO_MESSAGE_QUEUE set:
+        SOCKETIO_MESSAGE_QUEUE=local uvicorn main:sio_app --workers 4
+    """
     uvicorn.run(
         "main:sio_app", 
         host="127.0.0.1", 
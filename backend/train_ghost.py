@@ -1,33 +1,22 @@
+import argparse
+import json
+import os
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
-import numpy as np
-from app.ai.ghost_model_arch import GhostNet
+from torch.utils.data import DataLoader
+from app.ai.ghost_model_arch import GhostNet, export_onnx
+from app.ai.ghost_dataset import GhostDataset, build_dataset, DATASET_DIR, FEATURES
+from app.ai.ghost_optimize import optimize_ghost, held_out_windows
+from app.ai.ghost_registry import ghost_registry
 from loguru import logger
 
-# Mock Dataset Generator (Since we don't have a massive DB yet)
-class TelemetryDataset(Dataset):
-    def __init__(self, num_samples=1000, seq_len=50):
-        self.num_samples = num_samples
-        self.seq_len = seq_len
-        
-        # Generate fake "perfect lap" data
-        # Feature: [Speed, RPM, TrackPos, Heading]
-        self.inputs = torch.randn(num_samples, seq_len, 4)
-        
-        # Target: [Steering, Throttle, Brake]
-        self.targets = torch.rand(num_samples, 3) 
-        # Normalize steering to [-1, 1]
-        self.targets[:, 0] = (self.targets[:, 0] * 2) - 1
-
-    def __len__(self):
-        return self.num_samples
-
-    def __getitem__(self, idx):
-        return self.inputs[idx], self.targets[idx]
-
-def train_ghost():
+def train_ghost(rebuild=False, track=None, car=None):
+    """
+    Trains GhostNet on the recorded laps (optionally of one track/car) and
+    exports it. With track and car the model is added to the ghost model
+    registry, which the live engine loads from.
+    """
     logger.info("Initializing GhostNet Training...")
     
     # 1. Hyperparameters
@@ -35,15 +24,27 @@ def train_ghost():
     EPOCHS = 10
     LR = 0.001
     SEQUENCE_LENGTH = 50
+    NUM_WORKERS = min(4, os.cpu_count() or 1)
     
-    # 2. Data Preparation
+    # 2. Data Preparation (recorded laps compacted once into memory-mapped files)
     logger.info("Loading Telemetry Data...")
-    dataset = TelemetryDataset(num_samples=5000, seq_len=SEQUENCE_LENGTH)
-    dataloader = DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True)
+    if rebuild or not (DATASET_DIR / "meta.json").exists():
+        build_dataset(DATASET_DIR)
+    dataset = GhostDataset(DATASET_DIR, seq_len=SEQUENCE_LENGTH, split="train", track=track, car=car)
+    val_dataset = GhostDataset(DATASET_DIR, seq_len=SEQUENCE_LENGTH, split="val", track=track, car=car)
+    if len(dataset) == 0:
+        logger.error("No recorded laps to train on (drive some laps first).")
+        return
+    logger.info(f"{len(dataset.laps)} train laps ({len(dataset)} windows), {len(val_dataset.laps)} validation laps")
+    dataloader = DataLoader(
+        dataset, batch_size=BATCH_SIZE, shuffle=True,
+        num_workers=NUM_WORKERS, persistent_workers=NUM_WORKERS > 0
+    )
+    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE * 4, num_workers=NUM_WORKERS)
     
     # 3. Model Setup
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model = GhostNet(input_size=4).to(device)
+    model = GhostNet(input_size=len(FEATURES)).to(device)
     criterion = nn.MSELoss() # Imitation Learning = Minimize error vs Human
     optimizer = optim.Adam(model.parameters(), lr=LR)
     
@@ -66,23 +67,50 @@ def train_ghost():
             total_loss += loss.item()
             
         avg_loss = total_loss / len(dataloader)
-        logger.info(f"Epoch {epoch+1}/{EPOCHS} | Loss: {avg_loss:.6f}")
+        val_loss = evaluate(model, val_loader, criterion, device)
+        logger.info(f"Epoch {epoch+1}/{EPOCHS} | Loss: {avg_loss:.6f} | Val: {val_loss:.6f}")
+        model.train()
         
     # 5. Export
     logger.success("Training Complete. Exporting Ghost Model...")
     torch.save(model.state_dict(), "ghost_v1.pth")
+    # Live inference must normalize features exactly like the dataset
+    norm = {key: dataset.meta[key] for key in ("features", "targets", "mean", "std")} | {"seq_len": SEQUENCE_LENGTH}
+    with open("ghost_v1.json", "w") as f:
+        json.dump(norm, f)
     
-    # ONNX Export for fast inference
-    dummy_input = torch.randn(1, SEQUENCE_LENGTH, 4).to(device)
-    torch.onnx.export(
-        model, 
-        dummy_input, 
-        "ghost_v1.onnx", 
-        verbose=False,
-        input_names=["telemetry_sequence"],
-        output_names=["controls"]
-    )
+    # ONNX Export for fast inference (LSTM state in/out for one-step streaming)
+    export_onnx(model, "ghost_v1.onnx", seq_len=SEQUENCE_LENGTH, input_size=len(FEATURES))
     logger.success("Exported to 'ghost_v1.onnx'")
 
+    # 6. CPU variants (fused/int8) + accuracy/latency report for runtime selection
+    windows, targets = held_out_windows(val_dataset)
+    if windows is None:
+        logger.warning("No validation laps, skipping the optimization stage.")
+    else:
+        optimize_ghost("ghost_v1.onnx", windows, targets)
+        logger.success("Wrote ghost_v1.fused.onnx, ghost_v1.int8.onnx and ghost_v1.report.json")
+
+    # 7. Registry (per track/car, versioned)
+    if track and car:
+        ghost_registry.register(track, car, "ghost_v1.onnx", norm)
+
+def evaluate(model, loader, criterion, device):
+    """Mean loss over a loader (0.0 when empty)."""
+    if len(loader) == 0:
+        return 0.0
+    model.eval()
+    total_loss = 0
+    with torch.no_grad():
+        for inputs, targets in loader:
+            inputs, targets = inputs.to(device), targets.to(device)
+            total_loss += criterion(model(inputs), targets).item()
+    return total_loss / len(loader)
+
 if __name__ == "__main__":
-    train_ghost()
+    parser = argparse.ArgumentParser(description="Train GhostNet on recorded laps")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the dataset from the lap store and its archive")
+    parser.add_argument("--track", help="Train on (and register for) one track")
+    parser.add_argument("--car", help="Train on (and register for) one car")
+    args = parser.parse_args()
+    train_ghost(rebuild=args.rebuild, track=args.track, car=args.car)
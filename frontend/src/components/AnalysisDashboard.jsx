@@ -81,7 +81,7 @@ const AnalysisDashboard = () => {
                             <h2 className="text-lg font-bold text-gray-400 border-l-4 border-purple-500 pl-3">PRO COMPARISON</h2>
                             <div className="flex gap-4 text-xs font-bold">
                                 <span className="text-cyan-400">YOU</span>
-                                <span className="text-purple-500">MAX VERSTAPPEN</span>
+                                <span className="text-purple-500">{(proData?.driver || 'Reference').toUpperCase()}</span>
                             </div>
                         </div>
 
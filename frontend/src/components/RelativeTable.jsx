@@ -63,6 +63,50 @@ export const RelativeTable = React.memo(({ drivers }) => {
 
     if (!drivers || drivers.length === 0) return null;
 
+    // Rows arrive ordered from furthest ahead to furthest behind, the player row included
+    const player = drivers.find(d => d.is_player);
+    const others = drivers.filter(d => !d.is_player);
+    const ahead = others.filter(d => d.gap >= 0);
+    const behind = others.filter(d => d.gap < 0);
+
+    const renderRows = (rows) => (
+        <div className="flex flex-col gap-1.5 pointer-events-none">
+            {rows.map((driver) => {
+                // Just basic logic for gap color: red if close < 1s
+                const isClose = Math.abs(driver.gap) < 1.0;
+                const gapColor = isClose ? "text-red-500 font-bold animate-pulse" : "text-green-400";
+
+                // Name color: lapped cars blue, cars lapping you red
+                let nameColor = "text-white";
+                if (driver.is_lapped) nameColor = "text-blue-400";
+                if (driver.is_lapping) nameColor = "text-red-500 font-bold";
+
+                return (
+                    <div key={driver.car_idx} className="flex items-center justify-between text-sm group">
+                        <div className="w-8 text-xs font-mono text-gray-500">{driver.pos}</div>
+
+                        <div className="flex-1 flex flex-col border-l-2 pl-1.5" style={{ borderColor: driver.class_color }}>
+                            <div className={cn("font-bold tracking-tight", nameColor)}>
+                                #{driver.car_idx} {driver.name}
+                            </div>
+                            {/* iRating / SR Badge (iRacing only) */}
+                            {driver.ir && (
+                                <div className="flex gap-2 text-[9px] opacity-60 group-hover:opacity-100 transition-opacity">
+                                    <span className="text-yellow-500">iR {driver.ir}</span>
+                                    <span className="text-cyan-400">{driver.sr}</span>
+                                </div>
+                            )}
+                        </div>
+
+                        <div className={cn("font-mono font-medium w-12 text-right", gapColor)}>
+                            {driver.gap > 0 ? '+' : ''}{driver.gap.toFixed(1)}
+                        </div>
+                    </div>
+                )
+            })}
+        </div>
+    );
+
     return (
         <div
             className={cn(
@@ -88,48 +132,18 @@ export const RelativeTable = React.memo(({ drivers }) => {
                 <span>GAP</span>
             </div>
 
-            <div className="flex flex-col gap-1.5 pointer-events-none">
-                {drivers.map((driver, idx) => {
-                    // Just basic logic for gap color: red if close < 1s
-                    const isClose = Math.abs(driver.gap) < 1.0;
-                    const gapColor = isClose ? "text-red-500 font-bold animate-pulse" : "text-green-400";
-
-                    // Name color based on class/flag
-                    let nameColor = "text-white";
-                    if (driver.class_color === 'blue') nameColor = "text-blue-400"; // Lapped
-                    if (driver.class_color === 'red') nameColor = "text-red-500 font-bold"; // Rival
-
-                    return (
-                        <div key={idx} className="flex items-center justify-between text-sm group">
-                            <div className="w-8 text-xs font-mono text-gray-500">{driver.pos}</div>
+            {renderRows(ahead)}
 
-                            <div className="flex-1 flex flex-col">
-                                <div className={cn("font-bold tracking-tight", nameColor)}>
-                                    #{driver.car_idx} {driver.name}
-                                </div>
-                                {/* iRating / SR Badge */}
-                                <div className="flex gap-2 text-[9px] opacity-60 group-hover:opacity-100 transition-opacity">
-                                    <span className="text-yellow-500">iR {driver.ir}</span>
-                                    <span className="text-cyan-400">{driver.sr}</span>
-                                </div>
-                            </div>
-
-                            <div className={cn("font-mono font-medium w-12 text-right", gapColor)}>
-                                {driver.gap > 0 ? '+' : ''}{driver.gap.toFixed(1)}
-                            </div>
-                        </div>
-                    )
-                })}
-            </div>
-
-            {/* User Row (Center Mock) */}
+            {/* User Row */}
             <div className="my-2 bg-white/10 p-2 -mx-2 rounded relative border-l-4 border-yellow-500">
                 <div className="flex justify-between items-center">
-                    <span className="text-xs font-bold text-yellow-500">P8</span>
+                    <span className="text-xs font-bold text-yellow-500">{player ? player.pos : 'P-'}</span>
                     <span className="text-sm font-black text-white">YOU</span>
                     <span className="text-xs font-mono text-gray-400">---</span>
                 </div>
             </div>
+
+            {renderRows(behind)}
         </div>
     );
 });